@@ -0,0 +1,144 @@
+"""
+Response cache for agent requests.
+
+Entries are keyed on (normalized request, model, data version), so any write to
+the task or hours store changes the key and old answers are never served. A
+bounded in-memory LRU with TTL sits in front of an optional SQLite tier that
+survives restarts.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import AGENT_CACHE_ENABLED, AGENT_CACHE_MAX_ENTRIES, AGENT_CACHE_TTL, AGENT_CACHE_DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache (expires_at);
+"""
+
+
+def normalize_request(text: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a request."""
+    return re.sub(r"\s+", " ", text.lower()).strip().rstrip("?!. ")
+
+
+def make_key(request: str, model: str, data_version: str) -> str:
+    raw = json.dumps([normalize_request(request), model, data_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of JSON-serializable responses, optionally backed by SQLite. Thread-safe."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (time.time(),))
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    self.counters["memory_hits"] += 1
+                    return json.loads(value)
+                del self._entries[key]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM response_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._put_memory(key, row[0], row[1])
+                    self.counters["hits"] += 1
+                    self.counters["disk_hits"] += 1
+                    return json.loads(row[0])
+            self.counters["misses"] += 1
+        return None
+
+    def _put_memory(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def set(self, key: str, value: Dict[str, Any]):
+        encoded = json.dumps(value, default=str)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, encoded, expires_at)
+            self.counters["stores"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, encoded, expires_at),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM response_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._entries)
+            disk_size = (
+                self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+                if self._conn is not None else None
+            )
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            "size": size,
+            "disk_size": disk_size,
+            "ttl": self.ttl,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide agent response cache (None when AGENT_CACHE_ENABLED is off)."""
+    global _cache
+    if not AGENT_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(AGENT_CACHE_MAX_ENTRIES, AGENT_CACHE_TTL, AGENT_CACHE_DB_PATH or None)
+    return _cache
@@ -1,4 +1,8 @@
-from typing import Dict, List, Optional, Any
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Any, Iterator, Tuple
 from config import (
     LLM_MODEL,
     LLM_PROVIDER,
@@ -6,8 +10,15 @@ from config import (
     GEMINI_MODEL,
     LLAMA_MODEL_PATH,
     OPENAI_API_KEY,
+    AGENT_MAX_TURNS,
+    AGENT_TOOL_WORKERS,
+    AGENT_FAST_PATH,
 )
 from agent.router import RequestRouter
+from agent.cache import ResponseCache, get_response_cache, make_key
+from agent.tool_calls import parse_tool_calls, execute_tool_calls, format_tool_results, estimate_tokens
+from utils.singleflight import get_singleflight
+from utils.intent_parser import try_fast_path
 
 from tools.task_tools import (
     create_task,
@@ -43,16 +54,105 @@ except ImportError:
     _VIS_TOOLS = []
 
 
+# Shared by all agent instances; tool calls within a turn run concurrently here.
+_tool_pool: Optional[ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+
+
+# Router tool groups are module names; hours tools travel with task tools.
+TOOL_GROUP_ALIASES = {"hours_tools": "task_tools"}
+
+# Prompt-size / latency figures per routed tool-group combination (process-wide)
+_prompt_stats: Dict[str, Dict[str, Any]] = {}
+_prompt_stats_lock = threading.Lock()
+
+
+def tool_group(tool: Callable) -> str:
+    group = tool.__module__.rsplit(".", 1)[-1]
+    return TOOL_GROUP_ALIASES.get(group, group)
+
+
+def _record_prompt_stats(key: str, offered_tokens: int, full_tokens: int, tools: int, model_ms: float, fallback: bool):
+    with _prompt_stats_lock:
+        entry = _prompt_stats.setdefault(key, {
+            "requests": 0, "tools_offered": 0, "manifest_tokens": 0, "full_manifest_tokens": 0,
+            "model_ms": 0.0, "fallbacks": 0,
+        })
+        entry["requests"] += 1
+        entry["tools_offered"] += tools
+        entry["manifest_tokens"] += offered_tokens
+        entry["full_manifest_tokens"] += full_tokens
+        entry["model_ms"] += model_ms
+        entry["fallbacks"] += int(fallback)
+
+
+def prompt_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per tool-group averages: tools offered, estimated manifest tokens sent per
+    request (summed over its model calls, retries included) vs the full set on
+    the same calls, model latency.
+    """
+    with _prompt_stats_lock:
+        snapshot = {k: dict(v) for k, v in _prompt_stats.items()}
+    report = {}
+    for key, e in snapshot.items():
+        n = e["requests"]
+        report[key] = {
+            "requests": n,
+            "avg_tools_offered": round(e["tools_offered"] / n, 1),
+            "avg_manifest_tokens": round(e["manifest_tokens"] / n),
+            "avg_full_manifest_tokens": round(e["full_manifest_tokens"] / n),
+            "token_reduction_pct": round(100 * (1 - e["manifest_tokens"] / e["full_manifest_tokens"]), 1)
+            if e["full_manifest_tokens"] else 0.0,
+            "avg_model_ms": round(e["model_ms"] / n, 1),
+            "fallbacks": e["fallbacks"],
+        }
+    return report
+
+
+# A plain reply saying the tool it needs is not there ("I don't have a tool for ...")
+_MISSING_TOOL_RE = re.compile(
+    r"\b(?:(?:don|doesn)['’]t|do not|does not) have (?:a |an |the |any )?(?:access to (?:a |an |the |any )?)?(?:\w+ )?(?:tool|function)s?\b"
+    r"|\bno (?:\w+ )?(?:tool|function)s? (?:is |are )?available"
+    r"|\b(?:tool|function)s? (?:is |are )?(?:not |un)available"
+    r"|\bunknown tool\b",
+    re.IGNORECASE,
+)
+
+
+def _may_be_tool_call(text: str) -> bool:
+    """True while a reply could still turn out to be <tool_call> markup."""
+    head = text.lstrip()
+    return "<tool_call>".startswith(head) or head.startswith("<tool_call>")
+
+
+SYSTEM_PROMPT = """You are a Task Management & Productivity Agent.
+You help users manage tasks, track productivity, send reminders, and create visualizations.
+Use the available tools to accomplish the user's request.
+Be helpful, concise, and action-oriented."""
+
+
+# Tools that change data or send messages; answers that used them are never cached
+SIDE_EFFECT_TOOLS = {
+    "create_task", "update_task_status", "delete_task", "log_working_hours",
+    "send_task_reminder", "send_productivity_summary", "send_task_completion_notification", "send_custom_email",
+}
+# Router categories whose requests are actions, not questions
+SIDE_EFFECT_CATEGORIES = {"task_creation", "task_update", "email"}
+
+
 class TaskManagementAgent:
     """
     Main orchestrator for the Task Management & Productivity Agent.
     Coordinates all tools and provides a unified interface.
     """
+    response_cache: Optional[ResponseCache] = None
     
     def __init__(self, model: str = None):
         self.model = model or GEMINI_MODEL or LLM_MODEL
         self.router = RequestRouter()
         self.tools = self._register_all_tools()
+        self.response_cache = get_response_cache()
         self.client = None
         self._initialize_client()
 
@@ -119,18 +219,57 @@ class TaskManagementAgent:
         tools.extend(_VIS_TOOLS)
         return tools
     
-    def process_request(self, request: str, use_llm: bool = True) -> Dict[str, Any]:
+    def answer_fast(self, request: str, routing: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer a plain task-listing question straight from the task store
+        (see utils.intent_parser). None when the request needs the model.
+        """
+        if not AGENT_FAST_PATH:
+            return None
+        from tools.task_tools import task_manager
+        fast = try_fast_path(request, task_manager, "agent")
+        if fast is None:
+            return None
+        return {
+            'status': 'success',
+            'response': fast['answer'],
+            'routing': routing or self.router.route(request),
+            'model': None,
+            'tools_used': 0,
+            'tool_calls': [],
+            'turns': [],
+            'fast_path': True,
+            'filters': fast['filters'],
+            'tasks_found': fast['count'],
+            'cached': False,
+        }
+
+    def process_request(
+        self, request: str, use_llm: bool = True, max_turns: int = AGENT_MAX_TURNS, fast_path: bool = True
+    ) -> Dict[str, Any]:
         """
         Process a natural language request using the agent.
-        
+
+        Plain task-listing questions are answered from the store without the
+        model (answer_fast). Everything else runs a tool-calling loop: the
+        model's <tool_call> blocks are executed (in parallel within a turn),
+        their results are fed back, and the model is called again until it
+        answers without tool calls or max_turns is hit.
+
         Args:
             request: User's natural language request
             use_llm: Whether to use LLM for processing (requires Python 3.10+)
-        
+            max_turns: Maximum model calls for this request
+            fast_path: Try the deterministic answer first (False when the caller already did)
+
         Returns:
             Dictionary with response and execution details
         """
         routing = self.router.route(request)
+        if fast_path:
+            fast = self.answer_fast(request, routing)
+            if fast is not None:
+                return fast
         
         if not use_llm or not self.client:
             return {
@@ -142,32 +281,86 @@ class TaskManagementAgent:
                 'note': 'All tools work directly without LLM - use CLI commands instead'
             }
         
+        cache_key, flight_key = self._request_keys(request, routing)
+        cached = self._cached(cache_key, routing)
+        if cached is not None:
+            return cached
+        if flight_key:
+            # Identical read-only questions arriving together share one model run
+            return get_singleflight("agent").do(
+                (flight_key, max_turns), self._run_loop, request, routing, max_turns, cache_key
+            )
+        return self._run_loop(request, routing, max_turns, cache_key)
+
+    def cached_response(
+        self, request: str, max_turns: int = AGENT_MAX_TURNS
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Hashable]]:
+        """
+        Cache lookup for a model request, for callers that admit work
+        themselves: (cached result, None) on a hit, else (None, flight key).
+        Requests with the same flight key can share one process_request run;
+        the key is None for actions, which never do.
+        """
+        routing = self.router.route(request)
+        cache_key, flight_key = self._request_keys(request, routing)
+        cached = self._cached(cache_key, routing)
+        if cached is not None:
+            return cached, None
+        return None, (flight_key, max_turns) if flight_key else None
+
+    def _cached(self, cache_key: Optional[str], routing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        return {**cached, 'routing': routing, 'cached': True} if cached is not None else None
+
+    def _run_loop(self, request: str, routing: Dict[str, Any], max_turns: int, cache_key: Optional[str]) -> Dict[str, Any]:
+        messages = self._messages(request)
+        offered = self.select_tools(routing)
+        initial = offered
+        sent: List[List[Callable]] = []
+        turns: List[Dict[str, Any]] = []
+        tool_calls: List[Dict[str, Any]] = []
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a Task Management & Productivity Agent.
-You help users manage tasks, track productivity, send reminders, and create visualizations.
-Use the available tools to accomplish the user's request.
-Be helpful, concise, and action-oriented."""
-                    },
-                    {
-                        "role": "user",
-                        "content": request
+            for turn in range(1, max_turns + 1):
+                started = time.perf_counter()
+                sent.append(offered)
+                content = self._complete(messages, offered, max_turns)
+                calls = parse_tool_calls(content)
+                if self._needs_all_tools(content, calls, offered):
+                    offered = self.tools
+                    sent.append(offered)
+                    content = self._complete(messages, offered, max_turns)
+                    calls = parse_tool_calls(content)
+                model_ms = (time.perf_counter() - started) * 1000
+                if not calls:
+                    turns.append(self._turn_timing(turn, model_ms, 0.0, 0))
+                    self._record_request(routing, initial, sent, turns)
+                    result = {
+                        'status': 'success',
+                        'response': content,
+                        'routing': routing,
+                        'model': self.model,
+                        'tools_used': len(tool_calls),
+                        'tool_calls': tool_calls,
+                        'turns': turns,
+                        'tools_offered': len(initial),
+                        'fallback': any(tools is not initial for tools in sent),
                     }
-                ],
-                tools=self.tools,
-                max_turns=10
-            )
-            
+                    self._cache_store(cache_key, result)
+                    return {**result, 'cached': False}
+                offered = self._widen_if_needed(calls, offered)
+                results, tools_ms = self._run_tool_calls(calls)
+                turns.append(self._turn_timing(turn, model_ms, tools_ms, len(calls)))
+                tool_calls.extend({k: v for k, v in r.items() if k != 'result'} for r in results)
+                messages.append({"role": "assistant", "content": content})
+                messages.append({"role": "tool", "content": format_tool_results(results)})
+            self._record_request(routing, initial, sent, turns)
             return {
-                'status': 'success',
-                'response': response.choices[0].message.content,
+                'status': 'error',
+                'message': f'Agent did not reach a final answer within {max_turns} turns',
                 'routing': routing,
-                'model': self.model,
-                'tools_used': len(response.choices[0].message.tool_calls) if hasattr(response.choices[0].message, 'tool_calls') and response.choices[0].message.tool_calls else 0
+                'tools_used': len(tool_calls),
+                'tool_calls': tool_calls,
+                'turns': turns,
             }
         except Exception as e:
             return {
@@ -176,7 +369,246 @@ Be helpful, concise, and action-oriented."""
                 'routing': routing,
                 'error': str(e)
             }
-    
+
+    def _complete(self, messages: List[Dict[str, str]], tools: List[Callable], max_turns: int) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            max_turns=max_turns
+        )
+        if getattr(response, "error", None):
+            raise RuntimeError(response.choices[0].message.content)
+        return response.choices[0].message.content or ""
+
+    def _messages(self, request: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": request},
+        ]
+
+    def _request_keys(self, request: str, routing: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (cache_key, flight_key) for a read-only request; (None, None) for actions.
+        The cache key is None when caching is off or the store has no data version.
+        """
+        if SIDE_EFFECT_CATEGORIES & set(routing.get('categories', [])):
+            return None, None
+        from db.factory import get_data_version
+        version = get_data_version()
+        flight_key = make_key(request, self.model, version or "")
+        cache_key = flight_key if version and self.response_cache is not None else None
+        return cache_key, flight_key
+
+    def _cache_store(self, key: Optional[str], result: Dict[str, Any]):
+        if key and not any(call['name'] in SIDE_EFFECT_TOOLS for call in result.get('tool_calls', [])):
+            self.response_cache.set(key, {k: v for k, v in result.items() if k != 'routing'})
+
+    def select_tools(self, routing: Dict[str, Any]) -> List[Callable]:
+        """
+        Tools in the router's recommended groups (task_tools, email_tools, ...).
+        All tools when the router had no real match ("general"), or when the
+        groups cover every tool anyway.
+        """
+        if 'general' in routing.get('categories', []):
+            return self.tools
+        groups = set(routing.get('recommended_tools') or [])
+        subset = [tool for tool in self.tools if tool_group(tool) in groups]
+        return subset if subset and len(subset) < len(self.tools) else self.tools
+
+    def _needs_all_tools(self, reply: str, calls: List[Dict[str, Any]], offered: List[Callable]) -> bool:
+        """
+        Whether to re-ask this turn with the full tool set: the routed subset
+        got a reply without usable tool calls that either says the tool it
+        needs is missing or starts <tool_call> markup that did not parse.
+        Calls to tools outside the subset are handled by _widen_if_needed.
+        """
+        if offered is self.tools or calls:
+            return False
+        return "<tool_call>" in reply or bool(_MISSING_TOOL_RE.search(reply))
+
+    def _widen_if_needed(self, calls: List[Dict[str, Any]], offered: List[Callable]) -> List[Callable]:
+        """Fall back to the full tool set once the model asks for a tool outside the routed subset."""
+        names = {tool.__name__ for tool in offered}
+        if offered is not self.tools and any(call["name"] not in names for call in calls):
+            return self.tools
+        return offered
+
+    def _manifest_tokens(self, tools: List[Callable]) -> int:
+        render = getattr(self.client, "_convert_tools_to_prompt", None)
+        if callable(render):
+            text = render(tools)
+        else:
+            text = "\n".join(f"{tool.__name__}: {tool.__doc__ or ''}" for tool in tools)
+        return estimate_tokens(text)
+
+    def _record_request(
+        self, routing: Dict[str, Any], initial: List[Callable], sent: List[List[Callable]], turns: List[Dict[str, Any]]
+    ):
+        """`sent` holds the tool list of every model call, so retried and widened calls count at their real size."""
+        key = "all" if initial is self.tools else "+".join(routing.get('recommended_tools') or []) or "all"
+        sizes = {id(self.tools): self._manifest_tokens(self.tools)}
+        for tools in sent:
+            if id(tools) not in sizes:
+                sizes[id(tools)] = self._manifest_tokens(tools)
+        _record_prompt_stats(
+            key,
+            offered_tokens=sum(sizes[id(tools)] for tools in sent),
+            full_tokens=sizes[id(self.tools)] * len(sent),
+            tools=len(initial),
+            model_ms=sum(t['model_ms'] for t in turns),
+            fallback=any(tools is not initial for tools in sent),
+        )
+
+    @property
+    def tool_registry(self) -> Dict[str, Callable]:
+        return {tool.__name__: tool for tool in self.tools}
+
+    def _run_tool_calls(self, calls: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], float]:
+        """Execute one turn's tool calls on the shared pool. Returns (results, elapsed_ms)."""
+        global _tool_pool
+        with _tool_pool_lock:
+            if _tool_pool is None:
+                _tool_pool = ThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool")
+        started = time.perf_counter()
+        results = execute_tool_calls(calls, self.tool_registry, _tool_pool)
+        return results, (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _turn_timing(turn: int, model_ms: float, tools_ms: float, calls: int) -> Dict[str, Any]:
+        return {'turn': turn, 'model_ms': round(model_ms, 1), 'tools_ms': round(tools_ms, 1), 'tool_calls': calls}
+
+    @staticmethod
+    def fast_events(result: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Stream events for an answer_fast() or cached_response() result (same shape as stream_request)."""
+        yield "routing", result['routing']
+        yield "chunk", {"text": result['response']}
+        yield "done", {
+            "response": result['response'],
+            "model": result.get('model'),
+            "ttft_ms": 0.0,
+            "total_ms": 0.0,
+            "turns": [],
+            "cached": result.get('cached', False),
+            "fast_path": result.get('fast_path', False),
+        }
+
+    def stream_request(
+        self, request: str, max_turns: int = AGENT_MAX_TURNS, fast_path: bool = True
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Process a request, yielding events as they become available:
+        ("routing", routing) immediately, ("chunk", {"text"}) per generated
+        chunk, ("tool_results", {"turn", "calls"}) after each tool-calling
+        turn, then ("done", {"response", "model", "ttft_ms", "total_ms", "turns"})
+        or ("error", {"message"}). Clients without streaming yield one chunk per turn.
+
+        Replies that start like a <tool_call> block are held back rather than
+        streamed, so tool-call markup never reaches the client. When a reply
+        from the routed tool subset says a tool is missing, ("fallback",
+        {"turn", "tools_offered"}) tells the client to drop that turn's chunks
+        and the turn is asked again with every tool.
+        """
+        started = time.perf_counter()
+        routing = self.router.route(request)
+        fast = self.answer_fast(request, routing) if fast_path else None
+        if fast is not None:
+            yield from self.fast_events(fast)
+            return
+        yield "routing", routing
+        if not self.client:
+            yield "error", {"message": "LLM not available. Download Llama model or configure OpenAI."}
+            return
+        cache_key, _ = self._request_keys(request, routing)
+        cached = self.response_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            yield "chunk", {"text": cached["response"]}
+            yield "done", {
+                "response": cached["response"],
+                "model": cached.get("model", self.model),
+                "ttft_ms": round((time.perf_counter() - started) * 1000, 1),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+                "turns": [],
+                "cached": True,
+            }
+            return
+        completions = self.client.chat.completions
+        messages = self._messages(request)
+        offered = self.select_tools(routing)
+        initial = offered
+        sent: List[List[Callable]] = []
+        parts: List[str] = []
+        turns: List[Dict[str, Any]] = []
+        tool_calls: List[Dict[str, Any]] = []
+        ttft_ms = None
+        try:
+            for turn in range(1, max_turns + 1):
+                turn_started = time.perf_counter()
+                while True:
+                    sent.append(offered)
+                    streamed_from = len(parts)
+                    if hasattr(completions, "stream"):
+                        chunks = completions.stream(model=self.model, messages=messages, tools=offered)
+                    else:
+                        chunks = [self._complete(messages, offered, max_turns)]
+                    reply = ""
+                    streaming = False
+                    for text in chunks:
+                        reply += text
+                        if not streaming:
+                            if _may_be_tool_call(reply):
+                                continue
+                            streaming = True
+                            text = reply  # release what was held back for this turn
+                        if ttft_ms is None:
+                            ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                        parts.append(text)
+                        yield "chunk", {"text": text}
+                    calls = parse_tool_calls(reply)
+                    if not self._needs_all_tools(reply, calls, offered):
+                        break
+                    del parts[streamed_from:]
+                    offered = self.tools
+                    yield "fallback", {"turn": turn, "tools_offered": len(offered)}
+                model_ms = (time.perf_counter() - turn_started) * 1000
+                if not calls:
+                    if not streaming and reply:
+                        parts.append(reply)
+                        yield "chunk", {"text": reply}
+                    turns.append(self._turn_timing(turn, model_ms, 0.0, 0))
+                    break
+                offered = self._widen_if_needed(calls, offered)
+                results, tools_ms = self._run_tool_calls(calls)
+                turns.append(self._turn_timing(turn, model_ms, tools_ms, len(calls)))
+                summaries = [{k: v for k, v in r.items() if k != "result"} for r in results]
+                tool_calls.extend(summaries)
+                yield "tool_results", {"turn": turn, "calls": summaries}
+                messages.append({"role": "assistant", "content": reply})
+                messages.append({"role": "tool", "content": format_tool_results(results)})
+            else:
+                self._record_request(routing, initial, sent, turns)
+                yield "error", {"message": f"Agent did not reach a final answer within {max_turns} turns"}
+                return
+        except Exception as e:
+            yield "error", {"message": f"Error processing request: {e}"}
+            return
+        self._record_request(routing, initial, sent, turns)
+        response = "".join(parts)
+        self._cache_store(cache_key, {
+            "status": "success", "response": response, "model": self.model,
+            "tools_used": len(tool_calls), "tool_calls": tool_calls, "turns": turns,
+        })
+        yield "done", {
+            "response": response,
+            "model": self.model,
+            "ttft_ms": ttft_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "turns": turns,
+            "tools_offered": len(initial),
+            "fallback": any(tools is not initial for tools in sent),
+            "cached": False,
+        }
+
     def get_available_tools(self) -> List[Dict]:
         """Get list of all available tools with descriptions"""
         tools_info = []
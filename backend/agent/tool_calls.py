@@ -0,0 +1,110 @@
+"""
+Text-protocol tool calling for models without native function calling (Gemini
+via prompt, local Llama).
+
+The model asks for tools by emitting one or more blocks:
+
+    <tool_call>{"name": "create_task", "arguments": {"title": "Demo"}}</tool_call>
+
+The agent runs them, appends the results as a "tool" message and calls the
+model again until it answers without tool calls.
+"""
+import inspect
+import json
+import re
+import time
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Any
+
+TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
+
+TOOL_CALL_INSTRUCTIONS = """To use a tool, reply with one or more blocks of the form
+<tool_call>{"name": "<tool name>", "arguments": {<keyword arguments>}}</tool_call>
+and nothing else. Tool calls in the same reply run in parallel, so only group calls
+that do not depend on each other's results. The results come back in the next
+message. When you have what you need, reply with the final answer and no tool_call blocks."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) for prompt-size metrics."""
+    return (len(text) + 3) // 4
+
+
+def tool_signature(tool: Callable) -> str:
+    """`name(arg: type = default, ...)` for the tool manifest."""
+    try:
+        params = str(inspect.signature(tool))
+    except (TypeError, ValueError):
+        params = "(...)"
+    params = params.replace("typing.", "")
+    return f"{getattr(tool, '__name__', str(tool))}{params}"
+
+
+def parse_tool_calls(text: str) -> List[Dict[str, Any]]:
+    """
+    Extract tool calls from a model reply. Returns [{"id", "name", "arguments"}];
+    a malformed block becomes a call with "error" set so the model can correct it.
+    """
+    calls = []
+    for index, match in enumerate(TOOL_CALL_RE.finditer(text or "")):
+        call = {"id": f"call_{index}", "name": "", "arguments": {}}
+        try:
+            data = json.loads(match.group(1))
+            call["name"] = data["name"]
+            call["arguments"] = data.get("arguments") or {}
+            if not isinstance(call["arguments"], dict):
+                raise ValueError("arguments must be an object")
+        except (ValueError, KeyError, TypeError) as e:
+            call["error"] = f"Malformed tool call: {e}"
+        calls.append(call)
+    return calls
+
+
+def _run_one(call: Dict[str, Any], registry: Dict[str, Callable]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = {"id": call["id"], "name": call["name"], "arguments": call["arguments"]}
+    tool = registry.get(call["name"])
+    if call.get("error"):
+        result.update(ok=False, error=call["error"])
+    elif tool is None:
+        result.update(ok=False, error=f"Unknown tool: {call['name']}")
+    else:
+        try:
+            result.update(ok=True, result=tool(**call["arguments"]))
+        except Exception as e:
+            result.update(ok=False, error=f"{type(e).__name__}: {e}")
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def execute_tool_calls(
+    calls: List[Dict[str, Any]], registry: Dict[str, Callable], executor: Executor
+) -> List[Dict[str, Any]]:
+    """Run a turn's tool calls concurrently; results keep the order of `calls`."""
+    if len(calls) == 1:
+        return [_run_one(calls[0], registry)]
+    futures = [executor.submit(_run_one, call, registry) for call in calls]
+    return [f.result() for f in futures]
+
+
+def format_tool_results(results: List[Dict[str, Any]]) -> str:
+    """Tool message content fed back to the model."""
+    blocks = []
+    for r in results:
+        body = {"result": r["result"]} if r["ok"] else {"error": r["error"]}
+        blocks.append(
+            f'<tool_result id="{r["id"]}" name="{r["name"]}">{json.dumps(body, default=str)}</tool_result>'
+        )
+    return "\n".join(blocks)
+
+
+def render_conversation(messages: List[Dict[str, str]]) -> str:
+    """Flatten a multi-turn message list (user/assistant/tool) into one prompt."""
+    labels = {"user": "User", "assistant": "Assistant", "tool": "Tool results"}
+    parts = []
+    for msg in messages:
+        role = msg.get("role", "")
+        if role == "system":
+            continue
+        parts.append(f"{labels.get(role, role.title())}: {msg.get('content', '')}")
+    return "\n\n".join(parts)
@@ -2,12 +2,18 @@
 FastAPI server for Agentic Task & Management (Remote Team Productivity).
 REST API: tasks, working hours, productivity report, agent.
 """
+import json
 import os
+import threading
 from datetime import datetime, timedelta
 from typing import Optional, List
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -18,9 +24,11 @@ from config import (
     WEBHOOK_URL_SLACK_AGENT,
     WEBHOOK_URL_SLACK,
     GOOGLE_OAUTH_CLIENT_ID,
+    WEBHOOK_DRAIN_TIMEOUT,
+    JOB_EVENT_POLL_INTERVAL,
+    SANDBOX_MODE,
 )
-from db.factory import get_task_manager_factory
-from db.firebase import get_hours_repository
+from db.factory import get_task_manager_factory, get_hours_repository_factory
 from models.task import Task
 from models.working_hours import WorkingHours
 from tools.task_tools import (
@@ -29,13 +37,27 @@ from tools.task_tools import (
     get_all_tasks as tool_get_all_tasks,
     delete_task as tool_delete_task,
     calculate_productivity_metrics,
+    archive_completed_tasks as tool_archive_tasks,
+    create_tasks_batch as tool_create_batch,
+    update_tasks_batch as tool_update_batch,
+    delete_tasks_batch as tool_delete_batch,
 )
 from tools.hours_tools import log_working_hours as tool_log_hours, get_working_hours as tool_get_hours
-from agent.orchestrator import TaskManagementAgent
-from utils.webhooks import notify_task_event, notify_agent_breakdown
+from agent.orchestrator import TaskManagementAgent, prompt_stats
+from utils.webhooks import notify_task_event, notify_task_batch, notify_agent_breakdown
+from utils.dispatcher import get_dispatcher
+from utils.http_pool import get_http_pool
+from utils.singleflight import get_singleflight, singleflight_stats
+from utils.admission import get_llm_executor, AdmissionRejected, DeadlineExceeded
+from utils.jobs import JobManager, get_job_manager, FINISHED_STATES
+from utils.intent_parser import fast_path_stats
+from utils.query_code_cache import get_query_code_cache
+from utils.sandbox import get_sandbox_pool, sandbox_stats, close_sandbox_pool
 
 
 # --- Pydantic models ---
+BATCH_MAX_ITEMS = 5000
+
 class TaskCreate(BaseModel):
     title: str
     description: str = ""
@@ -55,6 +77,24 @@ class TaskUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 
+class TaskBatchUpdateItem(TaskUpdate):
+    task_id: str
+
+
+class TaskBatchCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., max_length=BATCH_MAX_ITEMS)
+    atomic: bool = False
+
+
+class TaskBatchUpdate(BaseModel):
+    tasks: List[TaskBatchUpdateItem] = Field(..., max_length=BATCH_MAX_ITEMS)
+    atomic: bool = False
+
+
+class TaskBatchDelete(BaseModel):
+    task_ids: List[str] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+
 class WorkingHoursCreate(BaseModel):
     task_id: str
     user_id: str
@@ -67,13 +107,29 @@ class AgentRequest(BaseModel):
     request: str
 
 
+class JobCreate(BaseModel):
+    kind: str
+    params: dict = Field(default_factory=dict)
+
+
 # --- App ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: ensure task manager can be created (lazy Firebase init on first request is ok)
+    # Move long-completed tasks to the archive so the hot task list stays small
+    tool_archive_tasks()
+    dispatcher = get_dispatcher()
+    dispatcher.start()
+    get_jobs().start()
+    if SANDBOX_MODE == "process":
+        # Warm the code sandbox workers in the background (pandas/matplotlib imports)
+        threading.Thread(target=get_sandbox_pool().start, daemon=True).start()
     yield
-    # Shutdown
-    pass
+    get_jobs().shutdown()
+    close_sandbox_pool()
+    # Shutdown: flush queued webhooks before exiting
+    dispatcher.shutdown(timeout=WEBHOOK_DRAIN_TIMEOUT)
+    get_http_pool().close()
 
 
 app = FastAPI(
@@ -98,15 +154,48 @@ def list_tasks(
     status: Optional[str] = Query(None),
     assignee: Optional[str] = Query(None),
     tag: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
 ):
-    result = tool_get_all_tasks(status=status, assignee=assignee, tag=tag)
+    result = tool_get_all_tasks(status=status, assignee=assignee, tag=tag, include_archived=include_archived)
+    return result
+
+
+# Batch endpoints: every item is validated, valid items are applied in one store
+# write, and one aggregated notification is sent per batch.
+@app.post("/api/tasks:batch")
+def create_tasks_batch(body: TaskBatchCreate):
+    result = tool_create_batch([t.model_dump() for t in body.tasks], atomic=body.atomic)
+    created = [r["task"] for r in result["results"] if r["status"] == "success"]
+    notify_task_batch("created", created)
+    return result
+
+
+@app.patch("/api/tasks:batch")
+def update_tasks_batch(body: TaskBatchUpdate):
+    items = [t.model_dump(exclude_unset=True) for t in body.tasks]
+    result = tool_update_batch(items, atomic=body.atomic)
+    completed = [
+        r["task"] for r, item in zip(result["results"], items)
+        if r["status"] == "success" and item.get("status") == "completed"
+    ]
+    notify_task_batch("completed", completed)
     return result
 
 
+@app.delete("/api/tasks:batch")
+def delete_tasks_batch(body: TaskBatchDelete):
+    return tool_delete_batch(body.task_ids)
+
+
+@app.post("/api/tasks/archive")
+def archive_tasks(older_than_days: Optional[int] = Query(None, ge=1)):
+    return tool_archive_tasks(older_than_days=older_than_days)
+
+
 @app.get("/api/tasks/{task_id}")
 def get_task(task_id: str):
     tm = get_task_manager_factory()
-    task = tm.get_task(task_id)
+    task = tm.get_task(task_id) or tm.get_archived_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task.to_dict()
@@ -183,13 +272,9 @@ def list_working_hours(
 
 
 # --- Productivity report ---
-@app.get("/api/productivity/report")
-def productivity_report(
-    assignee: Optional[str] = Query(None),
-    days: int = Query(30, ge=1, le=365),
-):
+def _build_productivity_report(assignee: Optional[str], days: int) -> dict:
     result = calculate_productivity_metrics(assignee=assignee, days=days)
-    repo = get_hours_repository()
+    repo = get_hours_repository_factory()
     if repo:
         from_d = datetime.now().date() - timedelta(days=days)
         to_d = datetime.now().date()
@@ -200,6 +285,17 @@ def productivity_report(
     return result
 
 
+@app.get("/api/productivity/report")
+def productivity_report(
+    assignee: Optional[str] = Query(None),
+    days: int = Query(30, ge=1, le=365),
+):
+    # Team (no assignee) and per-person reports: concurrent identical requests share one computation
+    return get_singleflight("productivity_report").do(
+        (assignee, days), _build_productivity_report, assignee, days
+    )
+
+
 # --- Agent ---
 _agent: Optional[TaskManagementAgent] = None
 
@@ -211,24 +307,337 @@ def get_agent() -> TaskManagementAgent:
     return _agent
 
 
+def _admission_error(e: Exception) -> HTTPException:
+    if isinstance(e, AdmissionRejected):
+        return HTTPException(
+            status_code=e.status, detail=e.reason, headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
+    return HTTPException(status_code=504, detail=str(e))
+
+
+def _answer_without_model(agent: TaskManagementAgent, request: str):
+    """
+    (result, flight key) from the fast path or the response cache, checked
+    before any admission slot is taken; result is None when the model is needed.
+    """
+    fast = agent.answer_fast(request)
+    if fast is not None:
+        return fast, None
+    return agent.cached_response(request)
+
+
 @app.post("/api/agent/process")
-def agent_process(body: AgentRequest):
+async def agent_process(body: AgentRequest, background_tasks: BackgroundTasks):
+    """
+    Runs on the dedicated LLM executor (not the server's worker threads), so a
+    slow provider cannot starve the CRUD endpoints. 429 when the agent queue is
+    full, 503 while the circuit breaker is open, 504 past LLM_CALL_TIMEOUT.
+    Fast-path and cached answers are looked up first (on the threadpool, since
+    the store may be Firestore). Identical read-only questions in flight share
+    one run, and only that run takes a slot; the others wait for its result
+    (or its 429 / 503 / 504) without one.
+    """
     agent = get_agent()
-    result = agent.process_request(body.request, use_llm=True)
+    result, flight_key = await run_in_threadpool(_answer_without_model, agent, body.request)
+    if result is None:
+        executor = get_llm_executor()
+
+        def run():
+            return executor.run(agent.process_request, body.request, use_llm=True, fast_path=False)
+
+        try:
+            result = await (get_singleflight("agent_admission").do_async(flight_key, run) if flight_key else run())
+        except (AdmissionRejected, DeadlineExceeded) as e:
+            raise _admission_error(e)
     if result.get("status") == "error":
         raise HTTPException(status_code=500, detail=result.get("message", "Agent error"))
     response_text = result.get("response", result.get("message", ""))
-    # Send agent breakdown to #samyak (Gemini summary, deadline, how to do it)
+    # Send agent breakdown to #samyak (Gemini summary, deadline, how to do it) after responding
     if response_text:
-        notify_agent_breakdown(response_text, title="Task breakdown")
+        background_tasks.add_task(notify_agent_breakdown, response_text, title="Task breakdown")
     return {"response": response_text, "routing": result.get("routing", {})}
 
 
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that calls `on_close` however the response ends, even if the body never started."""
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/agent/stream")
+async def agent_stream(body: AgentRequest):
+    """
+    Stream the agent's answer as Server-Sent Events: `routing` first, then
+    `chunk` events as the model generates, then `done` (or `error`).
+    The breakdown is posted to #samyak once the stream has finished.
+    The stream holds one LLM admission slot and is driven on the LLM executor;
+    fast-path and cached answers need neither. The slot is taken before
+    responding (so rejections are real 429 / 503s) and given back when the
+    stream ends, or when the response closes if the client left before the
+    body started.
+    """
+    agent = get_agent()
+    executor = get_llm_executor()
+    final = {}
+    fast, _ = await run_in_threadpool(_answer_without_model, agent, body.request)
+    slot = {"held": False}
+    if fast is None:
+        try:
+            executor.acquire()
+        except AdmissionRejected as e:
+            raise _admission_error(e)
+        slot["held"] = True
+
+    def release(ok: bool):
+        if slot["held"]:
+            slot["held"] = False
+            executor.release(ok)
+
+    def release_unused():
+        if slot["held"]:
+            slot["held"] = False
+            executor.abandon()
+
+    async def events():
+        if fast is not None:
+            for event, data in agent.fast_events(fast):
+                if event == "done":
+                    final["text"] = data["response"]
+                yield _sse(event, data)
+            return
+        stream = agent.stream_request(body.request, fast_path=False)
+        failed = False
+        try:
+            while True:
+                item = await executor.run_step(next, stream, None)
+                if item is None:
+                    break
+                event, data = item
+                if event == "done":
+                    final["text"] = data.get("response", "")
+                failed = failed or event == "error"
+                yield _sse(event, data)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            try:
+                stream.close()
+            except ValueError:
+                pass  # client went away while a step was still running on the executor
+            release(not failed)
+
+    def notify():
+        if final.get("text"):
+            notify_agent_breakdown(final["text"], title="Task breakdown")
+
+    return _SlotStreamingResponse(
+        events(),
+        on_close=release_unused,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(notify),
+    )
+
+
+# --- Jobs (long-running agent / chart / report work) ---
+CHART_JOBS = {
+    "productivity": "create_productivity_chart",
+    "completion": "create_task_completion_chart",
+    "priority": "create_priority_distribution_chart",
+}
+
+
+def _agent_job(params: dict, report) -> dict:
+    """
+    Agent request as a job. Model work takes an LLM admission slot like the
+    HTTP endpoints (AdmissionRejected fails the job while the queue is full
+    or the circuit is open); fast-path and cached answers need none.
+    """
+    request = params.get("request")
+    if not request:
+        raise ValueError("params.request is required")
+    agent = get_agent()
+    fast, _ = _answer_without_model(agent, request)
+    if fast is not None:
+        events = agent.fast_events(fast)
+    else:
+        executor = get_llm_executor()
+        executor.acquire()
+        events = _admitted_events(executor, agent.stream_request(request, fast_path=False))
+    final = None
+    try:
+        for event, data in events:
+            if event == "error":
+                raise RuntimeError(data.get("message", "Agent error"))
+            if event == "done":
+                final = data
+            else:
+                report(event, data)
+    finally:
+        events.close()
+    if final is None:
+        raise RuntimeError("Agent stream ended without a final answer")
+    if final.get("response"):
+        notify_agent_breakdown(final["response"], title="Task breakdown")
+    return final
+
+
+def _admitted_events(executor, stream):
+    """
+    Pass `stream` through, releasing the executor slot when it ends; the run
+    counts as ok for the breaker only if it reached `done` without an error.
+    """
+    done = failed = False
+    try:
+        for event, data in stream:
+            done = done or event == "done"
+            failed = failed or event == "error"
+            yield event, data
+    finally:
+        stream.close()
+        executor.release(done and not failed)
+
+
+def _chart_job(params: dict, report) -> dict:
+    import tools.visualization_tools as charts  # matplotlib/pandas load only when a chart is requested
+
+    chart = params.get("chart", "productivity")
+    if chart not in CHART_JOBS:
+        raise ValueError(f"Unknown chart '{chart}'. Use one of: {', '.join(CHART_JOBS)}")
+    kwargs = {k: v for k, v in params.items() if k != "chart"}
+    report("progress", {"step": "rendering", "chart": chart})
+    result = getattr(charts, CHART_JOBS[chart])(**kwargs)
+    if result.get("status") == "error":
+        raise RuntimeError(result.get("message", "Chart generation failed"))
+    return result
+
+
+def _report_job(params: dict, report) -> dict:
+    assignee = params.get("assignee")
+    days = int(params.get("days", 30))
+    if not 1 <= days <= 365:
+        raise ValueError("days must be between 1 and 365")
+    return get_singleflight("productivity_report").do(
+        (assignee, days), _build_productivity_report, assignee, days
+    )
+
+
+def get_jobs() -> JobManager:
+    manager = get_job_manager()
+    if not manager.kinds:
+        manager.register("agent", _agent_job)
+        manager.register("chart", _chart_job)
+        manager.register("report", _report_job)
+    return manager
+
+
+@app.post("/api/jobs", status_code=202)
+def submit_job(body: JobCreate):
+    """Queue an agent, chart or report job; returns its id immediately."""
+    try:
+        job_id = get_jobs().submit(body.kind, body.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "id": job_id,
+        "state": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    after: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Progress as Server-Sent Events: recorded events from `after` (or the
+    Last-Event-ID header on reconnect), then new ones until the job finishes
+    with a `state` event of `succeeded` or `failed`.
+    """
+    jobs = get_jobs()
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+
+    async def events():
+        seen = after
+        finished = False
+        while True:
+            batch = jobs.events(job_id, seen)
+            for e in batch:
+                seen = e["seq"]
+                yield _sse(e["event"], e["data"], e["seq"])
+                if e["event"] == "state" and e["data"].get("state") in FINISHED_STATES:
+                    return
+            if finished and not batch:
+                return  # finished without a final event (e.g. interrupted by a restart)
+            job = jobs.get(job_id)
+            finished = job is None or job["state"] in FINISHED_STATES
+            if not finished:
+                await asyncio.sleep(JOB_EVENT_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/health")
 def health():
     return {"status": "ok", "service": "agentic-task-api"}
 
 
+def _query_code_cache_stats():
+    cache = get_query_code_cache()
+    return cache.stats() if cache is not None else None
+
+
+@app.get("/api/metrics")
+def metrics():
+    """Runtime counters for background subsystems (no secrets)."""
+    client = _agent.client if _agent is not None else None
+    return {
+        "webhooks": get_dispatcher().stats(),
+        "http_pool": get_http_pool().stats(),
+        "llm_client": client.stats() if hasattr(client, "stats") else None,
+        "agent_prompts": prompt_stats(),
+        "agent_cache": _agent.response_cache.stats() if _agent is not None and _agent.response_cache else None,
+        "singleflight": singleflight_stats(),
+        "llm_admission": get_llm_executor().stats(),
+        "jobs": get_jobs().stats(),
+        "fast_path": fast_path_stats(),
+        "query_code_cache": _query_code_cache_stats(),
+        "sandbox": sandbox_stats(),
+    }
+
+
 @app.get("/api/integrations/status")
 def integrations_status():
     """Return which integrations are configured (no secrets). Frontend uses this for Slack/Calendar status."""
@@ -243,6 +652,20 @@ def integrations_status():
     }
 
 
+@app.get("/api/integrations/outbox")
+def outbox_status(dead_limit: int = Query(20, ge=0, le=500)):
+    """Outbox backlog/throughput and the most recent dead-lettered messages."""
+    outbox = get_dispatcher().outbox
+    return {"stats": outbox.stats(), "dead_letters": outbox.dead_letters(dead_limit)}
+
+
+@app.post("/api/integrations/outbox/requeue")
+def outbox_requeue():
+    """Retry every dead-lettered message."""
+    requeued = get_dispatcher().outbox.requeue_dead()
+    return {"status": "success", "requeued": requeued}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
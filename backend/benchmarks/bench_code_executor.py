@@ -0,0 +1,47 @@
+"""
+Benchmark: per-execution overhead of SafeCodeExecutor for a trivial snippet,
+with the compiled-code cache warm (same source every call) and cold (a new
+source every call, so it is extracted and compiled each time).
+
+Run from backend/:
+    python benchmarks/bench_code_executor.py [--runs 20000] [--tasks 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.task import Task, TaskManager  # noqa: E402
+from utils.code_executor import SafeCodeExecutor  # noqa: E402
+
+SNIPPET = "<execute_python>\nanswer_text = 'ok'\nSTATUS = 'success'\n{}\n</execute_python>"
+
+
+def measure(executor, runs, vary):
+    start = time.perf_counter()
+    for i in range(runs):
+        executor.execute(SNIPPET.format(f"# {i}" if vary else ""), "benchmark")
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20000)
+    parser.add_argument("--tasks", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = TaskManager(os.path.join(tmp, "tasks.json"))
+        manager.add_tasks([Task(f"T{i}", f"task {i}") for i in range(args.tasks)])
+        executor = SafeCodeExecutor(manager)
+        measure(executor, 200, False)
+        print(f"{args.runs} executions, {args.tasks} tasks")
+        print(f"cached compile   {measure(executor, args.runs, False):8.1f} us/execution")
+        print(f"compile per call {measure(executor, args.runs, True):8.1f} us/execution")
+
+
+if __name__ == "__main__":
+    main()
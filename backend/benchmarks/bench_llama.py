@@ -0,0 +1,119 @@
+"""
+Benchmark: local Llama engine throughput and time to first token (CPU only),
+with and without reuse of the shared system + tool-manifest prefix.
+
+Uses the agent's real system prompt and tool manifest, alternating between
+the full tool list and a task-tools subset (as the router does), with
+`--clients` concurrent callers. The baseline resets the llama.cpp context
+before every request, so each prompt is evaluated from scratch.
+
+Run from backend/ with a small GGUF model, e.g. Qwen2.5-0.5B-Instruct Q4_K_M:
+    pip install llama-cpp-python
+    python benchmarks/bench_llama.py --model models/qwen2.5-0.5b-instruct-q4_k_m.gguf \\
+        [--requests 24] [--clients 4] [--max-tokens 16] [--threads 4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.orchestrator import SYSTEM_PROMPT, TaskManagementAgent  # noqa: E402
+from utils.llama_adapter import ChatCompletion, LlamaClient  # noqa: E402
+from utils.llama_engine import LlamaEngine, _load_llama  # noqa: E402
+
+REQUESTS = [
+    "Show me all high priority tasks",
+    "Create a task to review the Q3 roadmap by Friday",
+    "What did Sam log this week?",
+    "Mark the onboarding task as completed",
+    "How productive was the team over the last 30 days?",
+    "List overdue tasks for Priya",
+]
+
+
+class _ColdStart:
+    """Baseline: clear the context before every request (no prefix reuse)."""
+
+    def __init__(self, llm):
+        self._llm = llm
+
+    def create_chat_completion(self, **kwargs):
+        self._llm.reset()
+        return self._llm.create_chat_completion(**kwargs)
+
+
+def build_prompts(n):
+    tools = TaskManagementAgent._register_all_tools(None)
+    subsets = [tools, tools[:8]]
+    chat = ChatCompletion(LlamaClient(model_path="unused"))
+    prompts = []
+    for i in range(n):
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": REQUESTS[i % len(REQUESTS)]}]
+        system, user = chat._build_prompt(messages, subsets[(i // 3) % 2])
+        prompts.append(LlamaClient._engine_messages(user, system))
+    return prompts
+
+
+def run(label, engine, prompts, clients, max_tokens):
+    engine.warm()
+    engine.complete(prompts[0], max_tokens=1)  # first-prompt cost is the same for both modes
+    ttfts, lock = [], threading.Lock()
+    pending = list(prompts)
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                messages = pending.pop()
+            start = time.perf_counter()
+            first = None
+            for _ in engine.stream(messages, max_tokens=max_tokens):
+                if first is None:
+                    first = (time.perf_counter() - start) * 1000
+            with lock:
+                ttfts.append(first if first is not None else (time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ttfts.sort()
+    stats = engine.stats()
+    print(
+        f"{label:<16} {len(prompts) * 60 / elapsed:8.1f} req/min   "
+        f"TTFT p50 {statistics.median(ttfts):8.0f} ms   p95 {ttfts[int(len(ttfts) * 0.95) - 1]:8.0f} ms   "
+        f"engine TTFT {stats['avg_ttft_ms']:6.0f} ms   prefix reuse {stats['prefix_reuse']}/{stats['completed']}"
+    )
+    engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, help="path to a .gguf model")
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--ctx", type=int, default=4096)
+    args = parser.parse_args()
+
+    prompts = build_prompts(args.requests)
+    print(f"{args.requests} requests, {args.clients} clients, {args.max_tokens} tokens each, {args.threads} threads")
+    run(
+        "cold prompts",
+        LlamaEngine(args.model, args.ctx, args.threads, loader=lambda *a: _ColdStart(_load_llama(*a)), prefix_cache_mb=0),
+        prompts, args.clients, args.max_tokens,
+    )
+    run("prefix reuse", LlamaEngine(args.model, args.ctx, args.threads), prompts, args.clients, args.max_tokens)
+
+
+if __name__ == "__main__":
+    main()
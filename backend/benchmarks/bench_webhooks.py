@@ -0,0 +1,110 @@
+"""
+Benchmark: per-message webhook latency, urllib (new connection per message)
+vs the keep-alive pool in utils/http_pool.py, against a local stub server.
+
+Run from backend/:
+    python benchmarks/bench_webhooks.py [--messages 500] [--tls]
+
+--tls serves HTTPS with a throwaway self-signed certificate (requires the
+`openssl` binary), which is where handshake savings are largest.
+"""
+import argparse
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http_pool import HTTPClientPool  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        StubHandler.connections.add(self.client_address)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(tls: bool):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    client_ctx = None
+    if tls:
+        tmp = tempfile.mkdtemp()
+        cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+        server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_ctx.load_cert_chain(cert, key)
+        server.socket = server_ctx.wrap_socket(server.socket, server_side=True)
+        client_ctx = ssl.create_default_context(cafile=cert)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if tls else "http"
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/hook", client_ctx
+
+
+def post_urllib(url, payload, ctx):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=5, context=ctx) as resp:
+        resp.read()
+
+
+def measure(label, send, messages):
+    StubHandler.connections = set()
+    latencies = []
+    for i in range(messages):
+        start = time.perf_counter()
+        send({"text": f"[created] Task T{i}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{label:<10} median {statistics.median(latencies):6.3f} ms   "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:6.3f} ms   "
+        f"connections {len(StubHandler.connections)}"
+    )
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    server, url, ctx = start_server(args.tls)
+    pool = HTTPClientPool()
+    if ctx is not None:
+        pool._ssl_context = ctx
+    try:
+        baseline = measure("urllib", lambda p: post_urllib(url, p, ctx), args.messages)
+        pooled = measure("pooled", lambda p: pool.post_json(url, p), args.messages)
+        print(f"speedup    {baseline / pooled:.1f}x per message")
+    finally:
+        pool.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,52 @@ load_dotenv(_env_path)
 load_dotenv()
 
 TASKS_DB_PATH = "data/tasks.json"
+HOURS_DB_PATH = "data/working_hours"  # month-partitioned: YYYY-MM.jsonl + manifest.json
+# Number of most recent monthly partitions loaded at startup (older months load on demand)
+PARTITION_HOT_MONTHS = int(os.getenv("PARTITION_HOT_MONTHS", "2"))
 CHART_OUTPUT_DIR = "data/charts"
+# Completed tasks older than N days move to a compressed archive (0 disables)
+TASK_ARCHIVE_DIR = "data/archive/tasks"
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90"))
 
 # --- LLM: Gemini (default) ---
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL = (os.getenv("GEMINI_MODEL", "gemini-2.0-flash") or "").strip() or "gemini-2.0-flash"
+# Agent tool-calling loop: model calls per request, and threads for parallel tool calls in a turn
+AGENT_MAX_TURNS = int(os.getenv("AGENT_MAX_TURNS", "10"))
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+# Cache read-only agent answers; keys include the task/hours data version, so writes invalidate them
+AGENT_CACHE_ENABLED = os.getenv("AGENT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AGENT_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", "256"))
+AGENT_CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", "300"))               # seconds
+AGENT_CACHE_DB_PATH = os.getenv("AGENT_CACHE_DB_PATH", "")  # e.g. data/agent_cache.db; empty = memory only
+# Answer plain task-listing questions ("high priority tasks due this week") without the LLM
+AGENT_FAST_PATH = os.getenv("AGENT_FAST_PATH", "true").lower() in ("1", "true", "yes")
+# Reuse generated query code for requests of the same shape (literals parameterized); stale entries are a fallback
+QUERY_CODE_CACHE_ENABLED = os.getenv("QUERY_CODE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_CODE_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CODE_CACHE_MAX_ENTRIES", "512"))
+QUERY_CODE_CACHE_TTL = float(os.getenv("QUERY_CODE_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+QUERY_CODE_CACHE_DB_PATH = os.getenv("QUERY_CODE_CACHE_DB_PATH", "data/query_code_cache.db")  # empty = memory only
+# LLM admission control: dedicated worker pool, waiting-room size, per-call deadline, circuit breaker
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "8"))                      # beyond workers + queue -> 429
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))             # seconds -> 504
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))  # open at this failure rate...
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))     # ...over at least this many calls
+LLM_BREAKER_WINDOW = float(os.getenv("LLM_BREAKER_WINDOW", "60"))         # seconds of history considered
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))     # seconds open before a probe -> 503
+# Async jobs (POST /api/jobs): persisted to SQLite, run on an in-process worker pool
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "data/jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))  # finished jobs kept this long
+JOB_EVENT_POLL_INTERVAL = float(os.getenv("JOB_EVENT_POLL_INTERVAL", "0.25"))  # seconds between SSE progress checks
+# Generated query/chart code: "inprocess" (exec in the server) or "process" (pool of limited worker processes)
+SANDBOX_MODE = os.getenv("SANDBOX_MODE", "inprocess").lower()
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", "2"))
+SANDBOX_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "20"))           # wall-clock seconds per run; worker killed past it
+SANDBOX_CPU_SECONDS = float(os.getenv("SANDBOX_CPU_SECONDS", "10"))   # CPU seconds per run
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "512"))        # address space a run may add (RLIMIT_AS)
 
 # Legacy (fallback only)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", None)
@@ -22,6 +62,15 @@ LLAMA_MODEL_PATH = os.getenv("LLAMA_MODEL_PATH", None)
 LLAMA_N_CTX = int(os.getenv("LLAMA_N_CTX", "4096"))
 LLAMA_N_THREADS = int(os.getenv("LLAMA_N_THREADS", "4"))
 LLAMA_MODEL_NAME = os.getenv("LLAMA_MODEL_NAME", "llama-3.3-70b-instruct")
+LLAMA_MAX_TOKENS = int(os.getenv("LLAMA_MAX_TOKENS", "1024"))   # per completion (in-process engine)
+LLAMA_QUEUE_SIZE = int(os.getenv("LLAMA_QUEUE_SIZE", "32"))     # waiting requests before "busy"
+LLAMA_N_BATCH = int(os.getenv("LLAMA_N_BATCH", "512"))          # prompt tokens evaluated per decode call
+LLAMA_BATCH_MAX = int(os.getenv("LLAMA_BATCH_MAX", "8"))        # queued requests scheduled together
+LLAMA_PREFIX_CACHE_MB = int(os.getenv("LLAMA_PREFIX_CACHE_MB", "512"))  # RAM for saved prompt states (0 disables)
+# Local model discovery: scanned once, cached in a manifest keyed on directory mtimes
+MODEL_SEARCH_DIRS = [d.strip() for d in os.getenv("MODEL_SEARCH_DIRS", "~/.llama/models,~/models,./models,~/.cache/llama").split(",") if d.strip()]
+MODEL_MANIFEST_PATH = os.getenv("MODEL_MANIFEST_PATH", "data/model_manifest.json")
+MODEL_REGISTRY_TTL = float(os.getenv("MODEL_REGISTRY_TTL", "30"))  # seconds between directory mtime checks
 
 # --- Firebase (backend only) ---
 USE_FIREBASE = os.getenv("USE_FIREBASE", "false").lower() in ("true", "1", "yes")
@@ -41,6 +90,40 @@ WEBHOOK_URL_SLACK = os.getenv("WEBHOOK_URL_SLACK", "")               # fallback
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN", "")                   # Bot User OAuth Token (optional, for future API use)
 WEBHOOK_URL_DISCORD = os.getenv("WEBHOOK_URL_DISCORD", "")
 WEBHOOK_URL_TEAMS = os.getenv("WEBHOOK_URL_TEAMS", "")
+# Outbound HTTP (webhooks and other integrations) reuses keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))     # seconds
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))          # seconds
+HTTP_POOL_MAX_PER_HOST = int(os.getenv("HTTP_POOL_MAX_PER_HOST", "4"))   # idle connections kept per host
+HTTP_POOL_IDLE_TIMEOUT = float(os.getenv("HTTP_POOL_IDLE_TIMEOUT", "60"))  # close connections idle longer than this
+# Webhooks are persisted to a SQLite outbox and delivered by a background dispatcher
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "data/outbox.db")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "8"))                # then dead-lettered
+WEBHOOK_RETRY_BACKOFF = float(os.getenv("WEBHOOK_RETRY_BACKOFF", "2"))           # seconds, doubled per retry
+WEBHOOK_RETRY_MAX_BACKOFF = float(os.getenv("WEBHOOK_RETRY_MAX_BACKOFF", "300"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "10"))           # seconds to flush on shutdown
+# Task-event channels get one digest message per window (or per N events) instead of one per event
+WEBHOOK_COALESCE_TARGETS = [t.strip() for t in os.getenv("WEBHOOK_COALESCE_TARGETS", "slack_tasks,discord,teams").split(",") if t.strip()]
+WEBHOOK_COALESCE_WINDOW = float(os.getenv("WEBHOOK_COALESCE_WINDOW", "2"))        # seconds
+WEBHOOK_COALESCE_MAX_EVENTS = int(os.getenv("WEBHOOK_COALESCE_MAX_EVENTS", "50"))
+
+
+def _parse_rate_limits(spec: str) -> dict:
+    """Parse "target=rate_per_s:burst,..." into {target: (rate, burst)}."""
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        target, value = item.split("=", 1)
+        rate, _, burst = value.partition(":")
+        limits[target.strip()] = (float(rate), float(burst or 1))
+    return limits
+
+
+# Per-target token buckets, kept under provider limits (Slack ~1/s, Discord ~30/min, Teams ~4/s)
+WEBHOOK_RATE_LIMITS = _parse_rate_limits(
+    os.getenv("WEBHOOK_RATE_LIMITS", "slack_tasks=1:3,slack_agent=1:3,discord=0.5:5,teams=4:4")
+)
 
 EMAIL_CONFIG = {
     "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
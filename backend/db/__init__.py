@@ -1,12 +1,19 @@
 """Data layer: Firebase (Firestore) and task/hours repositories."""
 from db.firebase import get_firestore, get_task_manager, get_hours_repository, FirestoreTaskManager, HoursRepository
-from db.factory import get_task_manager_factory
+from db.local import LocalHoursRepository
+from db.archive import TaskArchive
+from db.factory import get_task_manager_factory, get_hours_repository_factory, get_task_archive, get_data_version
 
 __all__ = [
     "get_firestore",
     "get_task_manager",
     "get_hours_repository",
     "get_task_manager_factory",
+    "get_hours_repository_factory",
+    "get_task_archive",
+    "get_data_version",
     "FirestoreTaskManager",
     "HoursRepository",
+    "LocalHoursRepository",
+    "TaskArchive",
 ]
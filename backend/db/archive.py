@@ -0,0 +1,82 @@
+"""Compressed, month-partitioned archive for completed tasks (cold history tier)."""
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Iterable
+
+from db.partitions import MonthlyPartitionStore
+
+
+def _archive_date(task) -> str:
+    """Partition key: the completion date (falls back to last update)."""
+    when = task.completed_at or task.updated_at or task.created_at
+    return when.date().isoformat()
+
+
+class TaskArchive:
+    """
+    Archive of completed tasks stored as gzip JSON Lines, one segment per completion month.
+
+    Nothing is read at construction; partitions are loaded only when a caller
+    asks for history (a task id miss, a date window or the full archive).
+    """
+
+    def __init__(self, root: str = "data/archive/tasks"):
+        self.store = MonthlyPartitionStore(root, compress=True)
+        self._lock = threading.Lock()
+        self._loaded = set()
+        self._tasks: Dict[str, "Task"] = {}
+
+    def __len__(self) -> int:
+        return sum(meta["count"] for meta in self.store.manifest.values())
+
+    def add(self, tasks: Iterable["Task"]) -> int:
+        """Append tasks to the archive. Returns how many were written."""
+        tasks = list(tasks)
+        items = [(task.to_dict(), _archive_date(task)) for task in tasks]
+        if not items:
+            return 0
+        self.store.append_many(items)
+        with self._lock:
+            for task in tasks:
+                if self.store.month_of(_archive_date(task)) in self._loaded:
+                    self._tasks[task.task_id] = task
+        return len(items)
+
+    def _ensure_loaded(self, months: Iterable[str]):
+        from models.task import Task
+        with self._lock:
+            for month in months:
+                if month in self._loaded:
+                    continue
+                for record in self.store.read(month):
+                    try:
+                        task = Task.from_dict(record)
+                    except (KeyError, ValueError):
+                        continue
+                    self._tasks[task.task_id] = task
+                self._loaded.add(month)
+
+    def get(self, task_id: str) -> Optional["Task"]:
+        if task_id in self._tasks:
+            return self._tasks[task_id]
+        for month in reversed(self.store.months()):
+            self._ensure_loaded([month])
+            if task_id in self._tasks:
+                return self._tasks[task_id]
+        return None
+
+    def completed_between(self, from_date: Optional[datetime] = None, to_date: Optional[datetime] = None) -> List["Task"]:
+        """Archived tasks completed in [from_date, to_date]; opens only overlapping partitions."""
+        from_key = from_date.date().isoformat() if from_date else None
+        to_key = to_date.date().isoformat() if to_date else None
+        months = self.store.overlapping(from_key, to_key)
+        self._ensure_loaded(months)
+        return [
+            t for t in self._tasks.values()
+            if self.store.month_of(_archive_date(t)) in months
+            and (from_key is None or _archive_date(t) >= from_key)
+            and (to_key is None or _archive_date(t) <= to_key)
+        ]
+
+    def all(self) -> List["Task"]:
+        return self.completed_between()
@@ -1,7 +1,21 @@
 """Factory: return JSON or Firestore TaskManager based on config."""
-from config import USE_FIREBASE, TASKS_DB_PATH
+import os
+from typing import Optional
+
+from config import USE_FIREBASE, TASKS_DB_PATH, HOURS_DB_PATH, PARTITION_HOT_MONTHS, TASK_ARCHIVE_DIR
 from models.task import TaskManager
 
+_local_hours = {}
+_archives = {}
+
+
+def get_task_archive(root: str = TASK_ARCHIVE_DIR):
+    """Return the shared TaskArchive for root (partitions it has loaded are reused)."""
+    if root not in _archives:
+        from db.archive import TaskArchive
+        _archives[root] = TaskArchive(root)
+    return _archives[root]
+
 
 def get_task_manager_factory():
     """Return TaskManager: Firestore if USE_FIREBASE and credentials set, else JSON file."""
@@ -11,4 +25,41 @@ def get_task_manager_factory():
             return FirestoreTaskManager()
         except Exception:
             pass
-    return TaskManager(TASKS_DB_PATH)
+    return TaskManager(TASKS_DB_PATH, archive=get_task_archive())
+
+
+def get_hours_repository_factory(path: str = HOURS_DB_PATH):
+    """Return hours repository: Firestore if available, else local month-partitioned files.
+
+    The local repository is cached per path so its in-memory indexes are built once.
+    """
+    if USE_FIREBASE:
+        from db.firebase import get_hours_repository
+        repo = get_hours_repository()
+        if repo is not None:
+            return repo
+    if path not in _local_hours:
+        from db.local import LocalHoursRepository
+        _local_hours[path] = LocalHoursRepository(path, hot_months=PARTITION_HOT_MONTHS)
+    return _local_hours[path]
+
+
+def _file_version(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "0"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def get_data_version() -> Optional[str]:
+    """Version of the local task and hours stores; changes on every write.
+
+    Used to key caches of derived answers. Returns None for Firestore, which has
+    no cheap change marker (callers should not cache).
+    """
+    if USE_FIREBASE:
+        return None
+    from db.partitions import MonthlyPartitionStore
+    hours_manifest = os.path.join(HOURS_DB_PATH, MonthlyPartitionStore.MANIFEST)
+    return f"{_file_version(TASKS_DB_PATH)}|{_file_version(hours_manifest)}"
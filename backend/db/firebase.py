@@ -1,7 +1,7 @@
 """Firebase Firestore client and repositories (backend only)."""
 import os
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from config import USE_FIREBASE, GOOGLE_APPLICATION_CREDENTIALS, FIREBASE_PROJECT_ID
 
 _db = None
@@ -40,6 +40,8 @@ def get_firestore():
 class FirestoreTaskManager:
     """TaskManager interface backed by Firestore (same API as models.task.TaskManager)."""
     COLLECTION = "tasks"
+    BATCH_LIMIT = 500  # Firestore WriteBatch maximum operations
+
 
     def __init__(self):
         self._db = get_firestore()
@@ -55,6 +57,52 @@ class FirestoreTaskManager:
         ref.set(task.to_dict())
         return task
 
+    def _commit_in_chunks(self, ops):
+        """Apply (op, ref, data) tuples in WriteBatch chunks of BATCH_LIMIT."""
+        for i in range(0, len(ops), self.BATCH_LIMIT):
+            batch = self._db.batch()
+            for op, ref, data in ops[i:i + self.BATCH_LIMIT]:
+                if op == "set":
+                    batch.set(ref, data)
+                else:
+                    batch.delete(ref)
+            batch.commit()
+
+    def add_tasks(self, tasks: List["Task"]) -> List["Task"]:
+        self._commit_in_chunks([("set", self._coll().document(t.task_id), t.to_dict()) for t in tasks])
+        return tasks
+
+    def _get_many(self, task_ids: List[str]) -> Dict[str, "Task"]:
+        from models.task import Task
+        refs = [self._coll().document(task_id) for task_id in task_ids]
+        found = {}
+        for doc in self._db.get_all(refs):
+            if doc.exists:
+                found[doc.id] = Task.from_dict(doc.to_dict())
+        return found
+
+    def update_tasks(self, updates: Dict[str, Dict]) -> Dict[str, Optional["Task"]]:
+        existing = self._get_many(list(updates))
+        now = datetime.now()
+        ops = []
+        results = {}
+        for task_id, fields in updates.items():
+            task = existing.get(task_id)
+            if task:
+                for key, value in fields.items():
+                    if hasattr(task, key):
+                        setattr(task, key, value)
+                task.updated_at = now
+                ops.append(("set", self._coll().document(task_id), task.to_dict()))
+            results[task_id] = task
+        self._commit_in_chunks(ops)
+        return results
+
+    def delete_tasks(self, task_ids: List[str]) -> Dict[str, bool]:
+        existing = self._get_many(task_ids)
+        self._commit_in_chunks([("delete", self._coll().document(i), None) for i in task_ids if i in existing])
+        return {task_id: task_id in existing for task_id in task_ids}
+
     def get_task(self, task_id: str) -> Optional["Task"]:
         from models.task import Task
         doc = self._coll().document(task_id).get()
@@ -62,11 +110,22 @@ class FirestoreTaskManager:
             return None
         return Task.from_dict(doc.to_dict())
 
-    def get_all_tasks(self) -> List["Task"]:
+    def get_all_tasks(self, include_archived: bool = False) -> List["Task"]:
         from models.task import Task
         docs = self._coll().stream()
         return [Task.from_dict(doc.to_dict()) for doc in docs]
 
+    # Firestore queries are server-side, so there is no in-memory hot set to trim;
+    # the archive tier applies to the JSON TaskManager only.
+    def get_archived_task(self, task_id: str) -> Optional["Task"]:
+        return None
+
+    def get_archived_tasks(self, since=None) -> List["Task"]:
+        return []
+
+    def archive_completed(self, older_than_days: int) -> int:
+        return 0
+
     def update_task(self, task_id: str, **kwargs) -> Optional["Task"]:
         task = self.get_task(task_id)
         if not task:
@@ -0,0 +1,139 @@
+"""Local (file-backed) repositories used when Firestore is not configured."""
+import bisect
+import json
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable
+
+from db.partitions import MonthlyPartitionStore
+
+
+def _date_key(value) -> str:
+    """ISO date string (YYYY-MM-DD) for a date, datetime or string."""
+    if value is None:
+        return ""
+    if hasattr(value, "date") and callable(value.date):
+        value = value.date()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+class LocalHoursRepository:
+    """
+    Working hours repository backed by append-only, month-partitioned JSON Lines files.
+    Same interface as db.firebase.HoursRepository.
+
+    Entries are appended to <path>/YYYY-MM.jsonl; a small manifest records each
+    month's min/max date. Only the `hot_months` most recent partitions are read
+    at startup. Range queries open just the partitions that overlap the range;
+    task/user lookups load the remaining (cold) partitions on first use.
+    Loaded entries are indexed by id, task_id, user_id and a date-sorted list,
+    so range queries use bisect instead of a full scan.
+    """
+
+    def __init__(self, path: str = "data/working_hours", hot_months: int = 2):
+        self.store = MonthlyPartitionStore(path)
+        self._lock = threading.Lock()
+        self._loaded = set()
+        self._by_id: Dict[str, "WorkingHours"] = {}
+        self._by_task: Dict[str, List[str]] = {}
+        self._by_user: Dict[str, List[str]] = {}
+        self._by_date: List[tuple] = []  # sorted (date_iso, id)
+        self._migrate_legacy_log(Path(path).with_suffix(".jsonl"))
+        self._ensure_loaded(self.store.hot_months(hot_months))
+
+    def _migrate_legacy_log(self, legacy: Path):
+        """Split a single-file hours log (pre-partitioning) into monthly segments once."""
+        if not legacy.exists() or legacy.is_dir():
+            return
+        items = []
+        with open(legacy, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    items.append((record, _date_key(record["date"])))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+        if items:
+            self.store.append_many(items)
+        legacy.rename(legacy.with_suffix(".jsonl.migrated"))
+
+    def _ensure_loaded(self, months: Iterable[str]):
+        from models.working_hours import WorkingHours
+        missing = [m for m in months if m not in self._loaded]
+        if not missing:
+            return
+        with self._lock:
+            for month in missing:
+                if month in self._loaded:
+                    continue
+                for record in self.store.read(month):
+                    try:
+                        self._index(WorkingHours.from_dict(record))
+                    except (KeyError, ValueError):
+                        continue
+                self._loaded.add(month)
+
+    def _ensure_all_loaded(self):
+        self._ensure_loaded(self.store.months())
+
+    def _index(self, wh):
+        if wh.id in self._by_id:
+            return
+        self._by_id[wh.id] = wh
+        self._by_task.setdefault(wh.task_id, []).append(wh.id)
+        self._by_user.setdefault(wh.user_id, []).append(wh.id)
+        bisect.insort(self._by_date, (_date_key(wh.date), wh.id))
+
+    def _range_ids(self, from_date=None, to_date=None) -> List[str]:
+        lo = bisect.bisect_left(self._by_date, (_date_key(from_date), "")) if from_date else 0
+        hi = bisect.bisect_right(self._by_date, (_date_key(to_date), "\uffff")) if to_date else len(self._by_date)
+        return [entry_id for _, entry_id in self._by_date[lo:hi]]
+
+    def loaded_partitions(self) -> List[str]:
+        """Partitions currently held in memory (for diagnostics)."""
+        return sorted(self._loaded)
+
+    def add(self, wh) -> "WorkingHours":
+        date_key = _date_key(wh.date)
+        self._ensure_loaded([self.store.month_of(date_key)])
+        self.store.append(wh.to_dict(), date_key)
+        with self._lock:
+            self._loaded.add(self.store.month_of(date_key))
+            self._index(wh)
+        return wh
+
+    def get_by_id(self, id: str) -> Optional["WorkingHours"]:
+        if id in self._by_id:
+            return self._by_id[id]
+        for month in reversed(self.store.months()):
+            self._ensure_loaded([month])
+            if id in self._by_id:
+                return self._by_id[id]
+        return None
+
+    def list_by_task(self, task_id: str) -> List["WorkingHours"]:
+        self._ensure_all_loaded()
+        return [self._by_id[i] for i in self._by_task.get(task_id, [])]
+
+    def list_by_user(self, user_id: str, from_date=None, to_date=None) -> List["WorkingHours"]:
+        if from_date or to_date:
+            self._ensure_loaded(self.store.overlapping(_date_key(from_date) or None, _date_key(to_date) or None))
+        else:
+            self._ensure_all_loaded()
+        entries = [self._by_id[i] for i in self._by_user.get(user_id, [])]
+        if from_date:
+            entries = [e for e in entries if _date_key(e.date) >= _date_key(from_date)]
+        if to_date:
+            entries = [e for e in entries if _date_key(e.date) <= _date_key(to_date)]
+        return entries
+
+    def list_by_date_range(self, from_date, to_date, task_id: Optional[str] = None, user_id: Optional[str] = None) -> List["WorkingHours"]:
+        self._ensure_loaded(self.store.overlapping(_date_key(from_date) or None, _date_key(to_date) or None))
+        entries = [self._by_id[i] for i in self._range_ids(from_date, to_date)]
+        if task_id:
+            entries = [e for e in entries if e.task_id == task_id]
+        if user_id:
+            entries = [e for e in entries if e.user_id == user_id]
+        return entries
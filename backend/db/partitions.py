@@ -0,0 +1,128 @@
+"""Month-partitioned append-only record store (one segment file per month + manifest)."""
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict
+
+
+class MonthlyPartitionStore:
+    """
+    Append-only store of JSON records partitioned by month.
+
+    Layout:
+        <root>/manifest.json   {"partitions": {"2026-01": {"min_date", "max_date", "count"}}}
+        <root>/2026-01.jsonl   one JSON record per line
+
+    The manifest is small and always read; segment files are only opened when
+    a caller asks for a month, so old months stay cold on disk. With
+    compress=True segments are gzip files (<root>/2026-01.jsonl.gz); each
+    append adds a gzip member, which gzip readers concatenate transparently.
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root: str, compress: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compress = compress
+        self.suffix = ".jsonl.gz" if compress else ".jsonl"
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    @staticmethod
+    def month_of(date_key: str) -> str:
+        """Partition name (YYYY-MM) for an ISO date or datetime string."""
+        return date_key[:7]
+
+    def _segment(self, month: str) -> Path:
+        return self.root / f"{month}{self.suffix}"
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        path = self.root / self.MANIFEST
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r") as f:
+                return json.load(f).get("partitions", {})
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _save_manifest(self):
+        path = self.root / self.MANIFEST
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"partitions": self.manifest}, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def _open(self, month: str, mode: str):
+        if self.compress:
+            return gzip.open(self._segment(month), mode + "t", encoding="utf-8")
+        return open(self._segment(month), mode)
+
+    def _append_lines(self, month: str, lines: List[str]):
+        with self._open(month, "a") as f:
+            f.write("".join(lines))
+
+    def _read_lines(self, month: str) -> List[str]:
+        if not self._segment(month).exists():
+            return []
+        try:
+            with self._open(month, "r") as f:
+                return f.readlines()
+        except (OSError, EOFError):
+            return []
+
+    def append(self, record: Dict, date_key: str):
+        """Append one record to the partition for date_key (ISO date string)."""
+        self.append_many([(record, date_key)])
+
+    def append_many(self, items: List[tuple]):
+        """Append (record, date_key) pairs, grouping writes per partition; manifest is saved once."""
+        by_month: Dict[str, List[tuple]] = {}
+        for record, date_key in items:
+            by_month.setdefault(self.month_of(date_key), []).append((record, date_key))
+        with self._lock:
+            for month, month_items in by_month.items():
+                self._append_lines(month, [json.dumps(r) + "\n" for r, _ in month_items])
+                meta = self.manifest.setdefault(month, {"min_date": None, "max_date": None, "count": 0})
+                for _, date_key in month_items:
+                    if meta["min_date"] is None or date_key < meta["min_date"]:
+                        meta["min_date"] = date_key
+                    if meta["max_date"] is None or date_key > meta["max_date"]:
+                        meta["max_date"] = date_key
+                meta["count"] += len(month_items)
+            self._save_manifest()
+
+    def months(self) -> List[str]:
+        """All partition names, oldest first."""
+        return sorted(self.manifest)
+
+    def hot_months(self, count: int) -> List[str]:
+        """The most recent `count` partitions."""
+        return self.months()[-count:] if count > 0 else []
+
+    def overlapping(self, from_key: Optional[str] = None, to_key: Optional[str] = None) -> List[str]:
+        """Partitions whose [min_date, max_date] overlaps the given (inclusive) range."""
+        result = []
+        for month in self.months():
+            meta = self.manifest[month]
+            if from_key and meta["max_date"] and meta["max_date"][:len(from_key)] < from_key:
+                continue
+            if to_key and meta["min_date"] and meta["min_date"][:len(to_key)] > to_key:
+                continue
+            result.append(month)
+        return result
+
+    def read(self, month: str) -> List[Dict]:
+        """Read all records of one partition (corrupt lines are skipped)."""
+        records = []
+        for line in self._read_lines(month):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
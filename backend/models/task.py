@@ -1,7 +1,11 @@
-from datetime import datetime
-from typing import Optional, List
+from bisect import bisect_left
+import copy
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Union
 import json
+import threading
 from pathlib import Path
+from types import SimpleNamespace
 
 class Task:
     def __init__(
@@ -67,10 +71,19 @@ class Task:
 
 
 class TaskManager:
-    def __init__(self, db_path: str = "data/tasks.json"):
+    def __init__(self, db_path: str = "data/tasks.json", archive=None):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.archive = archive  # optional db.archive.TaskArchive (cold tier for completed tasks)
         self.tasks = self._load_tasks()
+        # Guards mutations and the file write (API worker threads and parallel agent tool calls)
+        self._lock = threading.RLock()
+        # Lookup indexes for find_tasks, rebuilt lazily after any write
+        self._indexes: Optional[Dict] = None
+        # Bumped on every write; lets readers (e.g. sandbox snapshots) detect changes cheaply
+        self.version = 0
+        # (source, TaskSnapshot) for the current version, built lazily by snapshot()
+        self._snapshot = None
 
     def _load_tasks(self) -> List[Task]:
         if not self.db_path.exists():
@@ -83,13 +96,25 @@ class TaskManager:
             return []
 
     def _save_tasks(self):
-        with open(self.db_path, "w") as f:
-            json.dump([task.to_dict() for task in self.tasks], f, indent=2)
+        with self._lock:
+            self._indexes = None
+            self._snapshot = None
+            self.version += 1
+            with open(self.db_path, "w") as f:
+                json.dump([task.to_dict() for task in self.tasks], f, indent=2)
 
     def add_task(self, task: Task):
-        self.tasks.append(task)
-        self._save_tasks()
-        return task
+        with self._lock:
+            self.tasks.append(task)
+            self._save_tasks()
+            return task
+
+    def add_tasks(self, tasks: List[Task]) -> List[Task]:
+        """Add several tasks with a single write to disk."""
+        with self._lock:
+            self.tasks.extend(tasks)
+            self._save_tasks()
+            return tasks
 
     def get_task(self, task_id: str) -> Optional[Task]:
         for task in self.tasks:
@@ -97,25 +122,268 @@ class TaskManager:
                 return task
         return None
 
-    def get_all_tasks(self) -> List[Task]:
+    def _build_indexes(self) -> Dict:
+        indexes = _index_tasks(self.tasks)
+        indexes["source"] = (id(self.tasks), len(self.tasks))
+        return indexes
+
+    def _current_indexes(self) -> Dict:
+        with self._lock:
+            indexes = self._indexes
+            # Also catch direct assignment to / appends on self.tasks that bypassed _save_tasks
+            if indexes is None or indexes["source"] != (id(self.tasks), len(self.tasks)):
+                indexes = self._indexes = self._build_indexes()
+            return indexes
+
+    def find_tasks(
+        self,
+        status: Union[str, List[str], None] = None,
+        priority: Optional[str] = None,
+        assignee: Optional[str] = None,
+        tag: Optional[str] = None,
+        due_from: Optional[datetime] = None,
+        due_to: Optional[datetime] = None,
+    ) -> List[Task]:
+        """
+        Active tasks matching every given filter, via in-memory indexes.
+        `status` may be a list (any of); assignee and tag are case-insensitive;
+        the deadline window is [due_from, due_to).
+        """
+        return _filter_indexed(
+            self._current_indexes(), self.tasks, status, priority, assignee, tag, due_from, due_to
+        )
+
+    def known_names(self) -> set:
+        """Lower-cased assignees and tags of the active tasks (from the indexes)."""
+        indexes = self._current_indexes()
+        return (set(indexes["assignee"]) | set(indexes["tag"])) - {""}
+
+    def snapshot(self) -> "TaskSnapshot":
+        """
+        Immutable point-in-time view of the active tasks (read-only TaskViews
+        over the stored Task objects, no copies). Built once per store version
+        and shared by every reader until the next write.
+        """
+        with self._lock:
+            source = (id(self.tasks), len(self.tasks))
+            cached = self._snapshot
+            if cached is None or cached[0] != source:
+                cached = self._snapshot = (source, TaskSnapshot(self.tasks, self.version))
+            return cached[1]
+
+    def get_all_tasks(self, include_archived: bool = False) -> List[Task]:
+        if include_archived and self.archive is not None:
+            return self.tasks + self.archive.all()
         return self.tasks
 
-    def update_task(self, task_id: str, **kwargs) -> Optional[Task]:
-        task = self.get_task(task_id)
-        if not task:
+    def get_archived_task(self, task_id: str) -> Optional[Task]:
+        if self.archive is None:
             return None
-        for key, value in kwargs.items():
+        return self.archive.get(task_id)
+
+    def get_archived_tasks(self, since: Optional[datetime] = None) -> List[Task]:
+        """Archived tasks completed on or after `since` (all archived tasks if None)."""
+        if self.archive is None:
+            return []
+        return self.archive.completed_between(since)
+
+    def archive_completed(self, older_than_days: int) -> int:
+        """Move tasks completed more than `older_than_days` ago into the archive. Returns count moved."""
+        with self._lock:
+            if self.archive is None or older_than_days <= 0:
+                return 0
+            cutoff = datetime.now() - timedelta(days=older_than_days)
+            old = [
+                t for t in self.tasks
+                if t.status == "completed" and (t.completed_at or t.updated_at) < cutoff
+            ]
+            if not old:
+                return 0
+            self.archive.add(old)
+            archived_ids = {t.task_id for t in old}
+            self.tasks = [t for t in self.tasks if t.task_id not in archived_ids]
+            self._save_tasks()
+            return len(old)
+
+    def _replace_task(self, position: int, fields: Dict, now: datetime) -> Task:
+        """
+        Copy-on-write update: store an updated copy at `position` instead of
+        mutating the Task in place, so snapshots taken earlier stay unchanged.
+        """
+        task = copy.copy(self.tasks[position])
+        task.tags = list(task.tags)
+        for key, value in fields.items():
             if hasattr(task, key):
                 setattr(task, key, value)
-        task.updated_at = datetime.now()
-        self._save_tasks()
+        task.updated_at = now
+        self.tasks[position] = task
         return task
 
-    def delete_task(self, task_id: str) -> bool:
-        task = self.get_task(task_id)
-        if task:
-            self.tasks.remove(task)
+    def update_task(self, task_id: str, **kwargs) -> Optional[Task]:
+        with self._lock:
+            for position, task in enumerate(self.tasks):
+                if task.task_id == task_id:
+                    break
+            else:
+                return None
+            task = self._replace_task(position, kwargs, datetime.now())
             self._save_tasks()
-            return True
-        return False
+            return task
+
+    def update_tasks(self, updates: Dict[str, Dict]) -> Dict[str, Optional[Task]]:
+        """Apply {task_id: {field: value}} updates with a single write. Missing ids map to None."""
+        with self._lock:
+            positions = {t.task_id: i for i, t in enumerate(self.tasks)}
+            now = datetime.now()
+            results = {}
+            for task_id, fields in updates.items():
+                position = positions.get(task_id)
+                results[task_id] = self._replace_task(position, fields, now) if position is not None else None
+            if any(results.values()):
+                self._save_tasks()
+            return results
+
+    def delete_tasks(self, task_ids: List[str]) -> Dict[str, bool]:
+        """Delete several tasks with a single write. Returns {task_id: deleted}."""
+        with self._lock:
+            wanted = set(task_ids)
+            existing = {t.task_id for t in self.tasks}
+            self.tasks = [t for t in self.tasks if t.task_id not in wanted]
+            results = {task_id: task_id in existing for task_id in task_ids}
+            if any(results.values()):
+                self._save_tasks()
+            return results
+
+    def delete_task(self, task_id: str) -> bool:
+        with self._lock:
+            task = self.get_task(task_id)
+            if task:
+                self.tasks.remove(task)
+                self._save_tasks()
+                return True
+            return False
+
+
+
+def _index_tasks(tasks) -> Dict:
+    """Status / priority / assignee / tag lookups and a deadline-sorted list for `tasks`."""
+    indexes = {"status": {}, "priority": {}, "assignee": {}, "tag": {}}
+    for task in tasks:
+        indexes["status"].setdefault(task.status, []).append(task)
+        indexes["priority"].setdefault(task.priority, []).append(task)
+        indexes["assignee"].setdefault((task.assignee or "").lower(), []).append(task)
+        for tag in {t.lower() for t in task.tags}:
+            indexes["tag"].setdefault(tag, []).append(task)
+    dated = sorted((t for t in tasks if t.deadline), key=lambda t: t.deadline)
+    indexes["deadline_keys"] = [t.deadline for t in dated]
+    indexes["deadline"] = dated
+    return indexes
+
+
+def _filter_indexed(indexes, tasks, status, priority, assignee, tag, due_from, due_to) -> list:
+    """Intersect the index entries for each given filter (all of `tasks` if none)."""
+    candidates = []
+    if status:
+        statuses = [status] if isinstance(status, str) else status
+        candidates.append([t for s in statuses for t in indexes["status"].get(s, [])])
+    if priority:
+        candidates.append(indexes["priority"].get(priority, []))
+    if assignee:
+        candidates.append(indexes["assignee"].get(assignee.lower(), []))
+    if tag:
+        candidates.append(indexes["tag"].get(tag.lower(), []))
+    if due_from is not None or due_to is not None:
+        keys = indexes["deadline_keys"]
+        lo = bisect_left(keys, due_from) if due_from is not None else 0
+        hi = bisect_left(keys, due_to) if due_to is not None else len(keys)
+        candidates.append(indexes["deadline"][lo:hi])
+    if not candidates:
+        return list(tasks)
+    candidates.sort(key=len)
+    result = candidates[0]
+    for other in candidates[1:]:
+        ids = {id(t) for t in other}
+        result = [t for t in result if id(t) in ids]
+    return list(result)
+
+
+class TaskView:
+    """
+    Read-only view of a Task. Holds the Task's field values themselves (no
+    copies; the store replaces Tasks on update rather than mutating them) but
+    no reference to the Task, so nothing reachable from a view can change the
+    store. Attribute assignment raises AttributeError and `tags` is a tuple.
+    """
+
+    FIELDS = (
+        "task_id", "title", "description", "priority", "deadline", "status", "assignee", "tags",
+        "created_at", "updated_at", "completed_at",
+    )
+    __slots__ = FIELDS
+
+    def __init__(self, task):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, getattr(task, name))
+        object.__setattr__(self, "tags", tuple(task.tags))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Task {self.task_id} is read-only here")
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        return TaskView, (SimpleNamespace(**{name: getattr(self, name) for name in self.FIELDS}),)
+
+    def to_dict(self):
+        return {**Task.to_dict(self), "tags": list(self.tags)}
+
+    def __repr__(self):
+        return f"TaskView({self.task_id!r}, {self.title!r})"
+
+
+class TaskSnapshot(tuple):
+    """
+    Immutable, versioned tuple of TaskViews with index-backed lookups. Also
+    answers the read side of the TaskManager API (get_all_tasks, get_task,
+    find_tasks), so it can stand in for the store in generated code.
+    """
+
+    def __new__(cls, tasks, version: Optional[int] = None):
+        snapshot = super().__new__(cls, [TaskView(t) for t in tasks])
+        snapshot._version = version
+        snapshot._indexes = _index_tasks(snapshot)
+        snapshot._by_id = {t.task_id: t for t in snapshot}
+        return snapshot
+
+    def __reduce__(self):
+        return TaskSnapshot, (tuple(self), self._version)
+
+    @property
+    def version(self) -> Optional[int]:
+        """TaskManager.version the snapshot was taken at."""
+        return self._version
+
+    def by_status(self, *statuses: str) -> tuple:
+        return tuple(_filter_indexed(self._indexes, self, list(statuses), None, None, None, None, None))
+
+    def by_priority(self, priority: str) -> tuple:
+        return tuple(self._indexes["priority"].get(priority, ()))
+
+    def by_assignee(self, assignee: str) -> tuple:
+        return tuple(self._indexes["assignee"].get((assignee or "").lower(), ()))
+
+    def by_tag(self, tag: str) -> tuple:
+        return tuple(self._indexes["tag"].get(tag.lower(), ()))
+
+    def due_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> tuple:
+        """Tasks with a deadline in [start, end), earliest first."""
+        return tuple(_filter_indexed(self._indexes, self, None, None, None, None, start, end))
+
+    def find_tasks(self, status=None, priority=None, assignee=None, tag=None, due_from=None, due_to=None) -> List[TaskView]:
+        return _filter_indexed(self._indexes, self, status, priority, assignee, tag, due_from, due_to)
+
+    def get_all_tasks(self, include_archived: bool = False) -> List[TaskView]:
+        return list(self)
 
+    def get_task(self, task_id: str) -> Optional[TaskView]:
+        return self._by_id.get(task_id)
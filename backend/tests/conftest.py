@@ -1,15 +1,31 @@
 """
 Pytest configuration and fixtures
 """
+import os
 import pytest
 import json
 import tempfile
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
+
+# Keep caches, job queue, outbox and model manifest out of backend/data (config reads these at import)
+_STATE_DIR = tempfile.mkdtemp(prefix="agent-test-state-")
+os.environ["AGENT_CACHE_DB_PATH"] = ""
+os.environ["QUERY_CODE_CACHE_DB_PATH"] = os.path.join(_STATE_DIR, "query_code_cache.db")
+os.environ["JOBS_DB_PATH"] = os.path.join(_STATE_DIR, "jobs.db")
+os.environ["OUTBOX_DB_PATH"] = os.path.join(_STATE_DIR, "outbox.db")
+os.environ["MODEL_MANIFEST_PATH"] = os.path.join(_STATE_DIR, "model_manifest.json")
+
 from models.task import TaskManager, Task
 from config import TASKS_DB_PATH
 
+
+@pytest.fixture(scope="session", autouse=True)
+def _isolated_state_dir():
+    yield
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
 @pytest.fixture
 def temp_db_path():
     """Create a temporary database file for testing"""
@@ -0,0 +1,224 @@
+"""
+Unit tests for LLM admission control and the circuit breaker
+"""
+import asyncio
+import threading
+import time
+import pytest
+from utils.admission import AdmissionRejected, CircuitBreaker, DeadlineExceeded, LLMExecutor
+
+
+async def gather(executor, n, fn, **kwargs):
+    return await asyncio.gather(*(executor.run(fn, **kwargs) for _ in range(n)), return_exceptions=True)
+
+
+class TestLLMExecutor:
+    """Test queue limits, deadlines and breaker integration"""
+
+    def test_rejects_beyond_workers_plus_queue(self):
+        """Test calls past workers + max_queue fail fast with 429"""
+        executor = LLMExecutor(workers=1, max_queue=1, timeout=5)
+        results = asyncio.run(gather(executor, 4, lambda: time.sleep(0.1) or "ok"))
+        assert results.count("ok") == 2
+        rejected = [r for r in results if isinstance(r, AdmissionRejected)]
+        assert len(rejected) == 2 and all(r.status == 429 for r in rejected)
+        stats = executor.stats()
+        assert stats["rejected_queue"] == 2 and stats["in_progress"] == 0
+
+    def test_deadline_keeps_slot_until_worker_finishes(self):
+        """Test a slow call raises DeadlineExceeded but holds its slot until it returns"""
+        executor = LLMExecutor(workers=1, max_queue=0, timeout=5)
+        release = threading.Event()
+
+        async def scenario():
+            with pytest.raises(DeadlineExceeded):
+                await executor.run(release.wait, timeout=0.05)
+            with pytest.raises(AdmissionRejected):
+                await executor.run(lambda: "blocked")
+            release.set()
+            await asyncio.sleep(0.05)
+            return await executor.run(lambda: "ok")
+
+        assert asyncio.run(scenario()) == "ok"
+        assert executor.stats()["timeouts"] == 1
+
+    def test_breaker_opens_on_failures_then_probes(self):
+        """Test failures open the circuit (503) and a successful probe closes it"""
+        breaker = CircuitBreaker(error_rate=0.5, min_calls=4, window=60, cooldown=0.1)
+        executor = LLMExecutor(workers=2, max_queue=2, timeout=5, breaker=breaker,
+                               is_failure=lambda r: "error" in r)
+
+        async def scenario():
+            for _ in range(4):
+                await executor.run(lambda: {"error": "provider down"})
+            with pytest.raises(AdmissionRejected) as info:
+                await executor.run(lambda: {"response": "x"})
+            assert info.value.status == 503
+            await asyncio.sleep(0.15)
+            assert breaker.state == "half_open"
+            return await executor.run(lambda: {"response": "recovered"})
+
+        assert asyncio.run(scenario()) == {"response": "recovered"}
+        assert breaker.state == "closed"
+        assert executor.stats()["rejected_circuit"] == 1
+
+    def test_failed_probe_reopens(self):
+        """Test a failing half-open probe re-opens the circuit"""
+        breaker = CircuitBreaker(error_rate=0.5, min_calls=1, window=60, cooldown=0.05)
+        breaker.record(False)
+        assert breaker.state == "open"
+        time.sleep(0.06)
+        assert breaker.allow() and not breaker.allow()  # one probe only
+        breaker.record(False)
+        assert breaker.state == "open" and breaker.counters["opened"] == 2
+
+    def test_crud_stays_fast_while_agent_is_saturated(self, monkeypatch):
+        """Test /api/tasks latency is unaffected by stuck agent calls"""
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+        release = threading.Event()
+
+        class StuckAgent:
+            def answer_fast(self, request):
+                return None
+
+            def cached_response(self, request):
+                return None, None  # not cached, not coalesced
+
+            def process_request(self, request, use_llm=True, fast_path=True):
+                release.wait(5)
+                return {"status": "success", "response": "", "routing": {}}
+
+        executor = LLMExecutor(workers=2, max_queue=1, timeout=10)
+        monkeypatch.setattr(app_module, "_agent", StuckAgent())
+        monkeypatch.setattr(app_module, "get_llm_executor", lambda: executor)
+        client = TestClient(app_module.app)
+
+        statuses = []
+        threads = [
+            threading.Thread(target=lambda: statuses.append(
+                client.post("/api/agent/process", json={"request": "plan my week"}).status_code))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.3)
+        try:
+            started = time.perf_counter()
+            assert client.get("/api/tasks").status_code == 200
+            assert time.perf_counter() - started < 1.0
+            assert statuses.count(429) == 2
+        finally:
+            release.set()
+            for t in threads:
+                t.join()
+        assert statuses.count(200) == 3
+
+    def test_identical_questions_share_one_slot(self, monkeypatch):
+        """Test identical questions beyond workers + queue wait for one admitted run instead of getting 429s"""
+        import app as app_module
+        from app import AgentRequest
+
+        class Agent:
+            def __init__(self):
+                self.runs = 0
+
+            def answer_fast(self, request):
+                return None
+
+            def cached_response(self, request):
+                return None, ("flight", request)
+
+            def process_request(self, request, use_llm=True, fast_path=True):
+                self.runs += 1
+                time.sleep(0.2)
+                return {"status": "success", "response": "3 tasks are due.", "routing": {}}
+
+        agent = Agent()
+        executor = LLMExecutor(workers=1, max_queue=0, timeout=10)
+        monkeypatch.setattr(app_module, "_agent", agent)
+        monkeypatch.setattr(app_module, "get_llm_executor", lambda: executor)
+        monkeypatch.setattr(app_module, "notify_agent_breakdown", lambda *a, **k: None)
+
+        async def scenario():
+            calls = [
+                app_module.agent_process(AgentRequest(request="what is due"), app_module.BackgroundTasks())
+                for _ in range(5)
+            ]
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(scenario())
+        assert [r["response"] for r in results] == ["3 tasks are due."] * 5
+        assert agent.runs == 1
+        assert executor.counters["admitted"] == 1 and executor.counters["rejected_queue"] == 0
+        assert executor.breaker.stats()["recent_calls"] == 1
+
+    def test_cached_answers_need_no_slot(self, monkeypatch):
+        """Test a cached answer streams while the agent queue is full"""
+        import app as app_module
+        from app import AgentRequest
+
+        from agent.orchestrator import TaskManagementAgent
+
+        class Agent:
+            fast_events = staticmethod(TaskManagementAgent.fast_events)
+
+            def answer_fast(self, request):
+                return None
+
+            def cached_response(self, request):
+                return {"response": "3 tasks are due.", "routing": {}, "model": "m", "cached": True}, None
+
+        executor = LLMExecutor(workers=1, max_queue=0, timeout=10)
+        executor.acquire()
+        monkeypatch.setattr(app_module, "_agent", Agent())
+        monkeypatch.setattr(app_module, "get_llm_executor", lambda: executor)
+
+        async def scenario():
+            response = await app_module.agent_stream(AgentRequest(request="what is due"))
+            return [chunk async for chunk in response.body_iterator]
+
+        body = "".join(asyncio.run(scenario()))
+        assert "event: done" in body and '"cached": true' in body
+        assert executor.counters["rejected_queue"] == 0
+        executor.release()
+
+    def test_stream_slot_released_when_client_leaves_before_the_body(self, monkeypatch):
+        """Test an admitted stream whose body never starts gives its slot back"""
+        import app as app_module
+        from app import AgentRequest
+
+        class Agent:
+            def answer_fast(self, request):
+                return None
+
+            def cached_response(self, request):
+                return None, None  # not cached, not coalesced
+
+            def stream_request(self, request, fast_path=True):
+                raise AssertionError("body must not start")
+
+        executor = LLMExecutor(workers=1, max_queue=0, timeout=10)
+        monkeypatch.setattr(app_module, "_agent", Agent())
+        monkeypatch.setattr(app_module, "get_llm_executor", lambda: executor)
+
+        async def scenario():
+            response = await app_module.agent_stream(AgentRequest(request="plan my week"))
+            assert executor.stats()["in_progress"] == 1
+            with pytest.raises(AdmissionRejected):
+                executor.acquire()
+
+            async def gone(message):
+                raise OSError("client disconnected")
+
+            async def receive():
+                return {"type": "http.disconnect"}
+
+            with pytest.raises(Exception):
+                await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, gone)
+
+        asyncio.run(scenario())
+        executor.acquire()  # the slot is free again
+        executor.release()
+        assert executor.counters["abandoned"] == 1 and executor.breaker.stats()["state"] == "closed"
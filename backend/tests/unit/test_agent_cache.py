@@ -0,0 +1,105 @@
+"""
+Unit tests for the agent response cache
+"""
+import time
+import pytest
+from agent.cache import ResponseCache, make_key
+from agent.orchestrator import TaskManagementAgent
+from agent.router import RequestRouter
+from tests.unit.test_agent_tool_loop import ScriptedClient, call, slow_lookup
+
+
+@pytest.fixture
+def data_version(monkeypatch):
+    version = {"value": "v1"}
+    monkeypatch.setattr("db.factory.get_data_version", lambda: version["value"])
+    return version
+
+
+def make_agent(replies, cache, tools=()):
+    agent = TaskManagementAgent.__new__(TaskManagementAgent)
+    agent.model = "scripted"
+    agent.router = RequestRouter()
+    agent.tools = list(tools)
+    agent.client = ScriptedClient(replies)
+    agent.response_cache = cache
+    return agent
+
+
+class TestResponseCache:
+    """Test LRU, TTL and the SQLite tier"""
+
+    def test_key_normalization(self):
+        """Test case, spacing and trailing punctuation do not change the key"""
+        assert make_key("Show my  HIGH priority tasks?", "m", "v") == make_key("show my high priority tasks", "m", "v")
+        assert make_key("show tasks", "m", "v1") != make_key("show tasks", "m", "v2")
+
+    def test_lru_and_ttl(self):
+        """Test least-recently-used eviction and expiry"""
+        cache = ResponseCache(max_entries=2, ttl=0.05)
+        cache.set("a", {"n": 1})
+        cache.set("b", {"n": 2})
+        cache.get("a")
+        cache.set("c", {"n": 3})
+        assert cache.get("b") is None
+        assert cache.get("a") == {"n": 1}
+        time.sleep(0.06)
+        assert cache.get("a") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test entries are served from SQLite by a new cache instance"""
+        path = str(tmp_path / "cache.db")
+        first = ResponseCache(path=path)
+        first.set("k", {"response": "cached"})
+        first.close()
+        second = ResponseCache(path=path)
+        assert second.get("k") == {"response": "cached"}
+        assert second.get("k") == {"response": "cached"}
+        stats = second.stats()
+        assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+        assert stats["hit_rate"] == 1.0
+        second.close()
+
+
+class TestAgentCaching:
+    """Test caching in front of process_request"""
+
+    def test_repeat_question_is_served_from_cache(self, data_version):
+        """Test the second identical question makes no model call"""
+        agent = make_agent(["You have 3 tasks.", "You have 4 tasks."], ResponseCache())
+        first = agent.process_request("What's my completion rate?")
+        second = agent.process_request("what's my completion rate")
+        assert first["cached"] is False and second["cached"] is True
+        assert second["response"] == "You have 3 tasks."
+        assert len(agent.client.calls) == 1
+
+    def test_data_change_invalidates(self, data_version):
+        """Test a new data version misses the cache"""
+        agent = make_agent(["You have 3 tasks.", "You have 4 tasks."], ResponseCache())
+        agent.process_request("summarize my high priority tasks")
+        data_version["value"] = "v2"
+        assert agent.process_request("summarize my high priority tasks")["response"] == "You have 4 tasks."
+
+    def test_actions_are_not_cached(self, data_version):
+        """Test side-effect categories and side-effect tool use bypass the cache"""
+        agent = make_agent(["Created.", "Created again."], ResponseCache())
+        agent.process_request("create a task for the demo")
+        assert agent.process_request("create a task for the demo")["cached"] is False
+
+        def create_task(title: str):
+            """Create a task."""
+            return {"status": "success"}
+
+        agent = make_agent([call("create_task", title="x"), "Done.", "Done twice."], ResponseCache(), [create_task])
+        agent.process_request("help me out")
+        assert agent.process_request("help me out")["cached"] is False
+
+    def test_stream_uses_cache(self, data_version):
+        """Test a streamed answer is cached and replayed as a single chunk"""
+        agent = make_agent([call("slow_lookup", key="a"), "A."], ResponseCache(), [slow_lookup])
+        list(agent.stream_request("what is a"))
+        events = list(agent.stream_request("what is a"))
+        assert [e for e, _ in events] == ["routing", "chunk", "done"]
+        assert events[-1][1]["cached"] is True
+        assert events[1][1]["text"] == "A."
@@ -0,0 +1,80 @@
+"""
+Unit tests for the streaming agent endpoint
+"""
+import json
+from types import SimpleNamespace
+from agent.orchestrator import TaskManagementAgent
+from agent.router import RequestRouter
+from utils.gemini_adapter import GeminiClient
+
+
+class StreamingGenAI:
+    """Stand-in for google.generativeai that streams a canned answer"""
+
+    def GenerativeModel(self, name):
+        class Model:
+            def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+                chunks = ["Break it ", "into three ", "steps."]
+                if not stream:
+                    return SimpleNamespace(text="".join(chunks))
+                return iter(SimpleNamespace(text=c) for c in chunks)
+
+        return Model()
+
+
+def make_agent():
+    agent = TaskManagementAgent.__new__(TaskManagementAgent)
+    agent.model = "fake-model"
+    agent.router = RequestRouter()
+    agent.tools = []
+    agent.client = GeminiClient(api_key="")
+    agent.client._client = StreamingGenAI()
+    return agent
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestAgentStream:
+    """Test routing-first SSE streaming and the deferred breakdown notification"""
+
+    def test_stream_request_events(self):
+        """Test routing is emitted before any model output"""
+        events = list(make_agent().stream_request("create a task for the demo"))
+        assert events[0][0] == "routing"
+        assert "task_creation" in events[0][1]["categories"]
+        assert [e for e, _ in events[1:]] == ["chunk", "chunk", "chunk", "done"]
+        done = events[-1][1]
+        assert done["response"] == "Break it into three steps."
+        assert done["ttft_ms"] is not None
+
+    def test_stream_endpoint(self, monkeypatch):
+        """Test /api/agent/stream sends SSE and notifies once with the full text"""
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+        monkeypatch.setattr(app_module, "_agent", make_agent())
+        sent = []
+        monkeypatch.setattr(app_module, "notify_agent_breakdown", lambda text, title=None: sent.append(text))
+
+        client = TestClient(app_module.app)
+        response = client.post("/api/agent/stream", json={"request": "summarize my tasks"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert events[0][0] == "routing"
+        assert "".join(d["text"] for e, d in events if e == "chunk") == "Break it into three steps."
+        assert events[-1][0] == "done"
+        assert sent == ["Break it into three steps."]
+
+    def test_stream_error_event(self):
+        """Test an unconfigured client yields an error event after routing"""
+        agent = make_agent()
+        agent.client._client = None
+        events = list(agent.stream_request("summarize tasks"))
+        assert [e for e, _ in events] == ["routing", "error"]
@@ -0,0 +1,213 @@
+"""
+Unit tests for the agent's tool-calling loop (scripted fake model)
+"""
+import json
+import time
+from types import SimpleNamespace
+from agent.orchestrator import TaskManagementAgent
+from agent.router import RequestRouter
+from agent.tool_calls import parse_tool_calls
+from tools.task_tools import create_task, get_all_tasks
+
+
+class ScriptedClient:
+    """Returns canned replies in order and records the messages of each call"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, tools=None, **kwargs):
+        self.calls.append([dict(m) for m in messages])
+        content = self.replies.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=[]))])
+
+
+def call(name, **arguments):
+    return f"<tool_call>{json.dumps({'name': name, 'arguments': arguments})}</tool_call>"
+
+
+def slow_lookup(key: str):
+    """Slow read-only lookup."""
+    time.sleep(0.2)
+    return {"key": key, "value": key.upper()}
+
+
+def make_agent(replies, tools):
+    agent = TaskManagementAgent.__new__(TaskManagementAgent)
+    agent.model = "scripted"
+    agent.router = RequestRouter()
+    agent.tools = tools
+    agent.client = ScriptedClient(replies)
+    return agent
+
+
+class TestToolLoop:
+    """Test parsing, execution, feedback and per-turn timing"""
+
+    def test_parse_tool_calls(self):
+        """Test well-formed and malformed blocks"""
+        text = call("a", x=1) + "\n<tool_call>{not json}</tool_call>"
+        calls = parse_tool_calls(text)
+        assert calls[0]["name"] == "a" and calls[0]["arguments"] == {"x": 1}
+        assert "Malformed" in calls[1]["error"]
+        assert parse_tool_calls("plain answer") == []
+
+    def test_tools_run_and_results_are_fed_back(self, task_manager, monkeypatch):
+        """Test a two-turn exchange that creates a task through the real tool"""
+        monkeypatch.setattr("tools.task_tools.task_manager", task_manager)
+        agent = make_agent(
+            [call("create_task", title="Write report", priority="high"), "Created the task."],
+            [create_task, get_all_tasks],
+        )
+        result = agent.process_request("create a task to write the report")
+        assert result["status"] == "success"
+        assert result["response"] == "Created the task."
+        assert result["tools_used"] == 1
+        assert [t.title for t in task_manager.get_all_tasks()] == ["Write report"]
+        second_call = agent.client.calls[1]
+        assert second_call[-1]["role"] == "tool"
+        assert "Write report" in second_call[-1]["content"]
+        assert [t["turn"] for t in result["turns"]] == [1, 2]
+        assert result["turns"][0]["tool_calls"] == 1
+
+    def test_independent_calls_run_in_parallel(self):
+        """Test calls in one turn run concurrently"""
+        agent = make_agent([call("slow_lookup", key="a") + call("slow_lookup", key="b"), "done"], [slow_lookup])
+        result = agent.process_request("look up a and b")
+        assert result["tools_used"] == 2
+        assert all(c["ok"] for c in result["tool_calls"])
+        assert result["turns"][0]["tools_ms"] < 350
+
+    def test_tool_errors_are_reported_to_the_model(self):
+        """Test unknown tools and bad arguments become error results, not exceptions"""
+        agent = make_agent([call("missing_tool") + call("slow_lookup", nope=1), "sorry"], [slow_lookup])
+        result = agent.process_request("do something")
+        assert result["status"] == "success"
+        errors = [c["error"] for c in result["tool_calls"]]
+        assert errors[0] == "Unknown tool: missing_tool"
+        assert errors[1].startswith("TypeError")
+        assert '"error"' in agent.client.calls[1][-1]["content"]
+
+    def test_max_turns(self):
+        """Test the loop stops when the model keeps calling tools"""
+        agent = make_agent([call("slow_lookup", key="x")] * 2, [slow_lookup])
+        result = agent.process_request("loop forever", max_turns=2)
+        assert result["status"] == "error"
+        assert len(result["turns"]) == 2
+
+    def test_stream_hides_tool_markup(self):
+        """Test streaming emits tool_results between turns and only the final text as chunks"""
+        agent = make_agent([call("slow_lookup", key="a"), "The value is A."], [slow_lookup])
+        events = list(agent.stream_request("what is a"))
+        names = [e for e, _ in events]
+        assert names == ["routing", "tool_results", "chunk", "done"]
+        assert events[2][1]["text"] == "The value is A."
+        assert len(events[-1][1]["turns"]) == 2
+
+
+class TestToolSubsetting:
+    """Test router-driven tool groups, the full-set fallback and prompt metrics"""
+
+    def test_only_routed_groups_are_offered(self):
+        """Test an email request gets email tools only and a smaller manifest"""
+        from agent.orchestrator import prompt_stats, tool_group
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent([call("get_upcoming_tasks_for_reminder"), "Sent."], full)
+        result = agent.process_request("send email reminder to the team")
+        offered = result["tools_offered"]
+        assert 0 < offered < len(full)
+        assert result["fallback"] is False
+        groups = {tool_group(t) for t in agent.select_tools(agent.router.route("send email reminder"))}
+        assert groups == {"email_tools"}
+        stats = prompt_stats()["email_tools"]
+        assert stats["avg_manifest_tokens"] < stats["avg_full_manifest_tokens"]
+        assert stats["token_reduction_pct"] > 0
+
+    def test_hours_tools_travel_with_task_tools(self):
+        """Test working-hours tools are part of the task_tools group"""
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent([], full)
+        names = {t.__name__ for t in agent.select_tools({"recommended_tools": ["task_tools"]})}
+        assert {"create_task", "log_working_hours", "get_working_hours"} <= names
+        assert "send_custom_email" not in names
+
+    def test_fallback_to_full_set(self, task_manager, monkeypatch):
+        """Test calling a tool outside the subset runs it and widens later turns"""
+        monkeypatch.setattr("tools.task_tools.task_manager", task_manager)
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent([call("get_all_tasks"), "No tasks yet."], full)
+        original_create = agent.client.create
+        offered_per_call = []
+
+        def create(model, messages, tools=None, **kwargs):
+            offered_per_call.append(len(tools))
+            return original_create(model, messages, tools=tools, **kwargs)
+
+        agent.client.chat.completions = SimpleNamespace(create=create)
+        result = agent.process_request("send email summary")
+        assert result["status"] == "success"
+        assert result["tool_calls"][0]["ok"]
+        assert result["fallback"] is True
+        assert offered_per_call[0] < offered_per_call[1] == len(full)
+
+    def test_general_requests_get_every_tool(self):
+        """Test requests the router cannot place are offered the full set, not just task tools"""
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent([], full)
+        routing = agent.router.route("Send Alice a reminder about her overdue tasks")
+        assert routing["categories"] == ["general"]
+        assert agent.select_tools(routing) is full
+
+    def test_plain_answer_from_subset_is_final(self):
+        """Test a plain subset answer is streamed as is, with one model call"""
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent(["No reminders are due.", "No reminders are due."], full)
+        assert agent.process_request("send email summary")["fallback"] is False
+        events = list(agent.stream_request("send email summary"))
+        assert [e for e, _ in events] == ["routing", "chunk", "done"]
+        assert events[1][1]["text"] == "No reminders are due." and events[-1][1]["fallback"] is False
+        assert len(agent.client.calls) == 2
+
+    def test_missing_tool_reply_is_retried_with_every_tool(self):
+        """Test a subset reply saying a tool is missing is asked again with the full set, and both manifests are counted"""
+        from agent import orchestrator
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        for stream in (False, True):
+            agent = make_agent(["I don't have a tool to read tasks.", "Summary sent."], full)
+            offered_per_call = []
+            original_create = agent.client.create
+
+            def create(model, messages, tools=None, **kwargs):
+                offered_per_call.append(tools)
+                return original_create(model, messages, tools=tools, **kwargs)
+
+            agent.client.chat.completions = SimpleNamespace(create=create)
+            before = dict(orchestrator._prompt_stats.get("email_tools", {}))
+            if stream:
+                events = list(agent.stream_request("send email summary"))
+                assert [e for e, _ in events] == ["routing", "chunk", "fallback", "chunk", "done"]
+                assert events[2][1] == {"turn": 1, "tools_offered": len(full)}
+                assert events[-1][1]["response"] == "Summary sent." and events[-1][1]["fallback"] is True
+            else:
+                result = agent.process_request("send email summary")
+                assert result["response"] == "Summary sent." and result["fallback"] is True
+            subset, retried = offered_per_call
+            assert len(subset) < len(retried) == len(full)
+            after = orchestrator._prompt_stats["email_tools"]
+            sent = agent._manifest_tokens(subset) + agent._manifest_tokens(full)
+            assert after["manifest_tokens"] - before.get("manifest_tokens", 0) == sent
+            assert after["full_manifest_tokens"] - before.get("full_manifest_tokens", 0) == 2 * agent._manifest_tokens(full)
+
+    def test_missing_tool_phrases(self):
+        """Test which replies count as a missing-tool signal"""
+        full = TaskManagementAgent.__new__(TaskManagementAgent)._register_all_tools()
+        agent = make_agent([], full)
+        subset = agent.select_tools({"recommended_tools": ["email_tools"]})
+        for reply in ("I don't have access to a tool that lists tasks.", "No suitable tool is available.",
+                      "That function is not available to me.", '<tool_call>{"name": "get_all_tasks"'):
+            assert agent._needs_all_tools(reply, [], subset), reply
+        for reply in ("You have no tasks due.", "I don't have any reminders to send."):
+            assert not agent._needs_all_tools(reply, [], subset), reply
+        assert not agent._needs_all_tools("I don't have a tool for that.", [], full)
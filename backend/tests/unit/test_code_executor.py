@@ -0,0 +1,154 @@
+"""
+Unit tests for the generated-code executor
+"""
+import sys
+import threading
+import pytest
+from models.task import Task
+from utils import code_executor
+from utils.code_executor import SafeCodeExecutor, BASE_GLOBALS
+
+
+@pytest.fixture
+def executor(task_manager):
+    task_manager.add_tasks([Task("T1", "One", priority="high"), Task("T2", "Two")])
+    return SafeCodeExecutor(task_manager)
+
+
+class TestSafeCodeExecutor:
+    """Test compiled-code reuse, namespace isolation and snapshot reuse"""
+
+    def test_compiled_code_is_reused(self, executor):
+        """Test the same content is extracted and compiled once"""
+        snippet = "<execute_python>\nanswer_text = f'{len(tasks)} tasks'\nSTATUS = 'success'\n</execute_python>"
+        before = dict(code_executor.compile_stats)
+        first = executor.execute(snippet)
+        second = executor.execute(snippet)
+        assert first["answer"] == second["answer"] == "2 tasks"
+        assert first["code"].startswith("answer_text")
+        assert code_executor.compile_stats["misses"] - before["misses"] == 1
+        assert code_executor.compile_stats["hits"] - before["hits"] == 1
+
+    def test_namespaces_are_fresh_per_execution(self, executor):
+        """Test names defined or overwritten by one run do not leak into the next"""
+        executor.execute("leaked = 1\njson = None\nanswer_text = 'x'")
+        result = executor.execute("answer_text = json.dumps({'seen': 'leaked' in dir()})", "q")
+        assert result["error"] is None and result["answer"] == '{"seen": false}'
+        assert BASE_GLOBALS["json"] is not None
+        with pytest.raises(TypeError):
+            BASE_GLOBALS["json"] = None
+
+    def test_syntax_errors_are_reported(self, executor):
+        """Test code that does not compile returns an error instead of raising"""
+        result = executor.execute("answer_text = (")
+        assert result["error"] and "SyntaxError" in result["error"]
+        assert result["status"] == "unknown"
+
+    def test_store_is_not_reread(self, executor, monkeypatch):
+        """Test a run uses the cached snapshot instead of re-reading the store"""
+        calls = []
+        original = executor.task_manager.get_all_tasks
+        monkeypatch.setattr(executor.task_manager, "get_all_tasks", lambda: calls.append(1) or original())
+        result = executor.execute("answer_text = 'done'")
+        assert result["answer"] == "done" and calls == []
+
+    def test_tasks_found_counts_answer_rows(self, executor, monkeypatch):
+        """Test the query tool counts the rows the code returned, not the whole store"""
+        import tools.query_tools
+        monkeypatch.setattr(tools.query_tools, "executor", executor)
+        rows = tools.query_tools.execute_query_code("answer_rows = by_priority('high')\nSTATUS = 'success'")
+        assert rows["tasks_found"] == 1
+        assert tools.query_tools.execute_query_code("answer_text = 'none'")["tasks_found"] is None
+
+
+class TestTaskSnapshot:
+    """Test generated code sees an immutable, versioned, indexed snapshot"""
+
+    def test_snapshot_is_shared_until_a_write(self, executor):
+        """Test the snapshot is reused per version and earlier snapshots keep their values"""
+        manager = executor.task_manager
+        first = manager.snapshot()
+        assert manager.snapshot() is first and first.version == manager.version
+        assert first[0].title is manager.tasks[0].title  # views share the stored values
+        manager.update_task("T1", status="completed", tags=["done"])
+        second = manager.snapshot()
+        assert second is not first and second.version == first.version + 1
+        assert first.get_task("T1").status == "todo" and first.get_task("T1").tags == ()
+        assert second.get_task("T1").status == "completed" and second.get_task("T1").tags == ("done",)
+
+    def test_generated_code_cannot_mutate_the_store(self, executor):
+        """Test attribute writes, list mutation and store writes all fail inside generated code"""
+        for code in (
+            "tasks[0].status = 'completed'",
+            "tasks.clear()",
+            "tasks[0].tags.append('x')",
+            "task_manager.update_task('T1', status='completed')",
+            "tasks[0]._task.status = 'completed'",
+        ):
+            result = executor.execute(code)
+            assert result["error"] and ("AttributeError" in result["error"]), code
+        for name in ("TaskManager", "Task"):
+            result = executor.execute(f"{name}('data/tasks.json')")
+            assert f"NameError: name '{name}' is not defined" in result["error"]
+        assert [t.status for t in executor.task_manager.get_all_tasks()] == ["todo", "todo"]
+        assert executor.task_manager.get_task("T1").tags == []
+
+    def test_index_helpers(self, executor):
+        """Test by_status / by_assignee / by_tag / due_between answer from the indexes"""
+        from datetime import datetime, timedelta
+        soon = datetime.now() + timedelta(days=2)
+        executor.task_manager.add_tasks([
+            Task("T3", "Three", status="in_progress", assignee="Alice", tags=["Release"], deadline=soon),
+            Task("T4", "Four", deadline=soon + timedelta(days=30)),
+        ])
+        code = (
+            "week = due_between(datetime.now(), datetime.now() + timedelta(days=7))\n"
+            "answer_json = {'open': [t.task_id for t in by_status('todo', 'in_progress')],\n"
+            "               'alice': [t.task_id for t in by_assignee('alice')],\n"
+            "               'release': [t.task_id for t in by_tag('release')],\n"
+            "               'week': [t.task_id for t in week],\n"
+            "               'mine': [t.task_id for t in task_manager.find_tasks(status='todo', assignee='me')]}"
+        )
+        result = executor.execute(code)
+        assert result["error"] is None
+        assert result["answer"] == {
+            "open": ["T1", "T2", "T4", "T3"], "alice": ["T3"], "release": ["T3"],
+            "week": ["T3"], "mine": ["T1", "T2", "T4"],
+        }
+
+
+class TestOutputCapture:
+    """Test print output is captured per execution without touching sys.stdout"""
+
+    def test_print_is_captured_without_swapping_stdout(self, executor, capsys):
+        """Test output lands in the result while the process stdout stays in place"""
+        result = executor.execute("import sys\nprint('a', 1, sep='-')\nprint('b')\nanswer_text = str(id(sys.stdout))")
+        assert result["stdout"] == "a-1\nb"
+        assert result["answer"] == str(id(sys.stdout))
+        assert capsys.readouterr().out == ""
+
+    def test_concurrent_executions_keep_their_own_output(self, executor):
+        """Stress: many threads print at once; each result holds only its own lines"""
+        # sleep(0) hands the GIL to another thread between prints
+        code = "import time\nfor i in range(50):\n    print(user_request, i)\n    time.sleep(0)\nanswer_text = user_request"
+        failures = []
+        barrier = threading.Barrier(16)
+
+        def worker(n):
+            barrier.wait()
+            for run in range(20):
+                name = f"worker{n}-run{run}"
+                result = executor.execute(code, name)
+                expected = "\n".join(f"{name} {i}" for i in range(50))
+                if result["stdout"] != expected or result["answer"] != name:
+                    failures.append(name)
+            print(f"server log from thread {n}")  # must reach the real stdout, not a sandbox buffer
+
+        stdout = sys.stdout
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert failures == []
+        assert sys.stdout is stdout
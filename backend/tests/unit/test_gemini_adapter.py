@@ -0,0 +1,82 @@
+"""
+Unit tests for the Gemini adapter (with a local stand-in for the Gemini API)
+"""
+from types import SimpleNamespace
+from utils.gemini_adapter import GeminiClient, _tool_manifest
+
+
+class FakeGenAI:
+    """Stand-in for google.generativeai: counts model handles and transports"""
+
+    def __init__(self):
+        self.models_created = 0
+        self.transports_opened = 0
+        self.prompts = []
+
+    def GenerativeModel(self, name):
+        self.models_created += 1
+        fake = self
+
+        class Model:
+            _transport = None
+
+            def generate_content(self, prompt, generation_config=None, request_options=None):
+                if self._transport is None:
+                    fake.transports_opened += 1
+                    self._transport = object()
+                fake.prompts.append(prompt)
+                return SimpleNamespace(text=f"ok from {name}")
+
+        return Model()
+
+
+def create_task(title: str):
+    """Create a new task.
+
+    Longer description that is not part of the manifest.
+    """
+
+
+def get_all_tasks():
+    """List every task."""
+
+
+def make_client():
+    client = GeminiClient(api_key="")
+    client._client = FakeGenAI()
+    return client
+
+
+class TestGeminiClient:
+    """Test model handle reuse and the cached tool manifest"""
+
+    def test_model_and_transport_are_reused(self):
+        """Test repeated requests build one model handle and one transport"""
+        client = make_client()
+        messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+        for _ in range(5):
+            response = client.chat.completions.create(model="m", messages=messages, tools=[create_task])
+            assert response.choices[0].message.content.startswith("ok from")
+        assert client._client.models_created == 1
+        assert client._client.transports_opened == 1
+        assert client.stats()["calls"] == 5
+        assert client.chat is client.chat
+
+    def test_tool_manifest_is_cached(self):
+        """Test the manifest is built once per tools tuple and lands in the prompt"""
+        _tool_manifest.cache_clear()
+        client = make_client()
+        tools = [create_task, get_all_tasks]
+        for _ in range(3):
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": "x"}], tools=tools)
+        info = _tool_manifest.cache_info()
+        assert info.misses == 1 and info.hits == 2
+        assert "- create_task(title: str): Create a new task." in client._client.prompts[-1]
+        assert "Longer description" not in client._client.prompts[-1]
+
+    def test_unconfigured_client(self):
+        """Test a missing API key returns an error response without calling out"""
+        client = GeminiClient(api_key="")
+        client._client = None
+        response = client.chat.completions.create(model="m", messages=[])
+        assert "not configured" in response.choices[0].message.content
@@ -0,0 +1,95 @@
+"""
+Unit tests for the local working hours repository
+"""
+import pytest
+from datetime import date
+from db.local import LocalHoursRepository
+from models.working_hours import WorkingHours
+
+
+def _entry(id, task_id="T1", user_id="alice", minutes=30, day=date(2026, 1, 10)):
+    return WorkingHours(id=id, task_id=task_id, user_id=user_id, minutes=minutes, date=day)
+
+
+class TestLocalHoursRepository:
+    """Test LocalHoursRepository"""
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        return LocalHoursRepository(str(tmp_path / "hours"))
+
+    def test_add_and_get(self, repo):
+        """Test adding and fetching an entry by id"""
+        repo.add(_entry("WH1"))
+        entry = repo.get_by_id("WH1")
+        assert entry is not None
+        assert entry.minutes == 30
+
+    def test_list_by_task_and_user(self, repo):
+        """Test task and user indexes"""
+        repo.add(_entry("WH1", task_id="T1", user_id="alice"))
+        repo.add(_entry("WH2", task_id="T2", user_id="alice"))
+        repo.add(_entry("WH3", task_id="T1", user_id="bob"))
+        assert {e.id for e in repo.list_by_task("T1")} == {"WH1", "WH3"}
+        assert {e.id for e in repo.list_by_user("alice")} == {"WH1", "WH2"}
+
+    def test_list_by_date_range(self, repo):
+        """Test inclusive date range queries with filters"""
+        repo.add(_entry("WH1", day=date(2026, 1, 1)))
+        repo.add(_entry("WH2", day=date(2026, 1, 15)))
+        repo.add(_entry("WH3", day=date(2026, 1, 31), user_id="bob"))
+        repo.add(_entry("WH4", day=date(2026, 2, 1)))
+        entries = repo.list_by_date_range(date(2026, 1, 1), date(2026, 1, 31))
+        assert [e.id for e in entries] == ["WH1", "WH2", "WH3"]
+        entries = repo.list_by_date_range(date(2026, 1, 1), date(2026, 1, 31), user_id="bob")
+        assert [e.id for e in entries] == ["WH3"]
+
+    def test_persistence_is_append_only(self, tmp_path):
+        """Test entries survive a reload and the file is appended to"""
+        path = tmp_path / "hours"
+        repo = LocalHoursRepository(str(path))
+        repo.add(_entry("WH1"))
+        repo.add(_entry("WH2"))
+        assert len((path / "2026-01.jsonl").read_text().splitlines()) == 2
+
+        reloaded = LocalHoursRepository(str(path))
+        assert reloaded.get_by_id("WH2") is not None
+        assert len(reloaded.list_by_task("T1")) == 2
+
+    def test_partitions_by_month(self, tmp_path):
+        """Test one segment per month and manifest min/max dates"""
+        repo = LocalHoursRepository(str(tmp_path / "hours"))
+        repo.add(_entry("WH1", day=date(2025, 11, 3)))
+        repo.add(_entry("WH2", day=date(2025, 11, 20)))
+        repo.add(_entry("WH3", day=date(2026, 1, 5)))
+        assert repo.store.months() == ["2025-11", "2026-01"]
+        assert repo.store.manifest["2025-11"]["min_date"] == "2025-11-03"
+        assert repo.store.manifest["2025-11"]["max_date"] == "2025-11-20"
+        assert repo.store.manifest["2025-11"]["count"] == 2
+
+    def test_only_hot_and_overlapping_partitions_are_loaded(self, tmp_path):
+        """Test cold months stay on disk until a query needs them"""
+        path = str(tmp_path / "hours")
+        repo = LocalHoursRepository(path)
+        for i, month in enumerate([9, 10, 11, 12]):
+            repo.add(_entry(f"WH{i}", day=date(2025, month, 15)))
+
+        reloaded = LocalHoursRepository(path, hot_months=1)
+        assert reloaded.loaded_partitions() == ["2025-12"]
+
+        entries = reloaded.list_by_date_range(date(2025, 11, 1), date(2025, 11, 30))
+        assert [e.id for e in entries] == ["WH2"]
+        assert reloaded.loaded_partitions() == ["2025-11", "2025-12"]
+
+        assert reloaded.get_by_id("WH0") is not None
+        assert len(reloaded.list_by_task("T1")) == 4
+
+    def test_legacy_single_file_is_migrated(self, tmp_path):
+        """Test a pre-partitioning hours log is split into monthly segments"""
+        legacy = tmp_path / "hours.jsonl"
+        legacy.write_text(
+            '{"id": "WH1", "task_id": "T1", "user_id": "alice", "minutes": 15, "date": "2025-12-01"}\n'
+        )
+        repo = LocalHoursRepository(str(tmp_path / "hours"))
+        assert repo.get_by_id("WH1") is not None
+        assert not legacy.exists()
@@ -0,0 +1,98 @@
+"""
+Unit tests for the outbound HTTP connection pool
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.http_pool import HTTPClientPool, HTTPStatusError
+
+
+@pytest.fixture
+def stub_server():
+    """Local keep-alive HTTP server that records client ports and request bodies"""
+    seen = {"ports": set(), "bodies": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            seen["ports"].add(self.client_address[1])
+            seen["bodies"].append(json.loads(body))
+            status = 500 if self.path == "/fail" else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            if self.path == "/close":
+                self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", seen, server
+    server.shutdown()
+    server.server_close()
+
+
+class TestHTTPClientPool:
+    """Test keep-alive reuse and error handling"""
+
+    def test_sequential_posts_reuse_one_connection(self, stub_server):
+        """Test messages to one host share a single TCP connection"""
+        base, seen, _ = stub_server
+        pool = HTTPClientPool()
+        for i in range(5):
+            assert pool.post_json(f"{base}/hook", {"n": i}) == (200, b"ok")
+        assert len(seen["ports"]) == 1
+        assert [b["n"] for b in seen["bodies"]] == [0, 1, 2, 3, 4]
+        stats = pool.stats()
+        assert stats["connections_opened"] == 1
+        assert stats["connections_reused"] == 4
+        pool.close()
+
+    def test_concurrent_posts_use_separate_connections(self, stub_server):
+        """Test parallel fan-out never shares a socket and idle connections are capped"""
+        base, seen, _ = stub_server
+        pool = HTTPClientPool(max_per_host=2)
+        barrier = threading.Barrier(4)
+
+        def post(i):
+            barrier.wait()
+            pool.post_json(f"{base}/hook", {"n": i})
+
+        threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(seen["bodies"]) == 4
+        assert pool.stats()["idle"] <= 2
+        pool.close()
+
+    def test_server_close_and_error_status(self, stub_server):
+        """Test Connection: close is honoured and 5xx raises"""
+        base, seen, _ = stub_server
+        pool = HTTPClientPool()
+        pool.post_json(f"{base}/close", {})
+        assert pool.stats()["idle"] == 0
+        with pytest.raises(HTTPStatusError) as exc:
+            pool.post_json(f"{base}/fail", {})
+        assert exc.value.status == 500
+        pool.close()
+
+    def test_stale_connection_is_retried(self, stub_server):
+        """Test a keep-alive connection dropped by the server is replaced transparently"""
+        base, seen, _ = stub_server
+        pool = HTTPClientPool()
+        pool.post_json(f"{base}/hook", {"n": 1})
+        for conn, _ in pool._idle[next(iter(pool._idle))]:
+            conn.sock.shutdown(2)  # simulate the server closing the idle socket
+        assert pool.post_json(f"{base}/hook", {"n": 2})[0] == 200
+        assert pool.stats()["stale_retries"] == 1
+        pool.close()
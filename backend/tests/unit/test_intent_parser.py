@@ -0,0 +1,139 @@
+"""
+Unit tests for the deterministic task-query fast path
+"""
+from datetime import datetime, timedelta
+import pytest
+from models.task import Task, TaskManager
+from agent.orchestrator import TaskManagementAgent
+from agent.router import RequestRouter
+from utils.intent_parser import parse_task_query, answer_task_query, fast_path_stats
+
+NOW = datetime(2026, 10, 21, 15, 0)  # a Wednesday
+
+
+@pytest.fixture
+def manager(temp_db_path):
+    manager = TaskManager(temp_db_path)
+    manager.add_tasks([
+        Task("T1", "Ship release", priority="high", deadline=NOW + timedelta(days=2), assignee="Alice", tags=["Backend"]),
+        Task("T2", "Write docs", priority="low", deadline=NOW + timedelta(days=9), status="in_progress", assignee="alice"),
+        Task("T3", "Fix login", priority="high", deadline=NOW - timedelta(days=1), status="in_progress", assignee="bob"),
+        Task("T4", "Old cleanup", priority="high", deadline=NOW - timedelta(days=3), status="completed", assignee="bob"),
+        Task("T5", "Someday idea", priority="medium", assignee="me", tags=["backend"]),
+    ])
+    return manager
+
+
+class TestParseTaskQuery:
+    """Test common phrasings parse into filters and everything else falls through"""
+
+    def test_common_phrasings(self):
+        """Test status, priority, assignee, tag and deadline phrases"""
+        week = parse_task_query("High priority tasks due this week", NOW)
+        assert week["priority"] == "high"
+        assert (week["due_from"], week["due_to"]) == (datetime(2026, 10, 19), datetime(2026, 10, 26))
+        assert parse_task_query("tasks assigned to alice in progress", NOW) == {"status": "in_progress", "assignee": "alice"}
+        assert parse_task_query("list open tasks tagged backend", NOW) == {"status": ["todo", "in_progress"], "tag": "backend"}
+        assert parse_task_query("Alice's urgent tasks", NOW) == {"priority": "high", "assignee": "alice"}
+        assert parse_task_query("How many completed tasks are there?", NOW) == {"count": True, "status": "completed"}
+        overdue = parse_task_query("show me my overdue tasks", NOW)
+        assert overdue["assignee"] == "me" and overdue["due_to"] == NOW and overdue["status"] == ["todo", "in_progress"]
+        assert parse_task_query("what's due tomorrow", NOW)["due_from"] == datetime(2026, 10, 22)
+        assert parse_task_query("tasks due in the next 3 days", NOW)["due_to"] == NOW + timedelta(days=3)
+
+    @pytest.mark.parametrize("request_text", [
+        "create a task for the demo",
+        "email me my overdue tasks",
+        "What's my completion rate?",
+        "complete all tasks",
+        "high or low priority tasks",
+        "tasks done this week",
+        "tasks for the sprint",
+        "plan my week",
+    ])
+    def test_other_requests_fall_back(self, request_text):
+        """Test actions, analytics, unknown words and conflicts are left to the model"""
+        assert parse_task_query(request_text, NOW) is None
+
+
+class TestAnswerTaskQuery:
+    """Test answers come from the store indexes and stay current after writes"""
+
+    def test_find_tasks_indexes(self, manager):
+        """Test filters intersect correctly and writes invalidate the indexes"""
+        assert [t.task_id for t in manager.find_tasks(assignee="ALICE")] == ["T1", "T2"]
+        assert [t.task_id for t in manager.find_tasks(priority="high", status=["todo", "in_progress"])] == ["T1", "T3"]
+        assert [t.task_id for t in manager.find_tasks(tag="backend")] == ["T1", "T5"]
+        window = manager.find_tasks(due_from=NOW - timedelta(days=1), due_to=NOW + timedelta(days=3))
+        assert {t.task_id for t in window} == {"T1", "T3"}
+        manager.update_task("T2", priority="high")
+        assert {t.task_id for t in manager.find_tasks(priority="high", assignee="alice")} == {"T1", "T2"}
+        manager.delete_task("T1")
+        assert [t.task_id for t in manager.find_tasks(tag="backend")] == ["T5"]
+
+    def test_answer_text(self, manager):
+        """Test listing, counting and empty answers"""
+        result = answer_task_query(parse_task_query("high priority tasks assigned to bob", NOW), manager)
+        assert result["count"] == 2 and result["answer"].startswith("Found 2 high priority tasks assigned to bob:")
+        assert "- Old cleanup [high, completed, due 2026-10-18] (bob)" in result["answer"]
+        overdue = answer_task_query(parse_task_query("how many overdue tasks", NOW), manager)
+        assert overdue["answer"] == "There is 1 task overdue." and overdue["tasks"][0]["task_id"] == "T3"
+        none = answer_task_query(parse_task_query("low priority tasks tagged ops", NOW), manager)
+        assert none["count"] == 0 and none["answer"] == "No low priority tasks tagged ops found."
+
+    def test_agent_answers_without_the_model(self, manager, monkeypatch):
+        """Test the agent answers parsed queries itself and counts handled vs fallback traffic"""
+        import tools.task_tools
+        monkeypatch.setattr(tools.task_tools, "task_manager", manager)
+        agent = TaskManagementAgent.__new__(TaskManagementAgent)
+        agent.router = RequestRouter()
+        agent.tools = []
+        agent.client = None  # any model call would fail
+        before = fast_path_stats()
+
+        result = agent.process_request("show alice's tasks")
+        assert result["fast_path"] and result["tasks_found"] == 2 and result["model"] is None
+        events = list(agent.stream_request("tasks tagged backend"))
+        assert [e for e, _ in events] == ["routing", "chunk", "done"] and events[-1][1]["fast_path"]
+        assert agent.process_request("draft a plan for alice")["status"] == "info"
+
+        after = fast_path_stats()["by_source"]["agent"]
+        previous = before["by_source"].get("agent", {"handled": 0, "fallback": 0})
+        assert after["handled"] - previous["handled"] == 2
+        assert after["fallback"] - previous["fallback"] == 1
+
+    def test_query_tool_shares_the_task_tools_store(self):
+        """Test the query tool reads the store task tools write to, not a copy loaded at import"""
+        import tools.task_tools
+        import tools.query_tools
+        assert tools.query_tools.task_manager is tools.task_tools.task_manager
+        assert tools.query_tools.executor.task_manager is tools.task_tools.task_manager
+
+    def test_endpoints_answer_off_the_event_loop(self, monkeypatch):
+        """Test the agent endpoints run the store lookup on the threadpool, not the event loop thread"""
+        import asyncio
+        import threading
+        import app as app_module
+        from app import AgentRequest
+
+        threads = []
+
+        class Agent:
+            def answer_fast(self, request):
+                threads.append(threading.current_thread())
+                return {"status": "success", "response": "2 tasks", "routing": {}, "fast_path": True}
+
+            def fast_events(self, fast):
+                yield "done", fast
+
+        monkeypatch.setattr(app_module, "_agent", Agent())
+
+        async def scenario():
+            loop_thread = threading.current_thread()
+            result = await app_module.agent_process(AgentRequest(request="show alice's tasks"), app_module.BackgroundTasks())
+            await app_module.agent_stream(AgentRequest(request="show alice's tasks"))
+            return loop_thread, result
+
+        loop_thread, result = asyncio.run(scenario())
+        assert result["response"] == "2 tasks"
+        assert len(threads) == 2 and loop_thread not in threads
@@ -0,0 +1,152 @@
+"""
+Unit tests for the asynchronous job API
+"""
+import threading
+import time
+import pytest
+from utils.jobs import JobManager, JobStore
+
+
+def wait_for(manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job["state"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(JobStore(str(tmp_path / "jobs.db")), workers=2)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+class TestJobManager:
+    """Test job lifecycle, progress events and restart recovery"""
+
+    def test_job_runs_and_records_progress(self, manager):
+        """Test a submitted job runs in the background and stores its result and events"""
+        def handler(params, report):
+            report("progress", {"step": 1})
+            return {"total": params["a"] + params["b"]}
+
+        manager.register("sum", handler)
+        job_id = manager.submit("sum", {"a": 2, "b": 3})
+        job = wait_for(manager, job_id)
+        assert job["state"] == "succeeded" and job["result"] == {"total": 5}
+        events = manager.events(job_id)
+        assert [e["event"] for e in events] == ["state", "progress", "state"]
+        assert events[-1]["data"] == {"state": "succeeded"}
+        assert [e["seq"] for e in manager.events(job_id, after=1)] == [2, 3]
+
+    def test_failures_and_unknown_kinds(self, manager):
+        """Test handler errors fail the job and unknown kinds are rejected up front"""
+        def boom(params, report):
+            raise RuntimeError("provider down")
+
+        manager.register("boom", boom)
+        job = wait_for(manager, manager.submit("boom"))
+        assert job["state"] == "failed" and "provider down" in job["error"]
+        with pytest.raises(ValueError):
+            manager.submit("nope")
+
+    def test_restart_resumes_queued_and_fails_running(self, tmp_path):
+        """Test queued jobs resume after a restart and interrupted ones are failed"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        queued = store.create("echo", {"x": 1})
+        running = store.create("echo", {"x": 2})
+        store.mark_running(running)
+
+        manager = JobManager(store, workers=1)
+        manager.register("echo", lambda params, report: params)
+        manager.start()
+        try:
+            assert wait_for(manager, queued)["result"] == {"x": 1}
+            interrupted = manager.get(running)
+            assert interrupted["state"] == "failed" and "restart" in interrupted["error"]
+            assert manager.stats()["resumed"] == 1
+        finally:
+            manager.shutdown(wait=True)
+
+
+class TestJobEndpoints:
+    """Test POST /api/jobs, polling and the SSE progress stream"""
+
+    def test_submit_poll_and_stream(self, manager, monkeypatch):
+        """Test a report job is accepted with 202, polled to completion and streamed"""
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+        gate = threading.Event()
+
+        def slow_report(assignee, days):
+            gate.wait(5)
+            return {"assignee": assignee, "days": days}
+
+        monkeypatch.setattr(app_module, "get_job_manager", lambda: manager)
+        monkeypatch.setattr(app_module, "_build_productivity_report", slow_report)
+        client = TestClient(app_module.app)
+
+        started = time.perf_counter()
+        response = client.post("/api/jobs", json={"kind": "report", "params": {"assignee": "sam", "days": 7}})
+        assert response.status_code == 202
+        assert time.perf_counter() - started < 1.0
+        job_id = response.json()["id"]
+        assert client.get(f"/api/jobs/{job_id}").json()["state"] in ("queued", "running")
+
+        gate.set()
+        with client.stream("GET", f"/api/jobs/{job_id}/events") as stream:
+            body = "".join(stream.iter_text())
+        assert "event: state" in body and '"succeeded"' in body
+        job = client.get(f"/api/jobs/{job_id}").json()
+        assert job["result"] == {"assignee": "sam", "days": 7}
+
+        assert client.post("/api/jobs", json={"kind": "bogus"}).status_code == 400
+        assert client.get("/api/jobs/missing").status_code == 404
+
+    def test_agent_job_uses_llm_admission(self, monkeypatch):
+        """Test agent jobs take an LLM slot, honour the circuit breaker and fail cleanly without a final answer"""
+        import app as app_module
+        from utils.admission import AdmissionRejected, LLMExecutor
+
+        class Agent:
+            def __init__(self, events):
+                self.events = events
+
+            def answer_fast(self, request):
+                return None
+
+
+            def cached_response(self, request):
+
+                return None, None  # not cached, not coalesced
+
+            def stream_request(self, request, fast_path=True):
+                assert executor.stats()["in_progress"] == 1
+                yield from self.events
+
+        executor = LLMExecutor(workers=1, max_queue=0)
+        monkeypatch.setattr(app_module, "get_llm_executor", lambda: executor)
+        monkeypatch.setattr(app_module, "notify_agent_breakdown", lambda *a, **k: None)
+        reported = []
+
+        monkeypatch.setattr(app_module, "_agent", Agent([("routing", {}), ("done", {"response": "ok"})]))
+        assert app_module._agent_job({"request": "plan"}, lambda *e: reported.append(e))["response"] == "ok"
+        assert reported == [("routing", {})]
+
+        monkeypatch.setattr(app_module, "_agent", Agent([("routing", {})]))
+        with pytest.raises(RuntimeError, match="without a final answer"):
+            app_module._agent_job({"request": "plan"}, lambda *e: None)
+
+        monkeypatch.setattr(app_module, "_agent", Agent([("error", {"message": "model down"})]))
+        with pytest.raises(RuntimeError, match="model down"):
+            app_module._agent_job({"request": "plan"}, lambda *e: None)
+        assert executor.stats()["in_progress"] == 0
+        assert executor.counters["completed"] == 1 and executor.counters["failed"] == 2
+
+        executor.acquire()  # queue full: the job is rejected instead of bypassing admission
+        with pytest.raises(AdmissionRejected):
+            app_module._agent_job({"request": "plan"}, lambda *e: None)
@@ -0,0 +1,176 @@
+"""
+Unit tests for the in-process Llama engine and adapter
+"""
+import threading
+import time
+import pytest
+from utils.llama_engine import LlamaEngine, resolve_gguf
+from utils.llama_adapter import LlamaClient
+
+
+class FakeLlama:
+    """Stands in for llama_cpp.Llama: echoes the last user message word by word."""
+
+    loads = 0
+
+    def __init__(self, delay=0.0):
+        FakeLlama.loads += 1
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.prompts = []
+
+    def create_chat_completion(self, messages, max_tokens, temperature, stream):
+        self.prompts.append(messages)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            yield {"choices": [{"delta": {"role": "assistant"}}]}
+            for word in messages[-1]["content"].split():
+                time.sleep(self.delay)
+                yield {"choices": [{"delta": {"content": word + " "}}]}
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def engine():
+    FakeLlama.loads = 0
+    fake = FakeLlama(delay=0.005)
+    engine = LlamaEngine("model.gguf", loader=lambda path, n_ctx, n_threads: fake, max_queue=4)
+    engine.fake = fake
+    yield engine
+    engine.close()
+
+
+class TestLlamaEngine:
+    """Test warm model reuse, streaming, serialization and back-pressure"""
+
+    def test_model_loads_once_and_streams(self, engine):
+        """Test the model is loaded once and tokens arrive incrementally"""
+        chunks = list(engine.stream([{"role": "user", "content": "plan the sprint"}]))
+        assert chunks == ["plan ", "the ", "sprint "]
+        assert engine.complete([{"role": "user", "content": "again"}]) == "again "
+        assert FakeLlama.loads == 1
+        stats = engine.stats()
+        assert stats["loaded"] and stats["completed"] == 2 and stats["tokens"] == 4
+
+    def test_concurrent_requests_are_serialized(self, engine):
+        """Test concurrent callers never decode on the context at the same time"""
+        results = {}
+
+        def ask(i):
+            results[i] = engine.complete([{"role": "user", "content": f"request {i} a b c"}])
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert engine.fake.max_active == 1
+        assert results[2] == "request 2 a b c "
+
+    def test_queue_full_and_errors(self):
+        """Test a full queue is rejected and loader errors reach the caller"""
+        gate = threading.Event()
+
+        class Blocking(FakeLlama):
+            def create_chat_completion(self, **kwargs):
+                gate.wait(5)
+                yield {"choices": [{"delta": {"content": "ok"}}]}
+
+        engine = LlamaEngine("m.gguf", loader=lambda *a: Blocking(), max_queue=1)
+        first = engine.stream([{"role": "user", "content": "1"}])
+        threading.Thread(target=lambda: list(first), daemon=True).start()
+        time.sleep(0.05)  # worker picks up the first request
+        second = engine.stream([{"role": "user", "content": "2"}])
+        threading.Thread(target=lambda: list(second), daemon=True).start()
+        time.sleep(0.05)
+        with pytest.raises(RuntimeError, match="busy"):
+            list(engine.stream([{"role": "user", "content": "3"}]))
+        gate.set()
+        engine.close()
+
+        def broken(*args):
+            raise OSError("bad gguf")
+
+        failing = LlamaEngine("m.gguf", loader=broken)
+        with pytest.raises(OSError):
+            failing.complete([{"role": "user", "content": "x"}])
+        failing.close()
+
+    def test_waiting_requests_are_grouped_by_prefix(self):
+        """Test queued requests run grouped by system prefix, current prefix first"""
+        gate = threading.Event()
+        fake = FakeLlama()
+        original = fake.create_chat_completion
+
+        def gated(**kwargs):
+            if kwargs["messages"][-1]["content"] == "first":
+                gate.wait(5)
+            return original(**kwargs)
+
+        fake.create_chat_completion = gated
+        engine = LlamaEngine("m.gguf", loader=lambda *a: fake, max_queue=8, prefix_cache_mb=0)
+
+        def msgs(system, text):
+            return [{"role": "system", "content": system}, {"role": "user", "content": text}]
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(engine.complete(msgs("A", "first"))))
+        first.start()
+        time.sleep(0.05)
+        threads = [
+            threading.Thread(target=lambda m=m: results.append(engine.complete(m)))
+            for m in (msgs("B", "b1"), msgs("A", "a2"), msgs("B", "b2"), msgs("A", "a3"))
+        ]
+        for t in threads:
+            t.start()
+            time.sleep(0.01)  # keep submission order deterministic
+        gate.set()
+        for t in [first] + threads:
+            t.join()
+        order = [m[-1]["content"] for m in fake.prompts]
+        assert order == ["first", "a2", "a3", "b1", "b2"]
+        stats = engine.stats()
+        assert stats["prefix_reuse"] == 3 and stats["batched_requests"] == 4
+        engine.close()
+
+
+class TestLlamaAdapter:
+    """Test the adapter exposes chat.completions on top of the engine"""
+
+    def test_chat_completions_create_and_stream(self, engine):
+        """Test create() and stream() go through the engine with system + user messages"""
+        client = LlamaClient(engine=engine)
+        response = client.chat.completions.create(
+            model="llama", messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": "hello there"}]
+        )
+        assert response.choices[0].message.content == "hello there "
+        assert engine.fake.prompts[-1][0] == {"role": "system", "content": "sys"}
+        assert "".join(client.chat.completions.stream(model="llama", messages=[{"role": "user", "content": "hi"}])) == "hi "
+        assert client.stats()["engine"]["completed"] == 2
+
+    def test_tool_manifest_is_part_of_the_system_prefix(self, engine):
+        """Test tools go in the system message so only the user message varies"""
+        def create_task(title: str):
+            """Create a new task."""
+
+        client = LlamaClient(engine=engine)
+        for request in ("add a task", "add another"):
+            client.chat.completions.create(
+                model="llama",
+                messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": request}],
+                tools=[create_task],
+            )
+        first, second = engine.fake.prompts[-2:]
+        assert first[0] == second[0] and "create_task(title: str)" in first[0]["content"]
+        assert second[1] == {"role": "user", "content": "add another"}
+
+    def test_resolve_gguf(self, tmp_path):
+        """Test a model directory resolves to the .gguf file inside it"""
+        (tmp_path / "notes.txt").write_text("x")
+        (tmp_path / "tiny.Q4_K_M.gguf").write_bytes(b"GGUF")
+        assert resolve_gguf(str(tmp_path)).endswith("tiny.Q4_K_M.gguf")
+        assert resolve_gguf(str(tmp_path / "notes.txt")) is None
+        assert resolve_gguf(None) is None
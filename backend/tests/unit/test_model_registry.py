@@ -0,0 +1,86 @@
+"""
+Unit tests for the cached local model registry
+"""
+import os
+import struct
+import pytest
+from utils.model_registry import ModelRegistry, read_gguf_metadata
+
+
+def _gguf_string(text):
+    data = text.encode("utf-8")
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, arch="llama", name="Tiny", context=8192, file_type=15):
+    """Minimal GGUF header: a few metadata keys (plus a token array to skip), no tensors."""
+    kvs = [
+        _gguf_string("general.architecture") + struct.pack("<I", 8) + _gguf_string(arch),
+        _gguf_string("general.name") + struct.pack("<I", 8) + _gguf_string(name),
+        _gguf_string("tokenizer.ggml.tokens") + struct.pack("<IIQ", 9, 8, 2) + _gguf_string("a") + _gguf_string("b"),
+        _gguf_string("general.file_type") + struct.pack("<II", 4, file_type),
+        _gguf_string(f"{arch}.context_length") + struct.pack("<II", 4, context),
+    ]
+    with open(path, "wb") as f:
+        f.write(b"GGUF" + struct.pack("<IQQ", 3, 0, len(kvs)) + b"".join(kvs))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    root = tmp_path / "models"
+    (root / "llama-3.2-1b").mkdir(parents=True)
+    write_gguf(root / "llama-3.2-1b" / "llama-3.2-1b-instruct.Q4_K_M.gguf")
+    (root / "legacy").mkdir()
+    (root / "legacy" / "consolidated.Q8_0.bin").write_bytes(b"x" * 10)
+    (root / "empty").mkdir()
+    return root
+
+
+class TestModelRegistry:
+    """Test scanning, metadata, manifest caching and change detection"""
+
+    def test_scan_reports_metadata(self, model_dir, tmp_path):
+        """Test models are found with size, format, quantization and context length"""
+        registry = ModelRegistry([str(model_dir), str(tmp_path / "missing")], str(tmp_path / "manifest.json"))
+        models = {m["name"]: m for m in registry.models()}
+        gguf = models["llama-3.2-1b-instruct.Q4_K_M"]
+        assert gguf["format"] == "gguf" and gguf["architecture"] == "llama"
+        assert gguf["context_length"] == 8192 and gguf["quantization"] == "Q4_K_M"
+        assert models["consolidated.Q8_0"]["quantization"] == "Q8_0"
+        assert models["consolidated.Q8_0"]["size_bytes"] == 10
+        assert registry.find()["format"] == "gguf"
+        assert registry.find("consolidated")["format"] == "bin"
+        assert registry.find("nope") is None
+
+    def test_manifest_avoids_rescanning(self, model_dir, tmp_path, monkeypatch):
+        """Test a new process reuses the manifest and only stats directories"""
+        manifest = str(tmp_path / "manifest.json")
+        ModelRegistry([str(model_dir)], manifest).models()
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("filesystem walked")
+
+        monkeypatch.setattr(os, "scandir", no_scan)
+        registry = ModelRegistry([str(model_dir)], manifest)
+        assert len(registry.models()) == 2
+        assert len(registry.models()) == 2
+        assert registry.stats()["scans"] == 0 and registry.stats()["manifest_loads"] == 1
+        assert registry.stats()["checks"] == 1  # second call served from memory within the TTL
+
+    def test_changes_trigger_rescan(self, model_dir, tmp_path):
+        """Test adding a model to a known directory is picked up on the next check"""
+        registry = ModelRegistry([str(model_dir)], str(tmp_path / "manifest.json"), ttl=0)
+        assert len(registry.models()) == 2
+        new_file = model_dir / "llama-3.2-1b" / "llama-3.2-1b-instruct.Q8_0.gguf"
+        write_gguf(new_file, file_type=7)
+        os.utime(model_dir / "llama-3.2-1b", ns=(1, 1))  # coarse mtime filesystems
+        names = [m["name"] for m in registry.models()]
+        assert "llama-3.2-1b-instruct.Q8_0" in names
+        assert registry.stats()["scans"] == 2
+
+    def test_unreadable_gguf(self, tmp_path):
+        """Test a file that is not GGUF yields no metadata instead of failing"""
+        bad = tmp_path / "bad.gguf"
+        bad.write_bytes(b"GGUF\x03\x00")
+        assert read_gguf_metadata(str(bad)) == {}
+        assert read_gguf_metadata(str(tmp_path / "missing.gguf")) == {}
@@ -0,0 +1,178 @@
+"""
+Unit tests for the generated query-code cache
+"""
+import time
+import pytest
+from models.task import Task, TaskManager
+from utils.code_executor import SafeCodeExecutor
+from utils.query_code_cache import QueryCodeCache, parameterize, templatize, fill
+import tools.query_tools as query_tools
+
+NAMES = {"alice", "bob", "release", "infra"}
+
+GENERATED = """<execute_python>
+who, tag, days = "alice", "release", 14
+mine = task_manager.find_tasks(assignee=who, tag=tag)
+answer_text = f"{who} has {len(mine)} {tag} tasks in the last {days} days"
+STATUS = "success"
+</execute_python>"""
+
+
+class TestParameterize:
+    """Test request shapes and code templates"""
+
+    def test_literals_become_placeholders(self):
+        """Test known names, quoted text, numbers and dates are parameterized but keywords are not"""
+        shape, params = parameterize("Workload summary for alice on 'release' work over 14 days?", NAMES)
+        assert shape == "workload summary for <name> on <text> work over <number> days"
+        assert params == [("name", "alice"), ("text", "release"), ("number", "14")]
+        assert parameterize("workload summary for bob on 'infra' work over 30 days", NAMES)[0] == shape
+        assert parameterize("trend for this week since 2026-10-01")[0] == "trend for this week since <date>"
+
+    def test_only_known_names_are_parameters(self):
+        """Test field names after "by" stay in the shape, and request casing is part of it"""
+        assert parameterize("tasks sorted by deadline", NAMES) == ("tasks sorted by deadline", [])
+        assert parameterize("tasks sorted by title", NAMES)[0] == "tasks sorted by title"
+        assert parameterize("tasks for carol", NAMES) == ("tasks for carol", [])
+        assert parameterize("tasks for Alice", NAMES) == ("tasks for <name:title>", [("name", "Alice")])
+        assert parameterize("tasks for alice", NAMES)[0] == "tasks for <name>"
+
+    def test_template_roundtrip(self):
+        """Test only string/number literals in the code are templated and refilled"""
+        code = GENERATED.split(">", 1)[1].rsplit("<", 1)[0]
+        _, params = parameterize("summary for alice tagged release in the last 14 days", NAMES)
+        template = templatize(code, params)
+        assert "alice" not in template.lower() and "14" not in template
+        _, other = parameterize("summary for bob tagged infra in the last 30 days", NAMES)
+        filled = fill(template, other)
+        assert "who, tag, days = 'bob', 'infra', 30" in filled
+        assert "mine = task_manager.find_tasks(assignee=who, tag=tag)" in filled
+        assert templatize("x = (", params) is None
+
+    def test_template_keeps_the_code_casing(self):
+        """Test a value lower-cased (or title-cased) by the code is refilled the same way"""
+        code = 'mine = [t for t in tasks if t.assignee.lower() == "alice"]\nlabel = "Alice"'
+        _, params = parameterize("tasks for Alice", NAMES)
+        template = templatize(code, params)
+        _, other = parameterize("tasks for Bob", NAMES)
+        filled = fill(template, other)
+        assert ".lower() == 'bob'" in filled and "label = 'Bob'" in filled
+
+    def test_request_text_cannot_inject_code(self):
+        """Test quotes in a request never reach the template, and filled values are always plain literals"""
+        template = templatize("m = [t for t in tasks if 'report' in t.title.lower()]", [("text", "report")])
+        shape, params = parameterize('tasks whose title contains "report"')
+        hostile = 'tasks whose title contains "x\' + str(__import__(\'os\').getpid()) + \'"'
+        assert parameterize(hostile)[0] != shape
+        assert ("text", "x' + str(__import__('os').getpid()) + '") not in parameterize(hostile)[1]
+        for value in ("x' + str(__import__('os').getpid()) + '", "o'brien", "{__import__('os')}", "a\\"):
+            filled = fill(template, [("text", value)])
+            assert filled == f"m = [t for t in tasks if {value!r} in t.title.lower()]"
+        # Values inside longer strings or f-strings are never templated
+        assert templatize("x = f'report {1}'\ny = 'a report'", params) is None
+        assert fill("n = __QP0n__", [("number", "1 + 1")]) is None
+
+    def test_literal_missing_from_code_is_not_templated(self):
+        """Test code that ignores a request literal cannot be shared"""
+        _, params = parameterize("tasks for alice over 14 days", NAMES)
+        assert templatize("answer_text = 'everything'", params) is None
+
+
+class TestQueryCodeCache:
+    """Test LRU eviction, persistence and staleness"""
+
+    def test_lru_eviction_and_persistence(self, tmp_path):
+        """Test least-recently-used entries are evicted and the rest survive a restart"""
+        path = str(tmp_path / "codes.db")
+        cache = QueryCodeCache(max_entries=2, path=path)
+        cache.set("a", "shape a", "code a")
+        cache.set("b", "shape b", "code b")
+        assert cache.get("a")["code"] == "code a"
+        cache.set("c", "shape c", "code c")
+        assert cache.get("b") is None
+        cache.close()
+        reopened = QueryCodeCache(max_entries=2, path=path)
+        assert reopened.get("a")["fresh"] and reopened.get("c")["code"] == "code c"
+        assert reopened.stats()["disk_size"] == 2
+
+    def test_expired_entries_are_stale(self):
+        """Test entries past the TTL are still returned, marked not fresh"""
+        cache = QueryCodeCache(ttl=0.01)
+        cache.set("k", "shape", "code")
+        time.sleep(0.02)
+        assert cache.get("k")["fresh"] is False
+        assert cache.stats()["stale"] == 1
+
+
+@pytest.fixture
+def query_env(temp_db_path, monkeypatch):
+    manager = TaskManager(temp_db_path)
+    manager.add_tasks([
+        Task("T1", "Ship", assignee="alice", tags=["release"]),
+        Task("T2", "Docs", assignee="bob", tags=["infra"]),
+    ])
+    cache = QueryCodeCache()
+    calls = []
+
+    def generate(user_request, model=None):
+        calls.append(user_request)
+        return GENERATED
+
+    monkeypatch.setattr(query_tools, "task_manager", manager)
+    monkeypatch.setattr(query_tools, "executor", SafeCodeExecutor(manager))
+    monkeypatch.setattr(query_tools, "get_query_code_cache", lambda: cache)
+    monkeypatch.setattr(query_tools, "generate_query_code", generate)
+    return cache, calls, monkeypatch
+
+
+class TestQueryWithCache:
+    """Test query_tasks_with_code skips the LLM on a cache hit"""
+
+    def test_same_shape_reuses_code(self, query_env):
+        """Test a second request of the same shape runs the cached code with its own literals"""
+        cache, calls, _ = query_env
+        first = query_tools.query_tasks_with_code("summary for alice tagged release in the last 14 days")
+        second = query_tools.query_tasks_with_code("summary for bob tagged infra in the last 30 days")
+        assert first["code_cache"] == "miss" and second["code_cache"] == "hit"
+        assert len(calls) == 1
+        assert second["execution_result"]["answer"] == "bob has 1 infra tasks in the last 30 days"
+
+    def test_names_added_later_are_parameters(self, query_env):
+        """Test assignees and tags created after startup share the cached code too"""
+        cache, calls, _ = query_env
+        query_tools.query_tasks_with_code("summary for alice tagged release in the last 14 days")
+        query_tools.task_manager.add_task(Task("T3", "Plan", assignee="carol", tags=["ops"]))
+        result = query_tools.query_tasks_with_code("summary for carol tagged ops in the last 7 days")
+        assert result["code_cache"] == "hit" and len(calls) == 1
+        assert result["execution_result"]["answer"] == "carol has 1 ops tasks in the last 7 days"
+
+    def test_failures_regenerate_and_fall_back_to_stale(self, query_env):
+        """Test broken cached code is regenerated, and stale code covers a failed regeneration"""
+        cache, calls, monkeypatch = query_env
+        request = "summary for alice tagged release in the last 14 days"
+        key = query_tools.make_key(parameterize(request, NAMES)[0], query_tools.LLM_MODEL, query_tools.QUERY_PROMPT_TEMPLATE)
+
+        cache.set(key, "shape", "raise ValueError('schema changed')")
+        assert query_tools.query_tasks_with_code(request)["code_cache"] == "miss"
+        assert len(calls) == 1 and cache.stats()["invalidations"] == 1
+
+        cache.ttl = 0  # everything cached is now stale
+        monkeypatch.setattr(
+            query_tools, "generate_query_code",
+            lambda *a, **k: "<execute_python>STATUS = 'error'\nanswer_text = 'no model'</execute_python>",
+        )
+        result = query_tools.query_tasks_with_code(request)
+        assert result["code_cache"] == "stale"
+        assert result["execution_result"]["answer"] == "alice has 1 release tasks in the last 14 days"
+        assert cache.stats()["stale_fallbacks"] == 1
+
+    def test_no_match_is_not_cached(self, query_env):
+        """Test code that finds nothing is not stored, so it cannot serve a wrong empty answer"""
+        cache, calls, monkeypatch = query_env
+        monkeypatch.setattr(
+            query_tools, "generate_query_code",
+            lambda *a, **k: calls.append(1) or "<execute_python>answer_text = 'alice: none'\nSTATUS = 'no_match'</execute_python>",
+        )
+        query_tools.query_tasks_with_code("summary for alice")
+        query_tools.query_tasks_with_code("summary for bob")
+        assert len(calls) == 2 and cache.stats()["stores"] == 0
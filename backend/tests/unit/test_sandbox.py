@@ -0,0 +1,152 @@
+"""
+Unit tests for the process-pool code sandbox
+"""
+import threading
+import time
+import pytest
+from models.task import Task
+from utils.code_executor import SafeCodeExecutor
+from utils import sandbox
+from utils.sandbox import SandboxPool
+
+
+def wait_idle(pool, timeout=30.0):
+    """Wait for background respawns to refill the pool."""
+    deadline = time.time() + timeout
+    while pool.stats()["idle"] < pool.workers:
+        assert time.time() < deadline, "sandbox pool did not refill"
+        time.sleep(0.02)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # No pandas/matplotlib preload: keeps worker start-up fast for query-only tests
+    pool = SandboxPool(workers=2, timeout=3, cpu_seconds=1, memory_mb=64, preload=())
+    pool.start()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def executor(task_manager, pool):
+    task_manager.add_tasks([Task("T1", "One", priority="high"), Task("T2", "Two")])
+    return SafeCodeExecutor(task_manager, sandbox=pool)
+
+
+class TestSandboxPool:
+    """Test generated code runs out of process against a snapshot, within limits"""
+
+    def test_query_runs_against_a_snapshot(self, executor, pool):
+        """Test results match in-process execution, the snapshot is reused, and the store is untouched"""
+        code = "answer_text = f'{len(tasks)} tasks, {len(by_priority(\"high\"))} high'\nprint('log line')\nSTATUS = 'success'"
+        sent = pool.stats()["snapshots_sent"]
+        result = executor.execute(f"<execute_python>\n{code}\n</execute_python>", "how many")
+        assert result["answer"] == "2 tasks, 1 high" and result["stdout"] == "log line" and result["error"] is None
+        executor.execute("answer_text = task_manager.get_task('T1').title")
+        executor.execute("answer_text = 'again'")
+        assert len(executor.task_manager.get_all_tasks()) == 2
+        # One snapshot per worker at most, since the store did not change
+        assert pool.stats()["snapshots_sent"] - sent <= 2
+        executor.task_manager.add_task(Task("T3", "Three"))
+        assert executor.execute("answer_text = len(tasks)")["answer"] == 3
+        executor.task_manager.tasks.append(Task("T4", "Four"))  # bypasses the store's save
+        # Once per worker: each must notice the change
+        assert [executor.execute("answer_text = len(tasks)")["answer"] for _ in range(pool.workers)] == [4] * pool.workers
+
+    def test_task_views_come_back_from_the_worker(self, executor, pool):
+        """Test answers holding read-only task views survive the trip back and the worker is reused"""
+        wait_idle(pool)
+        respawns = pool.stats()["respawns"]
+        for _ in range(3):
+            result = executor.execute("answer_rows = list(by_priority('high'))")
+            assert result["error"] is None
+            assert [t.task_id for t in result["answer"]] == ["T1"]
+            assert result["answer"][0].tags == () and result["answer"][0].to_dict()["priority"] == "high"
+        assert pool.stats()["respawns"] == respawns and pool.stats()["idle"] == pool.workers
+
+    def test_unloadable_results_do_not_leak_workers(self, executor, pool):
+        """Test answers that pickle but fail to unpickle are repr'd, and transport errors replace the worker"""
+        code = "class Bad:\n    def __reduce__(self):\n        return (int, ('x',))\nresult = Bad()"
+        result = executor.execute(code)
+        assert result["error"] is None and "Bad object" in result["answer"]
+
+        before = pool.stats()
+        result = pool.run("query", "answer_text = 'x'", (None, lambda: 1 / 0))
+        assert result["status"] == "error" and "ZeroDivisionError" in result["error"]
+        assert pool.stats()["respawns"] == before["respawns"] + 1
+        wait_idle(pool)
+        assert executor.execute("answer_text = 'still working'")["answer"] == "still working"
+
+    @pytest.mark.parametrize("code, counter, message", [
+        ("while True:\n    pass", "cpu_limits", "CPU time limit"),
+        ("import time\ntime.sleep(30)", "timeouts", "Timed out"),
+        ("blob = bytearray(256 * 1024 * 1024)", "memory_limits", "Memory limit"),
+    ])
+    def test_limits_replace_the_worker(self, executor, pool, code, counter, message):
+        """Test runaway CPU, wall-clock and memory use fail the run and the pool recovers"""
+        before = pool.stats()
+        result = executor.execute(code)
+        assert result["status"] == "error" and message in result["error"]
+        after = pool.stats()
+        assert after[counter] == before[counter] + 1 and after["respawns"] == before["respawns"] + 1
+        assert executor.execute("answer_text = 'still working'")["answer"] == "still working"
+
+    def test_runs_in_parallel(self, executor):
+        """Test two slow runs overlap across worker processes"""
+        results = []
+
+        def run():
+            results.append(executor.execute("import time\ntime.sleep(0.5)\nanswer_text = 'slept'")["answer"])
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == ["slept", "slept"]
+        assert time.perf_counter() - start < 0.95
+
+    def test_respawn_happens_in_the_background_and_retries(self, executor, pool, monkeypatch):
+        """Test a slow or failing respawn neither delays the caller nor shrinks the pool"""
+        wait_idle(pool)
+        monkeypatch.setattr(sandbox, "RESPAWN_DELAY", 0.05)
+        spawn = pool._spawn
+        attempts = []
+
+        def flaky_spawn():
+            attempts.append(1)
+            time.sleep(0.5)
+            if len(attempts) == 1:
+                raise RuntimeError("sandbox worker did not start")
+            return spawn()
+
+        monkeypatch.setattr(pool, "_spawn", flaky_spawn)
+        failures = pool.stats()["spawn_failures"]
+        started = time.perf_counter()
+        result = executor.execute("while True:\n    pass")
+        assert "CPU time limit" in result["error"]
+        assert time.perf_counter() - started < 1.4  # 1s CPU budget, no respawn wait
+        wait_idle(pool)
+        assert len(attempts) == 2 and pool.stats()["spawn_failures"] == failures + 1
+
+
+def test_failed_start_is_retried(task_manager, monkeypatch):
+    """Test a pool whose workers failed to start reports an error, then starts on a later run"""
+    pool = SandboxPool(workers=1, timeout=3, cpu_seconds=1, memory_mb=64, preload=())
+    spawn = pool._spawn
+
+    def broken():
+        raise RuntimeError("sandbox worker did not start")
+
+    monkeypatch.setattr(pool, "_spawn", broken)
+    executor = SafeCodeExecutor(task_manager, sandbox=pool)
+    try:
+        result = executor.execute("answer_text = 'x'")
+        assert result["status"] == "error" and "Sandbox unavailable" in result["error"]
+        assert pool.stats()["started"] is False
+        monkeypatch.setattr(pool, "_spawn", spawn)
+        assert executor.execute("answer_text = 'x'")["answer"] == "x"
+        assert pool.stats()["started"] is True
+    finally:
+        pool.close()
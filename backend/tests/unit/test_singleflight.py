@@ -0,0 +1,147 @@
+"""
+Unit tests for in-flight request coalescing
+"""
+import asyncio
+import threading
+import time
+import pytest
+from utils.singleflight import SingleFlight, singleflight, get_singleflight
+
+
+def run_concurrently(n, fn):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight:
+    """Test coalescing, error sharing and per-key isolation"""
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        """Test N overlapping calls run the function once"""
+        group = SingleFlight()
+        executions = []
+
+        def compute():
+            executions.append(1)
+            time.sleep(0.1)
+            return {"rate": 0.8}
+
+        results = run_concurrently(8, lambda: group.do("report", compute))
+        assert len(executions) == 1
+        assert all(r == {"rate": 0.8} for r in results)
+        stats = group.stats()
+        assert stats["executions"] == 1 and stats["deduplicated"] == 7
+        assert stats["in_flight"] == 0
+
+    def test_errors_are_shared_and_not_remembered(self):
+        """Test waiters get the leader's exception and the next call runs again"""
+        group = SingleFlight()
+
+        def fail():
+            time.sleep(0.05)
+            raise RuntimeError("LLM down")
+
+        results = run_concurrently(3, lambda: group.do("k", fail))
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert group.do("k", lambda: "ok") == "ok"
+
+    def test_async_calls_share_one_task(self):
+        """Test overlapping coroutines share one run, errors included, and the run outlives its starter"""
+        group = SingleFlight()
+        executions = []
+
+        async def compute():
+            executions.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("LLM down")
+
+        async def scenario():
+            starter = asyncio.ensure_future(group.do_async("q", compute))
+            await asyncio.sleep(0)
+            others = [asyncio.ensure_future(group.do_async("q", compute)) for _ in range(4)]
+            starter.cancel()  # its client went away
+            results = await asyncio.gather(*others)
+            errors = await asyncio.gather(*(group.do_async("e", fail) for _ in range(3)), return_exceptions=True)
+            return results, errors
+
+        results, errors = asyncio.run(scenario())
+        assert results == ["answer"] * 4 and len(executions) == 1
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        stats = group.stats()
+        assert stats["executions"] == 2 and stats["deduplicated"] == 6 and stats["in_flight"] == 0
+
+    def test_decorator_keys_on_arguments(self):
+        """Test different arguments are not coalesced"""
+        calls = []
+
+        @singleflight("test_charts")
+        def chart(days=30):
+            """Make a chart."""
+            calls.append(days)
+            time.sleep(0.05)
+            return days
+
+        results = run_concurrently(4, lambda: chart(days=7))
+        assert results == [7, 7, 7, 7]
+        assert chart(days=30) == 30
+        assert calls == [7, 30]
+        assert chart.__doc__ == "Make a chart."
+        assert get_singleflight("test_charts").stats()["deduplicated"] == 3
+
+    def test_report_endpoint_coalesces(self, monkeypatch):
+        """Test concurrent identical report requests compute once"""
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+        computed = []
+
+        def slow_report(assignee, days):
+            computed.append((assignee, days))
+            time.sleep(0.2)
+            return {"assignee": assignee or "all", "days": days}
+
+        monkeypatch.setattr(app_module, "_build_productivity_report", slow_report)
+        client = TestClient(app_module.app)
+        responses = run_concurrently(5, lambda: client.get("/api/productivity/report?days=7"))
+        assert all(r.status_code == 200 for r in responses)
+        assert computed == [(None, 7)]
+
+    def test_agent_questions_coalesce_but_actions_do_not(self, monkeypatch):
+        """Test identical read-only questions share a model call; action requests never do"""
+        from tests.unit.test_agent_cache import make_agent
+        from tests.unit.test_agent_tool_loop import ScriptedClient
+
+        monkeypatch.setattr("db.factory.get_data_version", lambda: "v1")
+
+        class SlowClient(ScriptedClient):
+            def create(self, model, messages, tools=None, **kwargs):
+                time.sleep(0.1)
+                return super().create(model, messages, tools, **kwargs)
+
+        agent = make_agent([], None)
+        agent.client = SlowClient(["You have 2 tasks."] * 4)
+        results = run_concurrently(4, lambda: agent.process_request("summarize my tasks"))
+        assert [r["response"] for r in results] == ["You have 2 tasks."] * 4
+        assert len(agent.client.calls) == 1
+
+        agent.client = SlowClient(["Created."] * 3)
+        run_concurrently(3, lambda: agent.process_request("create a task for standup"))
+        assert len(agent.client.calls) == 3
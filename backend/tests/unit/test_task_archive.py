@@ -0,0 +1,64 @@
+"""
+Unit tests for the completed-task archive tier
+"""
+import pytest
+from datetime import datetime, timedelta
+from db.archive import TaskArchive
+from models.task import Task, TaskManager
+
+
+@pytest.fixture
+def archived_manager(temp_db_path, tmp_path):
+    """TaskManager with an archive and a mix of old, recent and open tasks"""
+    now = datetime.now()
+    manager = TaskManager(temp_db_path, archive=TaskArchive(str(tmp_path / "archive")))
+    manager.add_task(Task(task_id="OLD1", title="Old done", status="completed",
+                          created_at=now - timedelta(days=200), completed_at=now - timedelta(days=180)))
+    manager.add_task(Task(task_id="OLD2", title="Older done", status="completed",
+                          created_at=now - timedelta(days=400), completed_at=now - timedelta(days=380)))
+    manager.add_task(Task(task_id="NEW1", title="Recently done", status="completed",
+                          completed_at=now - timedelta(days=2)))
+    manager.add_task(Task(task_id="OPEN1", title="Still open", created_at=now - timedelta(days=300)))
+    return manager
+
+
+class TestTaskArchive:
+    """Test archival policy and lazy history reads"""
+
+    def test_archive_moves_only_old_completed_tasks(self, archived_manager):
+        """Test completed tasks older than the cutoff leave the hot set"""
+        moved = archived_manager.archive_completed(90)
+        assert moved == 2
+        hot_ids = {t.task_id for t in archived_manager.get_all_tasks()}
+        assert hot_ids == {"NEW1", "OPEN1"}
+
+    def test_hot_file_no_longer_contains_archived(self, archived_manager, temp_db_path):
+        """Test the JSON store is rewritten without archived tasks"""
+        archived_manager.archive_completed(90)
+        reloaded = TaskManager(temp_db_path)
+        assert len(reloaded.get_all_tasks()) == 2
+
+    def test_history_is_read_lazily(self, archived_manager, tmp_path):
+        """Test archive partitions are compressed and only read on demand"""
+        archived_manager.archive_completed(90)
+        assert list((tmp_path / "archive").glob("*.jsonl.gz"))
+
+        archive = TaskArchive(str(tmp_path / "archive"))
+        manager = TaskManager(archived_manager.db_path, archive=archive)
+        assert archive._loaded == set()
+        assert manager.get_archived_task("OLD1").title == "Old done"
+        assert len(manager.get_all_tasks(include_archived=True)) == 4
+
+    def test_completed_between_opens_overlapping_partitions(self, archived_manager):
+        """Test window queries only load partitions in range"""
+        archived_manager.archive_completed(90)
+        archive = TaskArchive(str(archived_manager.archive.store.root))
+        recent = archive.completed_between(datetime.now() - timedelta(days=200))
+        assert [t.task_id for t in recent] == ["OLD1"]
+        assert len(archive._loaded) == 1
+
+    def test_archive_disabled_without_store(self, populated_task_manager):
+        """Test archival is a no-op when no archive is configured"""
+        assert populated_task_manager.archive_completed(0) == 0
+        assert populated_task_manager.archive_completed(1) == 0
+        assert len(populated_task_manager.get_all_tasks()) == 3
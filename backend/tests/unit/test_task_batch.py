@@ -0,0 +1,90 @@
+"""
+Unit tests for batch task operations
+"""
+import pytest
+from tools.task_tools import create_tasks_batch, update_tasks_batch, delete_tasks_batch
+
+
+class TestTaskBatch:
+    """Test batch create/update/delete tools"""
+
+    def test_batch_create_single_write(self, task_manager, monkeypatch):
+        """Test valid items are created with one persist and invalid ones reported"""
+        monkeypatch.setattr("tools.task_tools.task_manager", task_manager)
+        saves = []
+        original_save = task_manager._save_tasks
+        monkeypatch.setattr(task_manager, "_save_tasks", lambda: (saves.append(1), original_save()))
+
+        result = create_tasks_batch([
+            {"title": "A", "priority": "high"},
+            {"title": "", "priority": "low"},
+            {"title": "C", "priority": "urgent"},
+            {"title": "D", "deadline": "2 days"},
+        ])
+
+        assert result["status"] == "partial"
+        assert result["applied"] == 2
+        assert [r["status"] for r in result["results"]] == ["success", "error", "error", "success"]
+        assert len(task_manager.get_all_tasks()) == 2
+        assert len(saves) == 1
+
+    def test_batch_create_atomic(self, task_manager, monkeypatch):
+        """Test atomic batches apply nothing when an item is invalid"""
+        monkeypatch.setattr("tools.task_tools.task_manager", task_manager)
+        result = create_tasks_batch([{"title": "A"}, {"title": ""}], atomic=True)
+        assert result["status"] == "error"
+        assert result["results"][0]["status"] == "skipped"
+        assert len(task_manager.get_all_tasks()) == 0
+
+    def test_batch_update(self, populated_task_manager, monkeypatch):
+        """Test batch update with per-item results"""
+        monkeypatch.setattr("tools.task_tools.task_manager", populated_task_manager)
+        result = update_tasks_batch([
+            {"task_id": "TEST001", "status": "completed"},
+            {"task_id": "TEST002", "priority": "low", "title": "Renamed"},
+            {"task_id": "MISSING", "status": "todo"},
+        ])
+        assert result["applied"] == 2
+        assert result["results"][2]["status"] == "error"
+        task = populated_task_manager.get_task("TEST001")
+        assert task.status == "completed"
+        assert task.completed_at is not None
+        assert populated_task_manager.get_task("TEST002").title == "Renamed"
+
+    def test_batch_update_reports_concurrent_delete(self, populated_task_manager, monkeypatch):
+        """Test a task deleted between validation and the write is reported as not found"""
+        monkeypatch.setattr("tools.task_tools.task_manager", populated_task_manager)
+        original = populated_task_manager.update_tasks
+
+        def delete_first(updates):
+            populated_task_manager.delete_task("TEST001")
+            return original(updates)
+
+        monkeypatch.setattr(populated_task_manager, "update_tasks", delete_first)
+        result = update_tasks_batch([{"task_id": "TEST001", "status": "completed"}, {"task_id": "TEST002", "title": "Renamed"}])
+        assert result["status"] == "partial" and result["applied"] == 1
+        assert result["results"][0]["status"] == "error" and "not found" in result["results"][0]["message"]
+        assert result["results"][1]["task"]["title"] == "Renamed"
+
+    def test_batch_delete(self, populated_task_manager, monkeypatch):
+        """Test batch delete"""
+        monkeypatch.setattr("tools.task_tools.task_manager", populated_task_manager)
+        result = delete_tasks_batch(["TEST001", "TEST003", "MISSING"])
+        assert result["applied"] == 2
+        assert result["results"][2]["status"] == "error"
+        assert [t.task_id for t in populated_task_manager.get_all_tasks()] == ["TEST002"]
+
+    def test_batch_endpoint_sends_one_notification(self, task_manager, monkeypatch):
+        """Test POST /api/tasks:batch emits a single aggregated notification"""
+        from fastapi.testclient import TestClient
+        import app as app_module
+
+        monkeypatch.setattr("tools.task_tools.task_manager", task_manager)
+        sent = []
+        monkeypatch.setattr(app_module, "notify_task_batch", lambda event, tasks: sent.append((event, len(tasks))))
+
+        client = TestClient(app_module.app)
+        response = client.post("/api/tasks:batch", json={"tasks": [{"title": f"T{i}"} for i in range(5)]})
+        assert response.status_code == 200
+        assert response.json()["applied"] == 5
+        assert sent == [("created", 5)]
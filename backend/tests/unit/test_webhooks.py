@@ -0,0 +1,184 @@
+"""
+Unit tests for webhook delivery
+"""
+import threading
+import time
+import pytest
+from utils.dispatcher import WebhookDispatcher
+from utils.outbox import Outbox
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.db"), max_attempts=3, base_backoff=0.01, max_backoff=0.05)
+    yield box
+    box.close()
+
+
+class TestWebhookDispatcher:
+    """Test background webhook dispatch"""
+
+    def test_submit_does_not_wait_for_delivery(self, outbox):
+        """Test a slow target does not block the caller"""
+        sent = []
+
+        def slow_send(url, payload):
+            time.sleep(0.2)
+            sent.append(url)
+            return True
+
+        dispatcher = WebhookDispatcher(slow_send, outbox, workers=3)
+        start = time.monotonic()
+        for url in ["slack", "discord", "teams"]:
+            assert dispatcher.submit(url, {"text": "hi"})
+        assert time.monotonic() - start < 0.1
+        assert dispatcher.shutdown(timeout=2)
+        assert sorted(sent) == ["discord", "slack", "teams"]
+        assert dispatcher.stats()["delivered"] == 3
+
+    def test_targets_are_sent_in_parallel(self, outbox):
+        """Test fan-out across workers"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def send(url, payload):
+            with lock:
+                active.append(url)
+                peak.append(len(active))
+            time.sleep(0.1)
+            with lock:
+                active.remove(url)
+            return True
+
+        dispatcher = WebhookDispatcher(send, outbox, workers=3)
+        for url in ["a", "b", "c"]:
+            dispatcher.submit(url, {})
+        dispatcher.shutdown(timeout=2)
+        assert max(peak) == 3
+
+    def test_retry_with_backoff(self, outbox):
+        """Test failed sends are retried until they succeed"""
+        attempts = []
+
+        def flaky(url, payload):
+            attempts.append(url)
+            if len(attempts) < 3:
+                raise ConnectionError("slack down")
+            return True
+
+        dispatcher = WebhookDispatcher(flaky, outbox, workers=1)
+        dispatcher.submit("slack", {})
+        deadline = time.monotonic() + 2
+        while dispatcher.stats()["delivered"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        dispatcher.shutdown(timeout=2)
+        assert len(attempts) == 3
+        assert outbox.stats()["by_state"] == {"delivered": 1}
+
+    def test_dead_letter_after_max_attempts(self, outbox):
+        """Test permanently failing messages are dead-lettered with the last error"""
+        dispatcher = WebhookDispatcher(lambda url, payload: False, outbox, workers=1)
+        dispatcher.submit("slack", {}, target="slack_tasks")
+        deadline = time.monotonic() + 2
+        while not outbox.dead_letters() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        dispatcher.shutdown(timeout=1)
+        dead = outbox.dead_letters()
+        assert len(dead) == 1
+        assert dead[0]["target"] == "slack_tasks"
+        assert dead[0]["attempts"] == 3
+        assert outbox.requeue_dead() == 1
+
+    def test_messages_survive_restart(self, tmp_path):
+        """Test undelivered messages are picked up by the next dispatcher"""
+        path = str(tmp_path / "outbox.db")
+        first = Outbox(path)
+        first.enqueue("slack_tasks", "slack", {"text": "queued before restart"})
+        first.close()
+
+        sent = []
+        dispatcher = WebhookDispatcher(lambda url, payload: sent.append(payload) or True, Outbox(path), workers=1)
+        dispatcher.start()
+        assert dispatcher.drain(timeout=2)
+        dispatcher.shutdown(timeout=1)
+        assert sent == [{"text": "queued before restart"}]
+
+    def test_stats_report_backlog_and_throughput(self, outbox):
+        """Test outbox sizing figures"""
+        outbox.enqueue("slack_tasks", "slack", {})
+        outbox.enqueue("discord", "discord", {})
+        stats = outbox.stats()
+        assert stats["backlog"] == 2
+        assert stats["by_target"]["discord"] == {"pending": 1}
+        ids = [m["id"] for m in outbox.claim_due(10)]
+        outbox.mark_delivered(ids)
+        stats = outbox.stats()
+        assert stats["backlog"] == 0
+        assert stats["delivered_per_minute"] == 2
+
+
+class TestCoalescingAndRateLimits:
+    """Test digest batching and per-target token buckets"""
+
+    def test_events_are_coalesced_into_one_digest(self, outbox):
+        """Test a burst of task events becomes a single message per channel"""
+        from utils.webhooks import build_digest
+        sent = []
+        dispatcher = WebhookDispatcher(
+            lambda url, payload: sent.append((url, payload)) or True, outbox, workers=2,
+            merge=build_digest, coalesce_targets=["slack_tasks"], coalesce_window=0.1, coalesce_max=100,
+        )
+        for i in range(10):
+            dispatcher.submit("slack", {"text": f"[created] Task T{i}"}, target="slack_tasks")
+        time.sleep(0.3)
+        dispatcher.shutdown(timeout=2)
+        assert len(sent) == 1
+        assert sent[0][1]["text"].startswith("10 task events:")
+        assert "T9" in sent[0][1]["text"]
+        assert dispatcher.stats()["coalesced"] == 9
+
+    def test_size_threshold_flushes_before_window(self, outbox):
+        """Test reaching coalesce_max sends without waiting for the window"""
+        from utils.webhooks import build_digest
+        sent = []
+        dispatcher = WebhookDispatcher(
+            lambda url, payload: sent.append(payload) or True, outbox, workers=1,
+            merge=build_digest, coalesce_targets=["discord"], coalesce_window=60, coalesce_max=5,
+        )
+        for i in range(5):
+            dispatcher.submit("discord", {"content": f"event {i}"}, target="discord")
+        deadline = time.monotonic() + 2
+        while not sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        dispatcher.shutdown(timeout=1)
+        assert sent and sent[0]["content"].startswith("5 task events:")
+
+    def test_rate_limited_target_is_deferred_not_failed(self, outbox):
+        """Test a target without tokens is deferred and later delivered"""
+        sent = []
+        dispatcher = WebhookDispatcher(
+            lambda url, payload: sent.append(time.monotonic()) or True, outbox, workers=2,
+            rate_limits={"slack_agent": (10.0, 1)},
+        )
+        for i in range(3):
+            dispatcher.submit("slack", {"text": str(i)}, target="slack_agent")
+        deadline = time.monotonic() + 2
+        while len(sent) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        dispatcher.shutdown(timeout=1)
+        assert len(sent) == 3
+        assert sent[-1] - sent[0] >= 0.15
+        assert dispatcher.stats()["rate_limited"] >= 1
+        assert dispatcher.stats()["failed_attempts"] == 0
+
+    def test_token_bucket(self):
+        """Test burst capacity then refill"""
+        from utils.rate_limit import TokenBucket
+        bucket = TokenBucket(rate=100.0, capacity=2)
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert 0 < bucket.wait_time() <= 0.01
+        time.sleep(0.02)
+        assert bucket.try_acquire()
@@ -5,6 +5,7 @@ from .task_tools import (
     calculate_productivity_metrics,
     get_all_tasks,
     delete_task,
+    archive_completed_tasks,
 )
 
 __all__ = [
@@ -14,5 +15,6 @@ __all__ = [
     "calculate_productivity_metrics",
     "get_all_tasks",
     "delete_task",
+    "archive_completed_tasks",
 ]
 
@@ -3,8 +3,7 @@ import uuid
 from datetime import datetime
 from typing import Optional, Dict
 
-from db.factory import get_task_manager_factory
-from db.firebase import get_hours_repository
+from db.factory import get_task_manager_factory, get_hours_repository_factory
 from models.working_hours import WorkingHours
 
 
@@ -30,9 +29,7 @@ def log_working_hours(
     task = task_manager.get_task(task_id)
     if not task:
         return {"status": "error", "message": f"Task {task_id} not found"}
-    repo = get_hours_repository()
-    if repo is None:
-        return {"status": "error", "message": "Working hours not available (Firebase required)"}
+    repo = get_hours_repository_factory()
     date_val = datetime.now().date()
     if date:
         try:
@@ -74,9 +71,7 @@ def get_working_hours(
     Returns:
         Dict with list of working_hours
     """
-    repo = get_hours_repository()
-    if repo is None:
-        return {"status": "error", "message": "Working hours not available", "entries": []}
+    repo = get_hours_repository_factory()
     from_d = to_d = None
     if from_date:
         try:
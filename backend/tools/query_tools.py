@@ -1,11 +1,14 @@
 from typing import Dict, Optional
-from models.task import TaskManager, Task
-from config import TASKS_DB_PATH, LLM_MODEL
+from config import LLM_MODEL, AGENT_FAST_PATH
+import tools.task_tools as task_tools
 from utils.code_executor import SafeCodeExecutor, extract_execute_block
+from utils.intent_parser import try_fast_path
+from utils.query_code_cache import get_query_code_cache, parameterize, make_key, templatize, fill
 import json
 from datetime import datetime
 
-task_manager = TaskManager(TASKS_DB_PATH)
+# The store the task tools write to (JSON or Firestore), so queries see tasks created after startup
+task_manager = task_tools.task_manager
 executor = SafeCodeExecutor(task_manager)
 
 QUERY_PROMPT_TEMPLATE = """You are a task management assistant. Generate Python code to query and analyze tasks.
@@ -23,10 +26,12 @@ Task Schema:
 - updated_at: datetime
 - completed_at: datetime or None
 
-Available in execution environment:
-- task_manager: TaskManager instance
-- tasks: List[Task] (all tasks)
-- all_tasks: List[Task] (same as tasks)
+Available in execution environment (read-only; tasks cannot be modified):
+- tasks: immutable tuple of all tasks (fields as above; tags is a tuple)
+- all_tasks: same as tasks
+- task_manager: read-only view with get_task(task_id), get_all_tasks(), find_tasks(...)
+- by_status(*statuses), by_priority(priority), by_assignee(name), by_tag(tag): indexed lookups returning tuples (name/tag case-insensitive)
+- due_between(start, end): tasks with a deadline in [start, end), earliest first; either bound may be None
 - datetime, timedelta: for date operations
 - json, re, math, statistics: standard libraries
 
@@ -50,10 +55,9 @@ user_query = user_request.lower()
 
 # Query tasks
 if "high priority" in user_query:
-    filtered = [t for t in tasks if t.priority == "high"]
+    filtered = by_priority("high")
 elif "due this week" in user_query:
-    week_end = datetime.now() + timedelta(days=7)
-    filtered = [t for t in tasks if t.deadline and t.deadline <= week_end]
+    filtered = due_between(None, datetime.now() + timedelta(days=7))
 else:
     filtered = tasks
 
@@ -162,20 +166,51 @@ def execute_query_code(code: str, user_request: Optional[str] = None) -> Dict:
         Dictionary with execution results
     """
     result = executor.execute(code, user_request)
+    answer = result["answer"]
     
     return {
         "status": result["status"],
         "answer": result["answer"],
         "stdout": result["stdout"],
         "error": result["error"],
-        "tasks_found": len(result.get("tasks_after", [])),
+        "tasks_found": len(answer) if isinstance(answer, (list, tuple)) else None,
     }
 
 
+def _known_names() -> set:
+    """Lower-cased assignees and tags currently in the shared store (indexed when the store supports it)."""
+    known_names = getattr(task_manager, "known_names", None)
+    if known_names is not None:
+        return known_names()
+    names = set()
+    for task in task_manager.get_all_tasks():
+        names.add((task.assignee or "").lower())
+        names.update(tag.lower() for tag in task.tags)
+    return names - {""}
+
+
+def _succeeded(result: Dict) -> bool:
+    """Whether executed query code is good enough to cache / serve (no_match is not: it may be a wrong filter)."""
+    return result["error"] is None and result["status"] == "success"
+
+
+def _failed(result: Dict) -> bool:
+    """Whether cached code is broken (as opposed to finding nothing) and should be dropped."""
+    return result["error"] is not None or result["status"] == "error"
+
+
 def query_tasks_with_code(user_request: str, model: str = LLM_MODEL) -> Dict:
     """
     Query tasks using code-as-plan pattern.
     Generates code, executes it, and returns results.
+    Plain filter questions ("tasks assigned to alice in progress") are answered
+    directly from the task store without generating code.
+
+    Generated code is cached by request shape (known names, dates and numbers
+    parameterized), so a repeated question only executes the stored code.
+    Cached code that fails is dropped and regenerated (code that finds
+    nothing is regenerated but kept); if regenerated code fails, an expired
+    entry for the same shape is tried as a fallback.
     
     Args:
         user_request: Natural language query about tasks
@@ -184,12 +219,50 @@ def query_tasks_with_code(user_request: str, model: str = LLM_MODEL) -> Dict:
     Returns:
         Dictionary with query results
     """
+    fast = try_fast_path(user_request, task_manager, "query_tool") if AGENT_FAST_PATH else None
+    if fast is not None:
+        return {
+            "user_request": user_request,
+            "generated_code": None,
+            "fast_path": True,
+            "filters": fast["filters"],
+            "execution_result": {
+                "status": "success",
+                "answer": fast["answer"],
+                "stdout": "",
+                "error": None,
+                "tasks_found": fast["count"],
+            },
+        }
+
+    def response(code: str, result: Dict, source: str) -> Dict:
+        return {"user_request": user_request, "generated_code": code, "code_cache": source, "execution_result": result}
+
+    cache = get_query_code_cache()
+    shape, params = parameterize(user_request, _known_names())
+    key = make_key(shape, model, QUERY_PROMPT_TEMPLATE) if cache is not None else None
+    entry = cache.get(key) if key else None
+    if entry is not None and entry["fresh"]:
+        code = fill(entry["code"], params)
+        result = execute_query_code(code, user_request) if code else None
+        if result is not None and _succeeded(result):
+            return response(code, result, "hit")
+        if result is None or _failed(result):
+            cache.invalidate(key)
+        entry = None  # already tried; not worth retrying as a fallback
+
     code = generate_query_code(user_request, model)
     result = execute_query_code(code, user_request)
-    
-    return {
-        "user_request": user_request,
-        "generated_code": code,
-        "execution_result": result,
-    }
+    if _succeeded(result):
+        template = templatize(extract_execute_block(code), params) if key else None
+        if template is not None:
+            cache.set(key, shape, template)
+        return response(code, result, "miss")
 
+    if entry is not None:
+        stale_code = fill(entry["code"], params)
+        stale_result = execute_query_code(stale_code, user_request) if stale_code else None
+        if stale_result is not None and _succeeded(stale_result):
+            cache.record_stale_fallback()
+            return response(stale_code, stale_result, "stale")
+    return response(code, result, "miss")
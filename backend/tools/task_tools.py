@@ -6,33 +6,10 @@ from db.factory import get_task_manager_factory
 task_manager = get_task_manager_factory()
 
 
-def create_task(
-    title: str,
-    description: str = "",
-    priority: str = "medium",
-    deadline: Optional[str] = None,
-    assignee: str = "me",
-    tags: Optional[List[str]] = None,
-) -> Dict:
-    """
-    Create a new task and add it to the task database.
-    
-    Args:
-        title: The title of the task (required)
-        description: Detailed description of the task
-        priority: Task priority - "high", "medium", or "low" (default: "medium")
-        deadline: Deadline in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS) or relative like "2 days", "1 week"
-        assignee: Person assigned to the task (default: "me")
-        tags: List of tags for categorization
-    
-    Returns:
-        Dictionary with task_id and confirmation message
-    """
-    import uuid
+def _parse_deadline(deadline: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date or a relative deadline like "2 days" / "1 week"."""
     from dateutil import parser
     
-    task_id = f"TASK{uuid.uuid4().hex[:6].upper()}"
-    
     deadline_dt = None
     if deadline:
         try:
@@ -51,17 +28,55 @@ def create_task(
                 deadline_dt = parser.parse(deadline)
         except:
             deadline_dt = None
+    return deadline_dt
+
+
+def _build_task(
+    title: str,
+    description: str = "",
+    priority: str = "medium",
+    deadline: Optional[str] = None,
+    assignee: str = "me",
+    tags: Optional[List[str]] = None,
+) -> Task:
+    import uuid
     
-    task = Task(
-        task_id=task_id,
+    return Task(
+        task_id=f"TASK{uuid.uuid4().hex[:6].upper()}",
         title=title,
         description=description,
         priority=priority.lower(),
-        deadline=deadline_dt,
+        deadline=_parse_deadline(deadline),
         status="todo",
         assignee=assignee,
         tags=tags or [],
     )
+
+
+def create_task(
+    title: str,
+    description: str = "",
+    priority: str = "medium",
+    deadline: Optional[str] = None,
+    assignee: str = "me",
+    tags: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Create a new task and add it to the task database.
+    
+    Args:
+        title: The title of the task (required)
+        description: Detailed description of the task
+        priority: Task priority - "high", "medium", or "low" (default: "medium")
+        deadline: Deadline in ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS) or relative like "2 days", "1 week"
+        assignee: Person assigned to the task (default: "me")
+        tags: List of tags for categorization
+    
+    Returns:
+        Dictionary with task_id and confirmation message
+    """
+    task = _build_task(title, description, priority, deadline, assignee, tags)
+    task_id = task.task_id
     
     task_manager.add_task(task)
     
@@ -142,6 +157,7 @@ def get_all_tasks(
     status: Optional[str] = None,
     assignee: Optional[str] = None,
     tag: Optional[str] = None,
+    include_archived: bool = False,
 ) -> Dict:
     """
     Get all tasks with optional filtering by status, assignee, or tag.
@@ -150,11 +166,12 @@ def get_all_tasks(
         status: Filter by status - "todo", "in_progress", "completed", or None for all
         assignee: Filter by assignee name, or None for all
         tag: Filter by tag, or None for all
+        include_archived: Also search archived (long-completed) tasks (default: False)
     
     Returns:
         Dictionary with filtered list of tasks
     """
-    all_tasks = task_manager.get_all_tasks()
+    all_tasks = task_manager.get_all_tasks(include_archived=include_archived)
     filtered_tasks = all_tasks
     
     if status:
@@ -172,6 +189,7 @@ def get_all_tasks(
             "status": status,
             "assignee": assignee,
             "tag": tag,
+            "include_archived": include_archived,
         },
         "tasks": [task.to_dict() for task in filtered_tasks],
     }
@@ -208,6 +226,128 @@ def delete_task(task_id: str) -> Dict:
         }
 
 
+def _batch_summary(results: List[Dict], applied: int) -> Dict:
+    failed = len(results) - applied
+    return {
+        "status": "success" if failed == 0 else ("error" if applied == 0 else "partial"),
+        "applied": applied,
+        "failed": failed,
+        "results": results,
+    }
+
+
+def create_tasks_batch(items: List[Dict], atomic: bool = False) -> Dict:
+    """
+    Create many tasks in one store transaction (a single write).
+    
+    Args:
+        items: List of task dicts with create_task fields (title, description, priority, deadline, assignee, tags)
+        atomic: If True, create nothing when any item is invalid
+    
+    Returns:
+        Dictionary with per-item results (index, status, task_id or message)
+    """
+    from utils.validators import validate_task_data
+    
+    results = []
+    tasks = []
+    for index, item in enumerate(items):
+        valid, error = validate_task_data(item)
+        if not valid:
+            results.append({"index": index, "status": "error", "message": error})
+            continue
+        task = _build_task(
+            title=item["title"],
+            description=item.get("description", ""),
+            priority=item.get("priority", "medium"),
+            deadline=item.get("deadline"),
+            assignee=item.get("assignee", "me"),
+            tags=item.get("tags"),
+        )
+        tasks.append(task)
+        results.append({"index": index, "status": "success", "task_id": task.task_id, "task": task.to_dict()})
+    
+    if atomic and len(tasks) != len(items):
+        tasks = []
+        results = [r if r["status"] == "error" else {"index": r["index"], "status": "skipped"} for r in results]
+    if tasks:
+        task_manager.add_tasks(tasks)
+    return _batch_summary(results, len(tasks))
+
+
+def update_tasks_batch(items: List[Dict], atomic: bool = False) -> Dict:
+    """
+    Update many tasks in one store transaction (a single write).
+    
+    Args:
+        items: List of dicts with "task_id" plus fields to change (status, title, description, priority, deadline, assignee, tags)
+        atomic: If True, update nothing when any item is invalid or missing
+    
+    Returns:
+        Dictionary with per-item results (index, task_id, status, task or message)
+    """
+    from utils.validators import validate_task_data
+    
+    editable = ["status", "title", "description", "priority", "deadline", "assignee", "tags"]
+    results = []
+    updates = {}
+    for index, item in enumerate(items):
+        task_id = item.get("task_id")
+        task = task_manager.get_task(task_id) if task_id else None
+        if not task:
+            results.append({"index": index, "task_id": task_id, "status": "error", "message": f"Task with ID {task_id} not found"})
+            continue
+        fields = {k: item[k] for k in editable if item.get(k) is not None}
+        valid, error = validate_task_data({"title": task.title, "priority": task.priority, "status": task.status, **fields})
+        if not valid or task_id in updates:
+            results.append({"index": index, "task_id": task_id, "status": "error", "message": error or "Duplicate task_id in batch"})
+            continue
+        if "status" in fields:
+            fields["status"] = fields["status"].lower()
+            if fields["status"] == "completed" and task.status != "completed":
+                fields["completed_at"] = datetime.now()
+        if "priority" in fields:
+            fields["priority"] = fields["priority"].lower()
+        if "deadline" in fields:
+            fields["deadline"] = _parse_deadline(fields["deadline"])
+        updates[task_id] = fields
+        results.append({"index": index, "task_id": task_id, "status": "success"})
+    
+    if atomic and len(updates) != len(items):
+        updates = {}
+        results = [r if r["status"] == "error" else {**r, "status": "skipped"} for r in results]
+    updated = task_manager.update_tasks(updates) if updates else {}
+    for r in results:
+        if r["status"] != "success":
+            continue
+        task = updated.get(r["task_id"])
+        if task is None:
+            # Deleted by another request after the check above
+            r.update(status="error", message=f"Task with ID {r['task_id']} not found")
+        else:
+            r["task"] = task.to_dict()
+    return _batch_summary(results, sum(1 for r in results if r["status"] == "success"))
+
+
+def delete_tasks_batch(task_ids: List[str]) -> Dict:
+    """
+    Delete many tasks in one store transaction (a single write).
+    
+    Args:
+        task_ids: List of task IDs to delete
+    
+    Returns:
+        Dictionary with per-item results (index, task_id, status)
+    """
+    deleted = task_manager.delete_tasks(task_ids) if task_ids else {}
+    results = [
+        {"index": i, "task_id": task_id, "status": "success"} if deleted.get(task_id)
+        else {"index": i, "task_id": task_id, "status": "error", "message": f"Task with ID {task_id} not found"}
+        for i, task_id in enumerate(task_ids)
+    ]
+    return _batch_summary(results, sum(1 for r in results if r["status"] == "success"))
+
+
 def calculate_productivity_metrics(assignee: Optional[str] = None, days: int = 30) -> Dict:
     """
     Calculate productivity metrics including completion rate, tasks by status, and average completion time.
@@ -219,14 +359,17 @@ def calculate_productivity_metrics(assignee: Optional[str] = None, days: int = 3
     Returns:
         Dictionary with productivity metrics
     """
-    all_tasks = task_manager.get_all_tasks()
+    cutoff_date = datetime.now() - timedelta(days=days)
+    
+    # Archived tasks were completed before the archive cutoff; only the
+    # partitions overlapping this window are read.
+    all_tasks = task_manager.get_all_tasks() + task_manager.get_archived_tasks(since=cutoff_date)
     
     if assignee:
         tasks = [t for t in all_tasks if t.assignee.lower() == assignee.lower()]
     else:
         tasks = all_tasks
     
-    cutoff_date = datetime.now() - timedelta(days=days)
     
     recent_tasks = [t for t in tasks if t.created_at >= cutoff_date]
     
@@ -272,3 +415,26 @@ def calculate_productivity_metrics(assignee: Optional[str] = None, days: int = 3
         "average_completion_hours": round(avg_completion_time, 2) if avg_completion_time else None,
     }
 
+
+
+def archive_completed_tasks(older_than_days: Optional[int] = None) -> Dict:
+    """
+    Move completed tasks older than N days into the compressed archive.
+    Archived tasks no longer appear in listings unless include_archived is set.
+    
+    Args:
+        older_than_days: Archive tasks completed more than this many days ago
+            (default: TASK_ARCHIVE_AFTER_DAYS from config)
+    
+    Returns:
+        Dictionary with the number of tasks archived
+    """
+    from config import TASK_ARCHIVE_AFTER_DAYS
+    days = TASK_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    archived = task_manager.archive_completed(days)
+    return {
+        "status": "success",
+        "archived": archived,
+        "older_than_days": days,
+        "message": f"Archived {archived} completed task(s) older than {days} days",
+    }
@@ -4,10 +4,11 @@ from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 from models.task import TaskManager, Task
-from config import TASKS_DB_PATH, CHART_OUTPUT_DIR
+from config import TASKS_DB_PATH, CHART_OUTPUT_DIR, SANDBOX_MODE
 from tools.task_tools import calculate_productivity_metrics
 from utils.chart_reflection import reflect_on_chart
-from utils.code_executor import extract_execute_block
+from utils.code_executor import extract_execute_block, snapshot_source
+from utils.singleflight import singleflight
 import re
 
 task_manager = TaskManager(TASKS_DB_PATH)
@@ -121,6 +122,12 @@ def execute_chart_code(code: str, tasks: Optional[List[Task]] = None) -> Dict:
     Returns:
         Dictionary with execution results
     """
+    if SANDBOX_MODE == "process":
+        from utils.sandbox import get_sandbox_pool
+        result = get_sandbox_pool().run("chart", code, snapshot_source(task_manager, tasks))
+        result.setdefault("message", f"Chart generation failed: {result.get('error')}")
+        return result
+
     if tasks is None:
         tasks = task_manager.get_all_tasks()
     
@@ -151,6 +158,7 @@ def execute_chart_code(code: str, tasks: Optional[List[Task]] = None) -> Dict:
             "error": str(e)
         }
 
+@singleflight("charts")
 def create_productivity_chart(
     instruction: str,
     output_path: Optional[str] = None,
@@ -226,6 +234,7 @@ def create_productivity_chart(
         }
     }
 
+@singleflight("charts")
 def create_task_completion_chart(days: int = 30, output_path: Optional[str] = None) -> Dict:
     """
     Create a chart showing task completion rate over time.
@@ -282,6 +291,7 @@ def create_task_completion_chart(days: int = 30, output_path: Optional[str] = No
         "data_points": len(daily_stats)
     }
 
+@singleflight("charts")
 def create_priority_distribution_chart(output_path: Optional[str] = None) -> Dict:
     """
     Create a chart showing task distribution by priority.
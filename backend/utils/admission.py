@@ -0,0 +1,239 @@
+"""
+Admission control for slow LLM work.
+
+Agent requests run on a dedicated, bounded thread pool instead of the server's
+shared worker threads, so a slow or failing model provider cannot starve the
+fast CRUD endpoints:
+
+- At most `workers` calls run and `max_queue` wait; beyond that callers are
+  rejected immediately (429) instead of piling up.
+- Each call has a deadline; the caller gets 504 when it passes (the worker
+  keeps its slot until the provider call actually returns).
+- A circuit breaker opens when the recent error rate is high and rejects
+  calls (503) until a cooldown has passed, then lets one probe through.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import (
+    LLM_WORKERS,
+    LLM_MAX_QUEUE,
+    LLM_CALL_TIMEOUT,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_WINDOW,
+    LLM_BREAKER_COOLDOWN,
+)
+
+
+class AdmissionRejected(Exception):
+    """The call was not admitted; `status` is the HTTP status to return (429 or 503)."""
+
+    def __init__(self, status: int, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """The call did not finish within its deadline."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open when, over the last `window` seconds, at least `min_calls`
+    finished and the failure rate is >= `error_rate`. After `cooldown` seconds
+    it is half-open: one probe is admitted; success closes it, failure re-opens it.
+    """
+
+    def __init__(self, error_rate: float = 0.5, min_calls: int = 10, window: float = 60.0, cooldown: float = 30.0):
+        self.error_rate = error_rate
+        self.min_calls = max(1, min_calls)
+        self.window = window
+        self.cooldown = cooldown
+        self._outcomes: deque = deque()  # (timestamp, ok)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counters = {"opened": 0, "short_circuited": 0}
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                self.counters["short_circuited"] += 1
+                return False
+            self._probing = True  # half-open: admit a single probe
+            return True
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record(self, ok: bool):
+        now = time.monotonic()
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                if ok:
+                    self._state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = now
+                    self.counters["opened"] += 1
+                return
+            self._outcomes.append((now, ok))
+            self._trim(now)
+            failures = sum(1 for _, success in self._outcomes if not success)
+            if (
+                self._state == "closed"
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.error_rate
+            ):
+                self._state = "open"
+                self._opened_at = now
+                self.counters["opened"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": state,
+                "recent_calls": total,
+                "recent_error_rate": round(failures / total, 3) if total else 0.0,
+                **self.counters,
+            }
+
+
+class LLMExecutor:
+    """Bounded executor for LLM calls with queue limit, deadlines and a circuit breaker."""
+
+    def __init__(
+        self,
+        workers: int = LLM_WORKERS,
+        max_queue: int = LLM_MAX_QUEUE,
+        timeout: float = LLM_CALL_TIMEOUT,
+        breaker: Optional[CircuitBreaker] = None,
+        is_failure: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._is_failure = is_failure or (lambda result: False)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._admitted = 0  # running + queued (+ streams holding a slot)
+        self.counters = {"admitted": 0, "completed": 0, "failed": 0, "rejected_queue": 0, "rejected_circuit": 0, "timeouts": 0, "abandoned": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _admit(self):
+        with self._lock:
+            if self._admitted >= self.workers + self.max_queue:
+                self.counters["rejected_queue"] += 1
+                raise AdmissionRejected(429, "Too many concurrent agent requests", 1.0)
+            self._admitted += 1
+        if not self.breaker.allow():
+            self._release()
+            self._count("rejected_circuit")
+            raise AdmissionRejected(503, "LLM provider unavailable (circuit open)", self.breaker.retry_after() or 1.0)
+        self._count("admitted")
+
+    def _release(self):
+        with self._lock:
+            self._admitted -= 1
+
+    def _finish(self, ok: bool):
+        self._count("completed" if ok else "failed")
+        self.breaker.record(ok)
+        self._release()
+
+    def _call(self, fn: Callable, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self._finish(False)
+            raise
+        self._finish(not self._is_failure(result))
+        return result
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run fn in the LLM pool. Raises AdmissionRejected or DeadlineExceeded."""
+        self._admit()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, self._call, fn, args, kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise DeadlineExceeded(f"LLM call exceeded {timeout or self.timeout:.0f}s deadline")
+
+    def acquire(self):
+        """Take an admission slot for work driven elsewhere (e.g. a stream); pair with release()."""
+        self._admit()
+
+    def release(self, ok: bool = True):
+        """Give back a slot from acquire(); `ok` feeds the circuit breaker."""
+        self._finish(ok)
+
+    def abandon(self):
+        """Give back a slot from acquire() whose work never started (not counted by the breaker)."""
+        self._count("abandoned")
+        self._release()
+
+    async def run_step(self, fn: Callable, *args) -> Any:
+        """Run one short step (e.g. next() on a stream) on the LLM pool without admission."""
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            admitted = self._admitted
+        return {
+            **counters,
+            "in_progress": admitted,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+            "breaker": self.breaker.stats(),
+        }
+
+
+_executor: Optional[LLMExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> LLMExecutor:
+    """Process-wide executor for agent/LLM work."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = LLMExecutor(
+                breaker=CircuitBreaker(LLM_BREAKER_ERROR_RATE, LLM_BREAKER_MIN_CALLS, LLM_BREAKER_WINDOW, LLM_BREAKER_COOLDOWN),
+                is_failure=lambda result: isinstance(result, dict) and "error" in result,
+            )
+    return _executor
@@ -1,11 +1,32 @@
 import re
 import io
-import sys
+import json
+import builtins
+import math
+import statistics
 import traceback
-from typing import Dict, Any, Optional
-from datetime import datetime
-from models.task import TaskManager, Task
-from config import TASKS_DB_PATH
+import threading
+import hashlib
+from collections import Counter, OrderedDict, defaultdict
+from types import CodeType, MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta
+from models.task import TaskManager, TaskSnapshot
+from config import TASKS_DB_PATH, SANDBOX_MODE
+
+COMPILE_CACHE_SIZE = 256
+
+# Names every execution starts with; copied per call (a plain dict copy, no imports)
+BASE_GLOBALS = MappingProxyType({
+    'datetime': datetime,
+    'timedelta': timedelta,
+    'json': json,
+    're': re,
+    'math': math,
+    'statistics': statistics,
+    'Counter': Counter,
+    'defaultdict': defaultdict,
+})
 
 def extract_execute_block(text: str) -> str:
     """
@@ -21,50 +42,118 @@ def extract_execute_block(text: str) -> str:
     return text.strip()
 
 
+# sha256(content) -> (source, code object); bounded LRU shared by all executors
+_compiled: "OrderedDict[str, Tuple[str, CodeType]]" = OrderedDict()
+_compiled_lock = threading.Lock()
+compile_stats = {"hits": 0, "misses": 0}
+
+
+def compile_block(code_or_content: str) -> Tuple[str, CodeType]:
+    """
+    (source, code object) for code or <execute_python> content, cached by a
+    hash of the content. Raises ValueError / SyntaxError like extract + compile.
+    """
+    key = hashlib.sha256(code_or_content.encode("utf-8")).hexdigest() if code_or_content else ""
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        if entry is not None:
+            _compiled.move_to_end(key)
+            compile_stats["hits"] += 1
+            return entry
+    code = extract_execute_block(code_or_content)
+    entry = (code, compile(code, "<generated>", "exec"))
+    with _compiled_lock:
+        compile_stats["misses"] += 1
+        _compiled[key] = entry
+        while len(_compiled) > COMPILE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return entry
+
+
+def capturing_print(buffer: io.StringIO):
+    """
+    A `print` for the sandbox namespace that writes to `buffer` by default.
+    Output is captured per execution without swapping the process-wide
+    sys.stdout, so concurrent executions and server logging do not mix.
+    """
+    def sandbox_print(*args, sep=" ", end="\n", file=None, flush=False):
+        builtins.print(*args, sep=sep, end=end, file=buffer if file is None else file, flush=flush)
+    return sandbox_print
+
+
+def snapshot_source(task_manager, tasks=None) -> Tuple[Any, Any]:
+    """
+    (key, loader) describing the task data for a sandbox run. For a store
+    with snapshots the key is taken from the current snapshot (store version
+    plus the task list's identity and size, which also catches writes that
+    bypassed the store's save) and the loader sends exactly that snapshot.
+    The key is None (always reload) for explicit task lists and stores
+    without versions.
+    """
+    if tasks is not None:
+        return None, lambda: [t.to_dict() for t in tasks]
+    if hasattr(task_manager, "snapshot"):
+        current = task_manager.snapshot()
+        key = (id(task_manager), current.version, id(getattr(task_manager, "tasks", None)), len(current))
+        return key, lambda: [t.to_dict() for t in current]
+    version = getattr(task_manager, "version", None)
+    key = (id(task_manager), version) if version is not None else None
+    return key, lambda: [t.to_dict() for t in task_manager.get_all_tasks()]
+
+
+def snapshot_namespace(snapshot: TaskSnapshot) -> Dict[str, Any]:
+    """
+    Local names for generated code: the read-only snapshot as `tasks` /
+    `all_tasks` / `task_manager`, plus its index-backed lookups.
+    """
+    return {
+        'task_manager': snapshot,
+        'tasks': snapshot,
+        'all_tasks': snapshot,
+        'by_status': snapshot.by_status,
+        'by_priority': snapshot.by_priority,
+        'by_assignee': snapshot.by_assignee,
+        'by_tag': snapshot.by_tag,
+        'due_between': snapshot.due_between,
+    }
+
+
 class SafeCodeExecutor:
     """
     Safe code executor for running generated Python code in a controlled environment.
     Provides access to TaskManager and task data while preventing dangerous operations.
+    With SANDBOX_MODE=process (or an explicit `sandbox` pool) the code runs in a
+    limited worker process against a read-only snapshot of the tasks.
     """
     
-    def __init__(self, task_manager: Optional[TaskManager] = None):
+    def __init__(self, task_manager: Optional[TaskManager] = None, sandbox=None):
         self.task_manager = task_manager or TaskManager(TASKS_DB_PATH)
+        self.sandbox = sandbox
         self.allowed_modules = {
             'datetime', 'json', 're', 'math', 'statistics', 'collections'
         }
     
+    def _sandbox_pool(self):
+        if self.sandbox is not None:
+            return self.sandbox
+        if SANDBOX_MODE == "process":
+            from utils.sandbox import get_sandbox_pool
+            return get_sandbox_pool()
+        return None
+    
     def _create_safe_globals(self, user_request: Optional[str] = None) -> Dict[str, Any]:
         """Create safe global namespace for code execution"""
-        from datetime import datetime, timedelta
-        import json
-        import re
-        import math
-        import statistics
-        from collections import Counter, defaultdict
-        
-        return {
-            'datetime': datetime,
-            'timedelta': timedelta,
-            'json': json,
-            're': re,
-            'math': math,
-            'statistics': statistics,
-            'Counter': Counter,
-            'defaultdict': defaultdict,
-            'user_request': user_request or '',
-            'TaskManager': TaskManager,
-            'Task': Task,
-        }
+        safe_globals = dict(BASE_GLOBALS)
+        safe_globals['user_request'] = user_request or ''
+        return safe_globals
     
     def _create_safe_locals(self) -> Dict[str, Any]:
-        """Create safe local namespace with task data"""
-        all_tasks = self.task_manager.get_all_tasks()
-        
-        return {
-            'task_manager': self.task_manager,
-            'tasks': all_tasks,
-            'all_tasks': all_tasks,
-        }
+        """Create safe local namespace with a read-only snapshot of the tasks"""
+        if hasattr(self.task_manager, "snapshot"):
+            snapshot = self.task_manager.snapshot()
+        else:
+            snapshot = TaskSnapshot(self.task_manager.get_all_tasks(), getattr(self.task_manager, "version", None))
+        return snapshot_namespace(snapshot)
     
     def execute(
         self,
@@ -81,22 +170,31 @@ class SafeCodeExecutor:
         Returns:
             Dictionary with execution results, stdout, errors, and extracted answers
         """
-        code = extract_execute_block(code_or_content)
+        pool = self._sandbox_pool()
+        if pool is not None:
+            result = pool.run("query", code_or_content, snapshot_source(self.task_manager), user_request)
+            if "code" not in result:
+                result["code"] = extract_execute_block(code_or_content)
+            return {"stdout": "", "error": None, "answer": None, "status": "unknown", **result}
+
+        compile_error = None
+        try:
+            code, compiled = compile_block(code_or_content)
+        except SyntaxError:
+            code, compiled = extract_execute_block(code_or_content), None
+            compile_error = traceback.format_exc()
         
+        stdout_buf = io.StringIO()
         safe_globals = self._create_safe_globals(user_request)
+        safe_globals['print'] = capturing_print(stdout_buf)
         safe_locals = self._create_safe_locals()
         
-        stdout_buf = io.StringIO()
-        old_stdout = sys.stdout
-        sys.stdout = stdout_buf
-        
-        error_text = None
+        error_text = compile_error
         try:
-            exec(code, safe_globals, safe_locals)
+            if compiled is not None:
+                exec(compiled, safe_globals, safe_locals)
         except Exception as e:
             error_text = traceback.format_exc()
-        finally:
-            sys.stdout = old_stdout
         
         printed = stdout_buf.getvalue().strip()
         
@@ -115,6 +213,5 @@ class SafeCodeExecutor:
             "error": error_text,
             "answer": answer,
             "status": status,
-            "tasks_after": self.task_manager.get_all_tasks(),
         }
 
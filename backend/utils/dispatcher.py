@@ -0,0 +1,230 @@
+"""
+Background webhook dispatcher: messages are persisted to the outbox and
+delivered by worker threads, so request handlers never wait on
+Slack/Discord/Teams and no message is lost while a provider is down.
+"""
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, List, Iterable, Tuple
+
+from config import (
+    OUTBOX_DB_PATH,
+    WEBHOOK_WORKERS,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_RETRY_BACKOFF,
+    WEBHOOK_RETRY_MAX_BACKOFF,
+    WEBHOOK_DRAIN_TIMEOUT,
+    WEBHOOK_COALESCE_TARGETS,
+    WEBHOOK_COALESCE_WINDOW,
+    WEBHOOK_COALESCE_MAX_EVENTS,
+    WEBHOOK_RATE_LIMITS,
+)
+from utils.outbox import Outbox
+from utils.rate_limit import TokenBucket
+
+
+class WebhookDispatcher:
+    """
+    Drains the outbox on a pool of worker threads.
+
+    - submit() writes the message to the outbox and wakes the poller; it never blocks on the network.
+    - The poller claims due messages and hands them to the pool, so one event
+      fans out to all of its targets in parallel.
+    - Messages for a target in `coalesce_targets` are held for `coalesce_window`
+      seconds (or until `coalesce_max` are pending) and delivered as a single
+      digest built by `merge(payloads)`.
+    - Each target may have a token bucket ({target: (rate_per_s, burst)}); a
+      delivery without a token is deferred, not counted as a failed attempt.
+    - `send(url, payload)` returns True on success; False or an exception
+      schedules a retry with exponential backoff (persisted in the outbox),
+      and messages that exhaust their attempts are dead-lettered.
+    - shutdown() stops intake and drains what is due, up to a timeout; anything
+      left stays in the outbox for the next start.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], bool],
+        outbox: Outbox,
+        workers: int = WEBHOOK_WORKERS,
+        merge: Optional[Callable[[List[Dict[str, Any]]], Dict[str, Any]]] = None,
+        coalesce_targets: Iterable[str] = (),
+        coalesce_window: float = 0.0,
+        coalesce_max: int = 1,
+        rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self._send = send
+        self._merge = merge
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.coalesce_targets = frozenset(coalesce_targets) if merge else frozenset()
+        self.coalesce_window = coalesce_window
+        self.coalesce_max = max(1, coalesce_max)
+        self._buckets = {
+            target: TokenBucket(rate, burst)
+            for target, (rate, burst) in (rate_limits or {}).items() if rate > 0
+        }
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._poller: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._accepting = True
+        self.counters = {
+            "submitted": 0, "delivered": 0, "failed_attempts": 0, "rejected": 0,
+            "sends": 0, "coalesced": 0, "rate_limited": 0,
+        }
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] += n
+
+    def start(self):
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._accepting = True
+            self._stopping.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="webhook")
+            self._poller = threading.Thread(target=self._poll, name="webhook-poller", daemon=True)
+            self._poller.start()
+
+    def submit(self, url: str, payload: Dict[str, Any], target: str = "webhook") -> bool:
+        """Persist a message for delivery. Returns False if the dispatcher is shut down."""
+        if not self._accepting:
+            self._count("rejected")
+            return False
+        if target in self.coalesce_targets:
+            self.outbox.enqueue(target, url, payload, delay=self.coalesce_window)
+            if self.outbox.pending_count(target) >= self.coalesce_max:
+                self.outbox.expedite(target)
+        else:
+            self.outbox.enqueue(target, url, payload)
+        self._count("submitted")
+        if self._poller is None:
+            self.start()
+        self._wake.set()
+        return True
+
+    def _poll(self):
+        pool = self._pool
+        last_prune = time.monotonic()
+        while not self._stopping.is_set():
+            # Reserve free worker slots before claiming, so drain() never sees a
+            # claimed message that is not yet counted as in flight.
+            with self._lock:
+                free = self.workers - self._inflight
+                self._inflight += free
+            try:
+                groups = self.outbox.claim_due_groups(free, self.coalesce_max, self.coalesce_targets) if free else []
+            except Exception:
+                groups = []
+            ready = []
+            for group in groups:
+                bucket = self._buckets.get(group["target"])
+                if bucket is not None and not bucket.try_acquire():
+                    self.outbox.defer(group["ids"], bucket.wait_time())
+                    self._count("rate_limited")
+                else:
+                    ready.append(group)
+            with self._lock:
+                self._inflight -= free - len(ready)
+            for group in ready:
+                pool.submit(self._deliver, group)
+            if ready:
+                continue
+            if time.monotonic() - last_prune > 3600:
+                self.outbox.prune()
+                last_prune = time.monotonic()
+            due_in = self.outbox.next_due_in()
+            self._wake.wait(timeout=1.0 if due_in is None else min(1.0, due_in))
+            self._wake.clear()
+
+    def _deliver(self, group: Dict[str, Any]):
+        try:
+            payloads = group["payloads"]
+            ok, error = False, "delivery failed"
+            try:
+                payload = self._merge(payloads) if len(payloads) > 1 else payloads[0]
+                self._count("sends")
+                ok = bool(self._send(group["url"], payload))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if ok:
+                self.outbox.mark_delivered(group["ids"])
+                self._count("delivered", len(group["ids"]))
+                self._count("coalesced", len(group["ids"]) - 1)
+            else:
+                self.outbox.mark_failed(group["ids"], error)
+                self._count("failed_attempts", len(group["ids"]))
+        finally:
+            with self._lock:
+                self._inflight -= 1
+            self._wake.set()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is due or in flight. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                inflight = self._inflight
+            due_in = self.outbox.next_due_in()
+            if inflight == 0 and (due_in is None or due_in > 0):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._wake.set()
+            time.sleep(0.01)
+
+    def shutdown(self, timeout: float = WEBHOOK_DRAIN_TIMEOUT) -> bool:
+        """Stop accepting messages, drain (up to timeout) and stop the workers."""
+        self._accepting = False
+        for target in self.coalesce_targets:
+            self.outbox.expedite(target)  # don't hold digests past shutdown
+        drained = self.drain(timeout) if self._poller is not None else True
+        self._stopping.set()
+        self._wake.set()
+        with self._lock:
+            poller, self._poller = self._poller, None
+            pool, self._pool = self._pool, None
+        if poller is not None:
+            poller.join(timeout=2)
+        if pool is not None:
+            pool.shutdown(wait=True)
+        return drained
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            inflight = self._inflight
+        return {**counters, "inflight": inflight, "workers": self.workers, "outbox": self.outbox.stats()}
+
+
+_dispatcher: Optional[WebhookDispatcher] = None
+
+
+def get_dispatcher() -> WebhookDispatcher:
+    """Process-wide dispatcher backed by the outbox at OUTBOX_DB_PATH (started lazily)."""
+    global _dispatcher
+    if _dispatcher is None:
+        from utils.webhooks import _deliver, build_digest
+        outbox = Outbox(
+            OUTBOX_DB_PATH,
+            max_attempts=WEBHOOK_MAX_RETRIES + 1,
+            base_backoff=WEBHOOK_RETRY_BACKOFF,
+            max_backoff=WEBHOOK_RETRY_MAX_BACKOFF,
+        )
+        _dispatcher = WebhookDispatcher(
+            _deliver,
+            outbox,
+            merge=build_digest,
+            coalesce_targets=WEBHOOK_COALESCE_TARGETS,
+            coalesce_window=WEBHOOK_COALESCE_WINDOW,
+            coalesce_max=WEBHOOK_COALESCE_MAX_EVENTS,
+            rate_limits=WEBHOOK_RATE_LIMITS,
+        )
+        atexit.register(_dispatcher.shutdown)
+    return _dispatcher
@@ -3,16 +3,34 @@ Gemini Adapter - LLM client for Task Management Agent (replaces Llama/Ollama).
 Uses Google Gemini API; same interface as orchestrator expects.
 """
 import os
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from config import GEMINI_API_KEY, GEMINI_MODEL, LLM_CALL_TIMEOUT
+from agent.tool_calls import TOOL_CALL_INSTRUCTIONS, render_conversation, tool_signature
+
+GENERATION_CONFIG = {"temperature": 0.2, "max_output_tokens": 2048}
+
+
+@lru_cache(maxsize=32)
+def _tool_manifest(tools: Tuple) -> str:
+    """Tool description block for the prompt; the agent passes the same tools every call."""
+    lines = []
+    for tool in tools:
+        doc = getattr(tool, "__doc__", "") or "No description"
+        lines.append(f"- {tool_signature(tool)}: {doc.strip().split(chr(10))[0]}")
+    return "\n".join(lines)
 
 
 class GeminiResponse:
-    """Response object compatible with orchestrator (choices[0].message.content)."""
-    def __init__(self, content: str, tool_calls: Optional[List] = None):
+    """Response object compatible with orchestrator (choices[0].message.content).
+    `error` is set when the content is an error message rather than a model reply."""
+    def __init__(self, content: str, tool_calls: Optional[List] = None, error: Optional[str] = None):
         self.choices = [GeminiChoice(content, tool_calls or [])]
         self.model = GEMINI_MODEL
+        self.error = error
 
 
 class GeminiChoice:
@@ -32,11 +50,17 @@ class GeminiMessage:
 class GeminiClient:
     """
     Gemini client that mimics the chat.completions interface used by the orchestrator.
+    GenerativeModel handles (and the transport each one opens lazily) are cached per
+    model name and reused across requests.
     """
     def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
         self.api_key = api_key or GEMINI_API_KEY
         self.model = model or GEMINI_MODEL
         self._client = None
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._chat = GeminiChatCompletion(self)
+        self.timings = {"calls": 0, "prep_ms_total": 0.0, "last_prep_ms": 0.0}
         if self.api_key:
             self._init_client()
 
@@ -48,19 +72,44 @@ class GeminiClient:
         except ImportError:
             self._client = None
 
+    def get_model(self, name: Optional[str] = None):
+        """Cached GenerativeModel for `name` (defaults to the configured model)."""
+        name = name or self.model
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._client.GenerativeModel(name)
+                    self._models[name] = model
+        return model
+
     def _convert_tools_to_prompt(self, tools: List) -> str:
         """Convert tools list to prompt text for Gemini (tool descriptions)."""
-        lines = []
-        for tool in tools:
-            name = getattr(tool, "__name__", str(tool))
-            doc = getattr(tool, "__doc__", "") or "No description"
-            lines.append(f"- {name}: {doc.strip().split(chr(10))[0]}")
-        return "\n".join(lines)
+        return _tool_manifest(tuple(tools))
+
+    def _record_prep(self, started: float):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.timings["calls"] += 1
+            self.timings["prep_ms_total"] += elapsed
+            self.timings["last_prep_ms"] = elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """Client-side overhead before the network request (prompt + model handle)."""
+        with self._lock:
+            calls = self.timings["calls"]
+            return {
+                "calls": calls,
+                "avg_prep_ms": round(self.timings["prep_ms_total"] / calls, 4) if calls else 0.0,
+                "last_prep_ms": round(self.timings["last_prep_ms"], 4),
+                "cached_models": len(self._models),
+            }
 
     @property
     def chat(self):
         """Orchestrator uses client.chat.completions.create (no parens)."""
-        return GeminiChatCompletion(self)
+        return self._chat
 
 
 class GeminiChatCompletion:
@@ -72,6 +121,30 @@ class GeminiChatCompletion:
         """Orchestrator calls client.chat.completions.create(...)"""
         return self
 
+    def _build_prompt(self, messages: List[Dict[str, str]], tools: Optional[List]) -> str:
+        system_content = ""
+        user_content = ""
+        for msg in messages:
+            role = msg.get("role", "")
+            content = msg.get("content", "")
+            if role == "system":
+                system_content = content
+            elif role == "user":
+                user_content = content
+        if any(msg.get("role") in ("assistant", "tool") for msg in messages):
+            # Later turns of the tool-calling loop: send the whole exchange so far
+            prompt = render_conversation(messages)
+            if system_content:
+                prompt = f"{system_content}\n\n{prompt}"
+        else:
+            prompt = user_content
+            if system_content:
+                prompt = f"{system_content}\n\nUser request: {user_content}"
+        if tools:
+            tool_desc = self.client._convert_tools_to_prompt(tools)
+            prompt += f"\n\nAvailable tools (use these to fulfill the request):\n{tool_desc}\n\n{TOOL_CALL_INSTRUCTIONS}"
+        return prompt
+
     def create(
         self,
         model: str,
@@ -83,31 +156,43 @@ class GeminiChatCompletion:
         """Single-turn completion with optional tool descriptions in prompt."""
         if not self.client._client:
             return GeminiResponse(
-                "Error: Gemini not configured. Set GEMINI_API_KEY in .env."
+                "Error: Gemini not configured. Set GEMINI_API_KEY in .env.",
+                error="Gemini not configured",
             )
-        system_content = ""
-        user_content = ""
-        for msg in messages:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "system":
-                system_content = content
-            elif role == "user":
-                user_content = content
-        prompt = user_content
-        if system_content:
-            prompt = f"{system_content}\n\nUser request: {user_content}"
-        if tools:
-            tool_desc = self.client._convert_tools_to_prompt(tools)
-            prompt += f"\n\nAvailable tools (use these to fulfill the request):\n{tool_desc}"
+        started = time.perf_counter()
+        prompt = self._build_prompt(messages, tools)
         try:
-            genai = self.client._client
-            gemini_model = genai.GenerativeModel(self.client.model)
+            gemini_model = self.client.get_model()
+            self.client._record_prep(started)
             response = gemini_model.generate_content(
-                prompt,
-                generation_config={"temperature": 0.2, "max_output_tokens": 2048},
+                prompt, generation_config=GENERATION_CONFIG, request_options={"timeout": LLM_CALL_TIMEOUT}
             )
             text = response.text if response.text else "No response generated."
             return GeminiResponse(text)
         except Exception as e:
-            return GeminiResponse(f"Error from Gemini: {str(e)}")
+            return GeminiResponse(f"Error from Gemini: {str(e)}", error=str(e))
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        tools: Optional[List] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Like create(), but yields text chunks as Gemini generates them. Raises on API errors."""
+        if not self.client._client:
+            raise RuntimeError("Gemini not configured. Set GEMINI_API_KEY in .env.")
+        started = time.perf_counter()
+        prompt = self._build_prompt(messages, tools)
+        gemini_model = self.client.get_model()
+        self.client._record_prep(started)
+        chunks = gemini_model.generate_content(
+            prompt, generation_config=GENERATION_CONFIG, stream=True, request_options={"timeout": LLM_CALL_TIMEOUT}
+        )
+        for chunk in chunks:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # chunk without text parts (e.g. a safety/finish marker)
+            if text:
+                yield text
@@ -0,0 +1,160 @@
+"""
+Shared outbound HTTP client with per-host keep-alive connection pools.
+
+Webhooks (and any other outbound integration) reuse open HTTP/1.1 connections
+instead of paying a TCP+TLS handshake per message. The client is thread-safe:
+each host keeps a small stack of idle connections and a worker checks one out
+for the duration of a request, so concurrent fan-out to Slack/Discord/Teams
+never shares a socket.
+"""
+import http.client
+import json
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple, List
+from urllib.parse import urlsplit
+
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_MAX_PER_HOST, HTTP_POOL_IDLE_TIMEOUT
+
+# Errors that mean a reused keep-alive connection was closed by the server.
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class HTTPStatusError(Exception):
+    """Raised for 4xx/5xx responses."""
+
+    def __init__(self, status: int, reason: str, body: bytes = b""):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+class HTTPClientPool:
+    """Keep-alive connection pools keyed by (scheme, host, port)."""
+
+    def __init__(
+        self,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        max_per_host: int = HTTP_POOL_MAX_PER_HOST,
+        idle_timeout: float = HTTP_POOL_IDLE_TIMEOUT,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_per_host = max(1, max_per_host)
+        self.idle_timeout = idle_timeout
+        self._ssl_context = ssl.create_default_context()
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "connections_opened": 0, "connections_reused": 0, "stale_retries": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _connect(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=self.connect_timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.sock.settimeout(self.read_timeout)
+        self._count("connections_opened")
+        return conn
+
+    def _checkout(self, key: Tuple[str, str, int]) -> Optional[http.client.HTTPConnection]:
+        now = time.monotonic()
+        with self._lock:
+            stack = self._idle.get(key, [])
+            while stack:
+                conn, idle_since = stack.pop()
+                if now - idle_since < self.idle_timeout:
+                    self.counters["connections_reused"] += 1
+                    return conn
+                conn.close()
+        return None
+
+    def _checkin(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection):
+        with self._lock:
+            stack = self._idle.setdefault(key, [])
+            if len(stack) < self.max_per_host:
+                stack.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(
+        self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        """Send a request on a pooled connection. Returns (status, body); raises HTTPStatusError for >= 400."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname or "", port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        self._count("requests")
+
+        conn = self._checkout(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect(*key)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except _STALE_ERRORS:
+                conn.close()
+                conn = None
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                reused = False
+                self._count("stale_retries")
+            except Exception:
+                conn.close()
+                raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        if response.status >= 400:
+            raise HTTPStatusError(response.status, response.reason, data)
+        return response.status, data
+
+    def post_json(self, url: str, payload: Dict[str, Any]) -> Tuple[int, bytes]:
+        return self.request(
+            "POST", url, body=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "idle": sum(len(s) for s in self._idle.values())}
+
+    def close(self):
+        with self._lock:
+            stacks, self._idle = self._idle, {}
+        for stack in stacks.values():
+            for conn, _ in stack:
+                conn.close()
+
+
+_pool: Optional[HTTPClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide client shared by all outbound integrations."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HTTPClientPool()
+    return _pool
@@ -0,0 +1,305 @@
+"""
+Deterministic fast path for common task queries.
+
+Phrasings such as "high priority tasks due this week" or "tasks assigned to
+alice in progress" map directly onto store filters (status, priority,
+assignee, tag, deadline window). `parse_task_query` recognises them with a
+small phrase grammar and `answer_task_query` answers from the TaskManager
+indexes, so no model call is needed.
+
+The grammar is deliberately strict: every word must be either a recognised
+filter phrase or a filler word ("show", "me", "all", ...). Anything else
+("create", "email", "productivity", a task title) makes the parse fail and
+the request goes to the LLM as before.
+"""
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+OPEN_STATUSES = ["todo", "in_progress"]
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+MAX_LISTED = 20  # tasks listed in the answer text (all are returned in `tasks`)
+
+_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "fourteen": 14, "thirty": 30,
+}
+
+# Words that carry no filter meaning in a listing query
+_FILLER = {
+    "show", "list", "display", "get", "find", "give", "fetch", "see", "view", "tell",
+    "me", "all", "the", "what", "which", "are", "is", "there", "any", "of", "with",
+    "that", "please", "currently", "current", "for", "a", "an", "i", "do", "have", "we",
+    "due", "and", "in", "on", "by", "to", "need", "still", "right", "now", "can",
+    "you", "let", "about", "has", "been", "got", "every", "status", "priority",
+    "at", "whose", "deadline", "deadlines", "up", "just", "only", "set", "marked",
+}
+
+# Words that look like a name after "for" / "'s" but are not assignees
+_NOT_NAMES = _FILLER | {"this", "next", "today", "tomorrow", "it", "that", "who", "where", "here", "let"}
+
+_NAME = r"([a-z][\w.@-]*)"
+
+
+def _day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _window(kind: str, now: datetime, count: int = 0) -> Dict[str, Any]:
+    today = _day_start(now)
+    if kind == "today":
+        return {"due_from": today, "due_to": today + timedelta(days=1), "window": "due today"}
+    if kind == "tomorrow":
+        start = today + timedelta(days=1)
+        return {"due_from": start, "due_to": start + timedelta(days=1), "window": "due tomorrow"}
+    if kind == "this week":
+        start = today - timedelta(days=today.weekday())
+        return {"due_from": start, "due_to": start + timedelta(days=7), "window": "due this week"}
+    if kind == "next week":
+        start = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        return {"due_from": start, "due_to": start + timedelta(days=7), "window": "due next week"}
+    if kind == "this month":
+        start = today.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return {"due_from": start, "due_to": end, "window": "due this month"}
+    if kind == "overdue":
+        return {"due_to": now, "overdue": True, "window": "overdue"}
+    # "in the next N days/weeks"
+    days = count * (7 if kind == "weeks" else 1)
+    unit = "day" if days == 1 else "days"
+    return {"due_from": now, "due_to": now + timedelta(days=days), "window": f"due in the next {days} {unit}"}
+
+
+class _Parse:
+    """Accumulates filters; a second, different value for the same field is a conflict."""
+
+    def __init__(self):
+        self.filters: Dict[str, Any] = {}
+        self.conflict = False
+
+    def set(self, key: str, value: Any):
+        if key in self.filters and self.filters[key] != value:
+            self.conflict = True
+        self.filters[key] = value
+
+    def update(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            self.set(key, value)
+
+
+def _rules(now: datetime):
+    """(pattern, handler) pairs, applied in order; each match is removed from the text."""
+
+    def window(kind):
+        return lambda p, m: p.update(_window(kind, now))
+
+    def next_n(p, m):
+        raw = m.group(1)
+        count = int(raw) if raw.isdigit() else _NUMBERS[raw]
+        p.update(_window("weeks" if m.group(2).startswith("week") else "days", now, count))
+
+    def assignee(p, m):
+        name = m.group(1)
+        if name in _NOT_NAMES and name != "me":
+            return False
+        p.set("assignee", name)
+
+    numbers = "|".join([r"\d+"] + sorted(_NUMBERS, key=len, reverse=True))
+    return [
+        (r"\bhow many\b", lambda p, m: p.set("count", True)),
+        (r"\b(?:not (?:yet )?started|to[ -]?dos?|unstarted|backlog)\b", lambda p, m: p.set("status", "todo")),
+        (r"\b(?:not (?:yet )?(?:done|completed|finished)|open|pending|outstanding|incomplete|unfinished|remaining|active)\b",
+         lambda p, m: p.set("status", OPEN_STATUSES)),
+        (r"\b(?:in[ -]progress|ongoing|underway|being worked on|started)\b", lambda p, m: p.set("status", "in_progress")),
+        (r"\b(?:completed|done|finished|closed)\b", lambda p, m: p.set("status", "completed")),
+        (r"\b(?:priority (high|medium|low)|(high|medium|low)(?:[ -]pri(?:ority|o))?)\b",
+         lambda p, m: p.set("priority", m.group(1) or m.group(2))),
+        (r"\b(?:urgent|critical)\b", lambda p, m: p.set("priority", "high")),
+        (r"\b(?:overdue|past due|late)\b", window("overdue")),
+        (r"\btoday\b", window("today")),
+        (r"\btomorrow\b", window("tomorrow")),
+        (r"\bthis week\b", window("this week")),
+        (r"\bnext week\b", window("next week")),
+        (r"\bthis month\b", window("this month")),
+        (rf"\b(?:in|within|over)?(?: the)?(?: next)? ({numbers}) (days?|weeks?)\b", next_n),
+        (r"\b(?:tagged(?: with| as)?|with (?:the )?tag|label(?:l)?ed|tag) #?([\w-]+)\b", lambda p, m: p.set("tag", m.group(1))),
+        (r"#([\w-]+)", lambda p, m: p.set("tag", m.group(1))),
+        (r"\bmy\b", lambda p, m: p.set("assignee", "me")),
+        (rf"\b(?:assigned to|owned by|belonging to|for) {_NAME}\b", assignee),
+        (rf"\b{_NAME}'s\b", assignee),
+        (r"\b(?:tasks?|todos?|items|tickets)\b", lambda p, m: p.set("noun", True)),
+    ]
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"\b(what|that|there|who|it|here)'s\b", r"\1 is", text)
+    text = re.sub(r"[?!.,;:()\"]", " ", text)
+    return " " + " ".join(text.split()) + " "
+
+
+def parse_task_query(text: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Structured filter for a plain task-listing question, or None when the
+    request needs the model (unknown words, conflicting filters, actions).
+
+    Returned keys (all optional): status (str or list), priority, assignee,
+    tag, due_from, due_to, overdue, window (human label), count (bool).
+    """
+    if not text or len(text) > 200:
+        return None
+    now = now or datetime.now()
+    normalized = remaining = _normalize(text)
+    parse = _Parse()
+    for pattern, handler in _rules(now):
+        def apply(match):
+            return match.group(0) if handler(parse, match) is False else " "
+        remaining = re.sub(pattern, apply, remaining)
+    words = remaining.split()
+    if parse.conflict or any(w not in _FILLER for w in words):
+        return None
+    filters = parse.filters
+    # "tasks" may be implied by a deadline question ("what's due tomorrow", "what is overdue")
+    if not filters.pop("noun", False) and not (filters.get("window") and re.search(r"\b(?:over)?due\b", normalized)):
+        return None
+    if filters.get("overdue"):
+        filters.setdefault("status", OPEN_STATUSES)
+    if filters.get("status") == "completed" and filters.get("window"):
+        return None  # "done this week" is about completion dates, not deadlines
+    return filters
+
+
+def matches(task, filters: Dict[str, Any]) -> bool:
+    """Whether a Task satisfies a parsed filter (used when the store has no indexes)."""
+    status = filters.get("status")
+    if status and task.status not in (status if isinstance(status, list) else [status]):
+        return False
+    if filters.get("priority") and task.priority != filters["priority"]:
+        return False
+    if filters.get("assignee") and (task.assignee or "").lower() != filters["assignee"]:
+        return False
+    if filters.get("tag") and filters["tag"] not in [t.lower() for t in task.tags]:
+        return False
+    if "due_from" in filters or "due_to" in filters:
+        if task.deadline is None:
+            return False
+        if filters.get("due_from") and task.deadline < filters["due_from"]:
+            return False
+        if filters.get("due_to") and task.deadline >= filters["due_to"]:
+            return False
+    return True
+
+
+def describe(filters: Dict[str, Any], count: int) -> str:
+    """Human phrase for a filter, e.g. "high priority tasks assigned to alice due this week"."""
+    status = filters.get("status")
+    labels = {"todo": "to-do", "in_progress": "in-progress", "completed": "completed"}
+    words = []
+    if isinstance(status, list):
+        if not filters.get("overdue"):
+            words.append("open")
+    elif status:
+        words.append(labels.get(status, status))
+    if filters.get("priority"):
+        words.append(f"{filters['priority']} priority")
+    words.append("task" if count == 1 else "tasks")
+    if filters.get("assignee"):
+        words.append(f"assigned to {filters['assignee']}")
+    if filters.get("tag"):
+        words.append(f"tagged {filters['tag']}")
+    if filters.get("window"):
+        words.append(filters["window"])
+    return " ".join(words)
+
+
+def _line(task) -> str:
+    due = f", due {task.deadline.date().isoformat()}" if task.deadline else ""
+    return f"- {task.title} [{task.priority}, {task.status}{due}] ({task.assignee})"
+
+
+def answer_task_query(filters: Dict[str, Any], manager) -> Dict[str, Any]:
+    """Answer a parsed query from the store: uses `find_tasks` indexes when available."""
+    query = {k: filters[k] for k in ("status", "priority", "assignee", "tag", "due_from", "due_to") if k in filters}
+    if hasattr(manager, "find_tasks"):
+        tasks = manager.find_tasks(**query)
+    else:
+        tasks = [t for t in manager.get_all_tasks() if matches(t, query)]
+    tasks = sorted(
+        tasks,
+        key=lambda t: (t.deadline is None, t.deadline or datetime.max, PRIORITY_ORDER.get(t.priority, 3)),
+    )
+    label = describe(filters, len(tasks))
+    if filters.get("count"):
+        text = f"There {'is' if len(tasks) == 1 else 'are'} {len(tasks)} {label}."
+    elif not tasks:
+        text = f"No {describe(filters, 2)} found."
+    else:
+        lines = [_line(t) for t in tasks[:MAX_LISTED]]
+        if len(tasks) > MAX_LISTED:
+            lines.append(f"...and {len(tasks) - MAX_LISTED} more.")
+        text = f"Found {len(tasks)} {label}:\n" + "\n".join(lines)
+    return {
+        "answer": text,
+        "count": len(tasks),
+        "tasks": [t.to_dict() for t in tasks],
+        "filters": {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in filters.items()},
+    }
+
+
+class FastPathStats:
+    """How much query traffic the deterministic path answers, per entry point. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict[str, float]] = {}
+
+    def record(self, source: str, handled: bool, elapsed_ms: float = 0.0):
+        with self._lock:
+            entry = self._sources.setdefault(source, {"handled": 0, "fallback": 0, "handled_ms": 0.0})
+            if handled:
+                entry["handled"] += 1
+                entry["handled_ms"] += elapsed_ms
+            else:
+                entry["fallback"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sources = {k: dict(v) for k, v in self._sources.items()}
+        handled = sum(s["handled"] for s in sources.values())
+        total = handled + sum(s["fallback"] for s in sources.values())
+        by_source = {
+            name: {
+                "handled": s["handled"],
+                "fallback": s["fallback"],
+                "avg_handled_ms": round(s["handled_ms"] / s["handled"], 2) if s["handled"] else 0.0,
+            }
+            for name, s in sources.items()
+        }
+        return {
+            "requests": total,
+            "handled": handled,
+            "fallback": total - handled,
+            "handled_fraction": round(handled / total, 3) if total else 0.0,
+            "by_source": by_source,
+        }
+
+
+_stats = FastPathStats()
+
+
+def fast_path_stats() -> Dict[str, Any]:
+    return _stats.stats()
+
+
+def try_fast_path(text: str, manager, source: str) -> Optional[Dict[str, Any]]:
+    """Parse and answer in one step, recording the outcome; None means "ask the model"."""
+    started = time.perf_counter()
+    filters = parse_task_query(text)
+    if filters is None:
+        _stats.record(source, False)
+        return None
+    result = answer_task_query(filters, manager)
+    _stats.record(source, True, (time.perf_counter() - started) * 1000)
+    return result
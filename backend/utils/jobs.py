@@ -0,0 +1,263 @@
+"""
+Asynchronous jobs for long-running work (agent requests, charts, reports).
+
+A job is persisted to SQLite when submitted and run on an in-process worker
+pool, so the HTTP request that created it returns immediately with an id.
+Clients poll the job, or follow its progress events, instead of holding a
+connection open for tens of seconds:
+
+    queued -> running -> succeeded | failed
+
+Handlers are plain functions `handler(params, report) -> result`; calling
+`report(event, data)` appends a progress event. Results must be JSON-serializable.
+Jobs that were queued when the process stopped are resumed on the next start;
+jobs that were running are marked failed, since handlers may have side effects.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import JOBS_DB_PATH, JOB_WORKERS, JOB_RETENTION_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+FINISHED_STATES = ("succeeded", "failed")
+
+Handler = Callable[[Dict[str, Any], Callable[[str, Dict[str, Any]], None]], Any]
+
+
+class JobStore:
+    """SQLite-backed job table and per-job event log. All methods are thread-safe."""
+
+    def __init__(self, path: str = "data/jobs.db"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def create(self, kind: str, params: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def mark_running(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'running', started_at = ? WHERE id = ?", (time.time(), job_id)
+            )
+
+    def mark_finished(self, job_id: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    "failed" if error is not None else "succeeded",
+                    json.dumps(result, default=str) if error is None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def add_event(self, job_id: str, event: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, seq, event, data, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, event, json.dumps(data, default=str), time.time()),
+            )
+        return seq
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after),
+            ).fetchall()
+        return [{"seq": r[0], "event": r[1], "data": json.loads(r[2])} for r in rows]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, params, state, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "params": json.loads(row[2]),
+            "state": row[3],
+            "result": json.loads(row[4]) if row[4] is not None else None,
+            "error": row[5],
+            "created_at": row[6],
+            "started_at": row[7],
+            "finished_at": row[8],
+        }
+
+    def recover(self) -> List[str]:
+        """Fail jobs interrupted mid-run and return the ids of queued jobs to resume."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+                "WHERE state = 'running'",
+                (time.time(),),
+            )
+            rows = self._conn.execute("SELECT id FROM jobs WHERE state = 'queued' ORDER BY created_at").fetchall()
+        return [r[0] for r in rows]
+
+    def prune(self, retention_seconds: float) -> int:
+        """Delete finished jobs (and their events) older than the retention window."""
+        cutoff = time.time() - retention_seconds
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM job_events WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE state IN ('succeeded', 'failed') AND finished_at < ?)",
+                (cutoff,),
+            )
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE state IN ('succeeded', 'failed') AND finished_at < ?", (cutoff,)
+            )
+            return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Runs persisted jobs on a worker pool. Handlers are registered per job kind."""
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.store = store
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self._handlers: Dict[str, Handler] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "resumed": 0}
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._handlers)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            return self._pool
+
+    def start(self):
+        """Prune old jobs and resume the ones still queued from a previous run."""
+        self.store.prune(self.retention_seconds)
+        for job_id in self.store.recover():
+            job = self.store.get(job_id)
+            if job["kind"] in self._handlers:
+                self._count("resumed")
+                self._executor().submit(self._run, job_id, job["kind"], job["params"])
+            else:
+                self.store.mark_finished(job_id, error=f"Unknown job kind: {job['kind']}")
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Persist a job and schedule it. Raises ValueError for an unknown kind."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind '{kind}'. Use one of: {', '.join(self.kinds)}")
+        params = params or {}
+        job_id = self.store.create(kind, params)
+        self._count("submitted")
+        self._executor().submit(self._run, job_id, kind, params)
+        return job_id
+
+    def _run(self, job_id: str, kind: str, params: Dict[str, Any]):
+        self.store.mark_running(job_id)
+        self.store.add_event(job_id, "state", {"state": "running"})
+        try:
+            result = self._handlers[kind](params, lambda event, data: self.store.add_event(job_id, event, data))
+        except Exception as e:
+            self.store.mark_finished(job_id, error=f"{type(e).__name__}: {e}")
+            self.store.add_event(job_id, "state", {"state": "failed", "error": str(e)})
+            self._count("failed")
+            return
+        self.store.mark_finished(job_id, result=result)
+        self.store.add_event(job_id, "state", {"state": "succeeded"})
+        self._count("succeeded")
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        return self.store.events(job_id, after)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "by_state": self.store.counts(), "workers": self.workers}
+
+    def shutdown(self, wait: bool = False):
+        """Stop taking work. Queued jobs stay in the table and resume on the next start()."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager; handlers are registered by the API module."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(JobStore(JOBS_DB_PATH))
+    return _manager
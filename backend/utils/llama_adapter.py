@@ -3,46 +3,45 @@ Llama Adapter - Wrapper to use Llama models instead of OpenAI
 """
 import os
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import subprocess
 import tempfile
 
+from agent.tool_calls import TOOL_CALL_INSTRUCTIONS, render_conversation, tool_signature
+from utils.llama_engine import LlamaEngine, get_llama_engine, llama_cpp_available, resolve_gguf
+from utils.model_registry import get_model_registry
+
 class LlamaClient:
     """
-    Llama client adapter that mimics OpenAI/AISuite interface
+    Llama client adapter that mimics OpenAI/AISuite interface.
+    GGUF models run in-process on a shared, warm LlamaEngine when
+    llama-cpp-python is installed; otherwise each call goes through the llama CLI.
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, engine: Optional[LlamaEngine] = None):
         """
         Initialize Llama client
         
         Args:
             model_path: Path to downloaded Llama model (auto-detected if None)
+            engine: In-process engine to use (default: shared engine for the model's .gguf file)
         """
-        self.model_path = model_path or self._find_model()
-        self.model_loaded = False
+        self.model_path = model_path or (engine.model_path if engine else None) or self._find_model()
+        self.engine = engine
+        if self.engine is None:
+            gguf = resolve_gguf(self.model_path)
+            if gguf and llama_cpp_available():
+                self.engine = get_llama_engine(gguf)
+        self.model_loaded = self.engine is not None and self.engine.stats()["loaded"]
+        self._chat = ChatCompletion(self)
         
     def _find_model(self) -> Optional[str]:
-        """Find Llama model in default locations"""
-        # Check common model paths
-        possible_paths = [
-            os.path.expanduser("~/.llama/models"),
-            os.path.expanduser("~/models"),
-            "./models",
-            os.path.expanduser("~/.cache/llama"),
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                # Look for model files
-                for item in os.listdir(path):
-                    item_path = os.path.join(path, item)
-                    if os.path.isdir(item_path):
-                        # Check if it's a model directory
-                        if any(f.endswith(('.gguf', '.bin', '.safetensors')) for f in os.listdir(item_path)):
-                            return item_path
-        
-        return None
+        """Find a Llama model in the default locations (cached by the model registry)"""
+        model = get_model_registry().find()
+        if model is None:
+            return None
+        # GGUF files run in-process; the CLI takes the model directory
+        return model["path"] if model["format"] == "gguf" else model["dir"]
     
     def _call_llama_cli(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
@@ -84,16 +83,40 @@ class LlamaClient:
         except subprocess.TimeoutExpired:
             raise RuntimeError("Llama request timed out")
     
+    @staticmethod
+    def _engine_messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """Complete a prompt on the in-process engine, or the llama CLI as a fallback."""
+        if self.engine is not None:
+            return self.engine.complete(self._engine_messages(prompt, system_prompt))
+        return self._call_llama_cli(prompt, system_prompt)
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Yield text as it is generated (the CLI fallback yields the whole reply at once)."""
+        if self.engine is not None:
+            yield from self.engine.stream(self._engine_messages(prompt, system_prompt))
+        else:
+            yield self._call_llama_cli(prompt, system_prompt)
+
+    @property
     def chat(self):
-        """Return chat completion interface"""
-        return ChatCompletion(self)
+        """Orchestrator uses client.chat.completions.create (no parens)."""
+        return self._chat
+
+    def stats(self) -> Dict[str, Any]:
+        """Engine counters for /api/metrics (None when running through the CLI)."""
+        return {"engine": self.engine.stats() if self.engine is not None else None}
     
     def _convert_tools_to_prompt(self, tools: List) -> str:
         """Convert tools list to prompt format for Llama"""
         tools_desc = []
         for tool in tools:
             if hasattr(tool, '__name__') and hasattr(tool, '__doc__'):
-                tools_desc.append(f"- {tool.__name__}: {tool.__doc__ or 'No description'}")
+                tools_desc.append(f"- {tool_signature(tool)}: {tool.__doc__ or 'No description'}")
         
         return "\n".join(tools_desc)
 
@@ -103,6 +126,35 @@ class ChatCompletion:
     
     def __init__(self, client: LlamaClient):
         self.client = client
+
+    @property
+    def completions(self):
+        """Orchestrator calls client.chat.completions.create(...)"""
+        return self
+
+    def _build_prompt(self, messages: List[Dict[str, str]], tools: Optional[List]) -> tuple:
+        """(system_prompt, user_prompt) for the model."""
+        system_prompt = None
+        user_messages = []
+        
+        for msg in messages:
+            if msg.get("role") == "system":
+                system_prompt = msg.get("content", "")
+            elif msg.get("role") == "user":
+                user_messages.append(msg.get("content", ""))
+        
+        # Combine user messages; later tool-calling turns send the whole exchange
+        if any(msg.get("role") in ("assistant", "tool") for msg in messages):
+            user_prompt = render_conversation(messages)
+        else:
+            user_prompt = "\n".join(user_messages)
+        
+        # Tools go in the system prompt so system + tools is a stable prefix the
+        # engine can reuse across requests; only the user part varies.
+        if tools:
+            tools_desc = self.client._convert_tools_to_prompt(tools)
+            system_prompt = f"{system_prompt or ''}\n\nAvailable tools:\n{tools_desc}\n\n{TOOL_CALL_INSTRUCTIONS}".lstrip()
+        return system_prompt, user_prompt
     
     def create(
         self,
@@ -124,41 +176,36 @@ class ChatCompletion:
         Returns:
             LlamaResponse object compatible with OpenAI format
         """
-        # Extract system and user messages
-        system_prompt = None
-        user_messages = []
-        
-        for msg in messages:
-            if msg.get("role") == "system":
-                system_prompt = msg.get("content", "")
-            elif msg.get("role") == "user":
-                user_messages.append(msg.get("content", ""))
-        
-        # Combine user messages
-        user_prompt = "\n".join(user_messages)
-        
-        # Add tools information if provided
-        if tools:
-            tools_desc = self.client._convert_tools_to_prompt(tools)
-            user_prompt += f"\n\nAvailable tools:\n{tools_desc}"
-            user_prompt += "\n\nUse these tools to answer the user's request."
+        system_prompt, user_prompt = self._build_prompt(messages, tools)
         
         # Call Llama
         try:
-            response_text = self.client._call_llama_cli(user_prompt, system_prompt)
+            response_text = self.client.generate(user_prompt, system_prompt)
             
             return LlamaResponse(response_text, tools)
         except Exception as e:
             # Fallback: return error message
-            return LlamaResponse(f"Error: {str(e)}", tools)
+            return LlamaResponse(f"Error: {str(e)}", tools, error=str(e))
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        tools: Optional[List] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Like create(), but yields text chunks as the model generates them. Raises on errors."""
+        system_prompt, user_prompt = self._build_prompt(messages, tools)
+        yield from self.client.generate_stream(user_prompt, system_prompt)
 
 
 class LlamaResponse:
     """Response object compatible with OpenAI format"""
     
-    def __init__(self, content: str, tools: Optional[List] = None):
+    def __init__(self, content: str, tools: Optional[List] = None, error: Optional[str] = None):
         self.choices = [LlamaChoice(content, tools)]
         self.model = "llama-3.3-70b"
+        self.error = error
         self.usage = {
             "prompt_tokens": len(content.split()),  # Approximation
             "completion_tokens": len(content.split()),
@@ -184,27 +231,20 @@ class LlamaMessage:
         self.tool_calls = []  # Llama doesn't have native tool calling, but we can parse
 
 
-# Alternative: Use llama-cpp-python for better integration
-def create_llama_client_from_cpp(model_path: str):
+# In-process llama-cpp-python engine (model loaded once and kept warm)
+def create_llama_client_from_cpp(model_path: str) -> LlamaClient:
     """
-    Create Llama client using llama-cpp-python (better integration)
+    Create a Llama client backed by the shared in-process engine for a GGUF model.
+    Honours LLAMA_N_CTX / LLAMA_N_THREADS.
     
     Requires: pip install llama-cpp-python
     """
-    try:
-        from llama_cpp import Llama
-        
-        llm = Llama(
-            model_path=model_path,
-            n_ctx=4096,  # Context window
-            n_threads=4,  # CPU threads
-            verbose=False
-        )
-        
-        return llm
-    except ImportError:
+    if not llama_cpp_available():
         raise ImportError(
             "llama-cpp-python not installed. "
             "Install with: pip install llama-cpp-python"
         )
-
+    gguf = resolve_gguf(model_path)
+    if gguf is None:
+        raise ValueError(f"No .gguf model found at {model_path}")
+    return LlamaClient(engine=get_llama_engine(gguf))
@@ -0,0 +1,304 @@
+"""
+Persistent local inference engine for GGUF models (llama-cpp-python).
+
+The model is loaded once, on the engine's worker thread, and stays warm for
+the life of the process. A llama.cpp context is not thread-safe, so requests
+go through a bounded queue and are decoded one at a time by that worker;
+tokens are handed back to the caller as they are generated.
+
+Agent prompts all start with the same system prompt + tool manifest, so the
+engine avoids re-evaluating that prefix:
+
+- llama-cpp-python reuses the KV cache for the longest token prefix shared with
+  the previous prompt, and a RAM state cache (LLAMA_PREFIX_CACHE_MB) restores
+  the evaluated state of earlier prompts when prefixes alternate.
+- Whatever is waiting in the queue is taken as one micro-batch (up to
+  LLAMA_BATCH_MAX) and ordered so requests with the same system prefix run
+  back to back, starting with the prefix already in the context. The
+  high-level llama-cpp API decodes one sequence at a time, so this is the
+  batching the runtime allows.
+
+    engine = get_llama_engine("models/llama-3.2-1b-instruct.Q4_K_M.gguf")
+    for text in engine.stream([{"role": "user", "content": "Hi"}]):
+        ...
+
+Requires: pip install llama-cpp-python
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import (
+    LLAMA_N_CTX,
+    LLAMA_N_THREADS,
+    LLAMA_N_BATCH,
+    LLAMA_MAX_TOKENS,
+    LLAMA_QUEUE_SIZE,
+    LLAMA_BATCH_MAX,
+    LLAMA_PREFIX_CACHE_MB,
+)
+
+_END = object()
+
+
+def resolve_gguf(path: Optional[str]) -> Optional[str]:
+    """A .gguf file path, or the first .gguf file inside a model directory."""
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return path if path.endswith(".gguf") else None
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".gguf"):
+                return os.path.join(path, name)
+    return None
+
+
+def _load_llama(model_path: str, n_ctx: int, n_threads: int):
+    try:
+        from llama_cpp import Llama
+    except ImportError:
+        raise ImportError(
+            "llama-cpp-python not installed. "
+            "Install with: pip install llama-cpp-python"
+        )
+    return Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, n_batch=LLAMA_N_BATCH, verbose=False)
+
+
+def prefix_key(messages: List[Dict[str, str]]) -> Optional[str]:
+    """Identifies the shared prompt prefix (the system message) of a request."""
+    if messages and messages[0].get("role") == "system":
+        return hashlib.sha1(messages[0].get("content", "").encode("utf-8")).hexdigest()
+    return None
+
+
+class _Request:
+    __slots__ = ("messages", "prefix", "max_tokens", "temperature", "out", "cancelled", "enqueued_at")
+
+    def __init__(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float):
+        self.messages = messages
+        self.prefix = prefix_key(messages)
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.out: "queue.Queue" = queue.Queue()
+        self.cancelled = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+
+class LlamaEngine:
+    """One warm llama.cpp model served from a single worker thread."""
+
+    def __init__(
+        self,
+        model_path: str,
+        n_ctx: int = LLAMA_N_CTX,
+        n_threads: int = LLAMA_N_THREADS,
+        max_queue: int = LLAMA_QUEUE_SIZE,
+        loader: Optional[Callable[[str, int, int], Any]] = None,
+        batch_max: int = LLAMA_BATCH_MAX,
+        prefix_cache_mb: int = LLAMA_PREFIX_CACHE_MB,
+    ):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self._loader = loader or _load_llama
+        self._llm = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batch_max = max(1, batch_max)
+        self.prefix_cache_mb = prefix_cache_mb
+        self._current_prefix: Optional[str] = None  # system prefix whose state is in the context
+        self.counters = {
+            "requests": 0, "completed": 0, "errors": 0, "rejected": 0, "cancelled": 0,
+            "tokens": 0, "load_ms": 0.0, "queue_wait_ms_total": 0.0, "ttft_ms_total": 0.0,
+            "batches": 0, "batched_requests": 0, "prefix_reuse": 0,
+        }
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self.counters[key] += amount
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._serve, name="llama-engine", daemon=True)
+                self._worker.start()
+
+    def _model(self):
+        if self._llm is None:
+            started = time.perf_counter()
+            llm = self._loader(self.model_path, self.n_ctx, self.n_threads)
+            self._enable_prefix_cache(llm)
+            self._llm = llm
+            self._count("load_ms", (time.perf_counter() - started) * 1000)
+        return self._llm
+
+    def _enable_prefix_cache(self, llm):
+        if self.prefix_cache_mb <= 0 or not hasattr(llm, "set_cache"):
+            return
+        try:
+            from llama_cpp import LlamaRAMCache
+        except ImportError:
+            return
+        llm.set_cache(LlamaRAMCache(capacity_bytes=self.prefix_cache_mb << 20))
+
+    def _next_batch(self) -> List[Optional[_Request]]:
+        """Block for one request, then take whatever else is already waiting (up to batch_max)."""
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_max and batch[-1] is not None:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _order(self, batch: List[_Request]) -> List[_Request]:
+        """Group by prefix (first-seen order, current context's prefix first); FIFO within a group."""
+        groups: Dict[Optional[str], List[_Request]] = {}
+        for request in batch:
+            groups.setdefault(request.prefix, []).append(request)
+        keys = list(groups)
+        if self._current_prefix in groups:
+            keys.remove(self._current_prefix)
+            keys.insert(0, self._current_prefix)
+        return [request for key in keys for request in groups[key]]
+
+    def _serve(self):
+        while True:
+            batch = self._next_batch()
+            stopping = batch[-1] is None
+            requests = [r for r in batch if r is not None]
+            if requests:
+                self._count("batches")
+                if len(requests) > 1:
+                    self._count("batched_requests", len(requests))
+            for request in self._order(requests):
+                self._serve_one(request)
+            if stopping:
+                return
+
+    def _serve_one(self, request: _Request):
+        if request.cancelled.is_set():
+            self._count("cancelled")
+            return
+        self._count("queue_wait_ms_total", (time.perf_counter() - request.enqueued_at) * 1000)
+        if request.prefix is not None and request.prefix == self._current_prefix:
+            self._count("prefix_reuse")
+        try:
+            self._generate(request)
+        except Exception as e:
+            self._count("errors")
+            request.out.put(e)
+        else:
+            self._count("completed")
+            request.out.put(_END)
+        finally:
+            self._current_prefix = request.prefix
+
+    def _generate(self, request: _Request):
+        llm = self._model()
+        started = time.perf_counter()
+        first = True
+        chunks = llm.create_chat_completion(
+            messages=request.messages,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            stream=True,
+        )
+        for chunk in chunks:
+            if request.cancelled.is_set():
+                self._count("cancelled")
+                break
+            text = chunk["choices"][0].get("delta", {}).get("content")
+            if not text:
+                continue
+            if first:
+                self._count("ttft_ms_total", (time.perf_counter() - started) * 1000)
+                first = False
+            self._count("tokens")
+            request.out.put(text)
+
+    def warm(self):
+        """Load the model now rather than on the first request."""
+        self._model()
+
+    def stream(
+        self, messages: List[Dict[str, str]], max_tokens: int = LLAMA_MAX_TOKENS, temperature: float = 0.2
+    ) -> Iterator[str]:
+        """Queue a chat completion and yield text as it is generated. Raises RuntimeError when the queue is full."""
+        request = _Request(messages, max_tokens, temperature)
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self._count("rejected")
+            raise RuntimeError("Local model is busy (request queue full)")
+        self._count("requests")
+        try:
+            while True:
+                item = request.out.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            request.cancelled.set()  # stop decoding if the caller stops reading
+
+    def complete(self, messages: List[Dict[str, str]], **params) -> str:
+        return "".join(self.stream(messages, **params))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self.counters)
+        served = c["completed"] + c["errors"]
+        return {
+            "model_path": self.model_path,
+            "loaded": self._llm is not None,
+            "requests": c["requests"],
+            "completed": c["completed"],
+            "errors": c["errors"],
+            "rejected": c["rejected"],
+            "cancelled": c["cancelled"],
+            "queue_depth": self._queue.qsize(),
+            "tokens": int(c["tokens"]),
+            "load_ms": round(c["load_ms"], 1),
+            "avg_queue_wait_ms": round(c["queue_wait_ms_total"] / served, 1) if served else 0.0,
+            "avg_ttft_ms": round(c["ttft_ms_total"] / c["completed"], 1) if c["completed"] else 0.0,
+            "batches": c["batches"],
+            "batched_requests": int(c["batched_requests"]),
+            "prefix_reuse": c["prefix_reuse"],
+        }
+
+    def close(self):
+        with self._lock:
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join(timeout=5)
+        self._llm = None
+
+
+_engines: Dict[str, LlamaEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_llama_engine(model_path: str) -> LlamaEngine:
+    """Process-wide engine per model file, so every client shares one loaded model."""
+    with _engines_lock:
+        engine = _engines.get(model_path)
+        if engine is None:
+            engine = _engines[model_path] = LlamaEngine(model_path)
+        return engine
+
+
+def llama_cpp_available() -> bool:
+    try:
+        import llama_cpp  # noqa: F401
+    except ImportError:
+        return False
+    return True
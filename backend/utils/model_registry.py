@@ -0,0 +1,244 @@
+"""
+Registry of local model files (Llama GGUF / bin / safetensors).
+
+The search directories are scanned once and the result is cached in memory
+and in a small JSON manifest keyed on directory mtimes. Later lookups (client
+start-up, `status` / health checks) only stat the directories recorded in
+the manifest, at most once per MODEL_REGISTRY_TTL seconds, and rescan only
+when one of them changed (a model was added, removed or replaced).
+
+GGUF metadata (architecture, context length, quantization) is read from the
+file header without loading the model.
+"""
+import json
+import os
+import re
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import MODEL_SEARCH_DIRS, MODEL_MANIFEST_PATH, MODEL_REGISTRY_TTL
+
+MODEL_EXTENSIONS = (".gguf", ".bin", ".safetensors")
+MANIFEST_VERSION = 1
+
+# llama.cpp `general.file_type` values
+GGUF_FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1",
+    10: "Q2_K", 11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M",
+    16: "Q5_K_S", 17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S",
+    22: "IQ3_XS", 23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M",
+    28: "IQ2_S", 29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+_QUANT_RE = re.compile(r"(?<![A-Za-z0-9])(I?Q\d_[A-Z0-9_]*[A-Z0-9]|Q\d_\d|BF16|F16|F32)(?![A-Za-z0-9])", re.IGNORECASE)
+
+# GGUF value types -> struct format (scalars)
+_GGUF_SCALARS = {0: "B", 1: "b", 2: "H", 3: "h", 4: "I", 5: "i", 6: "f", 7: "?", 10: "Q", 11: "q", 12: "d"}
+_GGUF_STRING, _GGUF_ARRAY = 8, 9
+
+
+def _read(f, fmt: str):
+    size = struct.calcsize("<" + fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("truncated GGUF header")
+    return struct.unpack("<" + fmt, data)[0]
+
+
+def _read_value(f, value_type: int, keep: bool):
+    if value_type in _GGUF_SCALARS:
+        return _read(f, _GGUF_SCALARS[value_type])
+    if value_type == _GGUF_STRING:
+        length = _read(f, "Q")
+        if not keep:
+            f.seek(length, os.SEEK_CUR)
+            return None
+        return f.read(length).decode("utf-8", errors="replace")
+    if value_type == _GGUF_ARRAY:
+        item_type, count = _read(f, "I"), _read(f, "Q")
+        if item_type in _GGUF_SCALARS:
+            f.seek(struct.calcsize("<" + _GGUF_SCALARS[item_type]) * count, os.SEEK_CUR)
+        else:
+            for _ in range(count):
+                _read_value(f, item_type, False)
+        return None
+    raise ValueError(f"unknown GGUF value type {value_type}")
+
+
+def read_gguf_metadata(path: str) -> Dict[str, Any]:
+    """Architecture, name, context length and quantization from a GGUF header ({} if unreadable)."""
+    wanted = {"general.architecture", "general.name", "general.file_type"}
+    found: Dict[str, Any] = {}
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != b"GGUF":
+                return {}
+            _read(f, "I")  # version
+            _read(f, "Q")  # tensor count
+            kv_count = _read(f, "Q")
+            for _ in range(kv_count):
+                key = f.read(_read(f, "Q")).decode("utf-8", errors="replace")
+                value_type = _read(f, "I")
+                keep = key in wanted or key.endswith(".context_length")
+                value = _read_value(f, value_type, keep)
+                if keep:
+                    found[key] = value
+                arch = found.get("general.architecture")
+                if arch and f"{arch}.context_length" in found and wanted <= found.keys():
+                    break
+    except (OSError, ValueError, struct.error):
+        return {}
+    arch = found.get("general.architecture")
+    return {
+        "architecture": arch,
+        "model_name": found.get("general.name"),
+        "context_length": found.get(f"{arch}.context_length") if arch else None,
+        "quantization": GGUF_FILE_TYPES.get(found.get("general.file_type")),
+    }
+
+
+def _model_entry(file_path: str) -> Dict[str, Any]:
+    path = Path(file_path)
+    entry = {
+        "name": path.stem,
+        "path": str(path),
+        "dir": str(path.parent),
+        "format": path.suffix.lstrip("."),
+        "size_bytes": path.stat().st_size,
+        "architecture": None,
+        "model_name": None,
+        "context_length": None,
+        "quantization": None,
+    }
+    if entry["format"] == "gguf":
+        entry.update({k: v for k, v in read_gguf_metadata(file_path).items() if v is not None})
+    if entry["quantization"] is None:
+        match = _QUANT_RE.search(path.stem)
+        entry["quantization"] = match.group(1).upper() if match else None
+    return entry
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    """Cached index of local model files. Thread-safe."""
+
+    def __init__(
+        self,
+        search_dirs: Optional[List[str]] = None,
+        manifest_path: Optional[str] = MODEL_MANIFEST_PATH,
+        ttl: float = MODEL_REGISTRY_TTL,
+    ):
+        dirs = search_dirs if search_dirs is not None else MODEL_SEARCH_DIRS
+        self.search_dirs = [os.path.abspath(os.path.expanduser(d)) for d in dirs]
+        self.manifest_path = manifest_path
+        self.ttl = ttl
+        self._models: Optional[List[Dict[str, Any]]] = None
+        self._signature: Dict[str, Optional[int]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"scans": 0, "manifest_loads": 0, "checks": 0}
+
+    def _scan(self) -> tuple:
+        """Walk the search dirs (and one level of model subdirectories)."""
+        signature: Dict[str, Optional[int]] = {}
+        models: List[Dict[str, Any]] = []
+        for root in self.search_dirs:
+            signature[root] = _mtime(root)
+            if signature[root] is None or not os.path.isdir(root):
+                continue
+            for entry in sorted(os.scandir(root), key=lambda e: e.name):
+                if entry.is_file() and entry.name.endswith(MODEL_EXTENSIONS):
+                    models.append(_model_entry(entry.path))
+                elif entry.is_dir():
+                    files = sorted(
+                        f.path for f in os.scandir(entry.path) if f.is_file() and f.name.endswith(MODEL_EXTENSIONS)
+                    )
+                    if files:
+                        signature[entry.path] = _mtime(entry.path)
+                        models.extend(_model_entry(f) for f in files)
+        self.counters["scans"] += 1
+        return signature, models
+
+    def _load_manifest(self) -> bool:
+        if not self.manifest_path:
+            return False
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != MANIFEST_VERSION or data.get("search_dirs") != self.search_dirs:
+            return False
+        self._signature = data.get("signature", {})
+        self._models = data.get("models", [])
+        self.counters["manifest_loads"] += 1
+        return True
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        Path(self.manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "search_dirs": self.search_dirs,
+                 "signature": self._signature, "models": self._models},
+                f, indent=2,
+            )
+        os.replace(tmp, self.manifest_path)
+
+    def _is_current(self) -> bool:
+        self.counters["checks"] += 1
+        return all(_mtime(path) == mtime for path, mtime in self._signature.items())
+
+    def _ensure(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._models is not None and now - self._checked_at < self.ttl:
+            return
+        if force or not ((self._models is not None or self._load_manifest()) and self._is_current()):
+            self._signature, self._models = self._scan()
+            self._save_manifest()
+        self._checked_at = now
+
+    def models(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """All known model files with metadata (size, format, quantization, context length)."""
+        with self._lock:
+            self._ensure(force=refresh)
+            return [dict(m) for m in self._models]
+
+    def find(self, name: Optional[str] = None, fmt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        First model whose name contains `name` (case-insensitive) and, if given,
+        has format `fmt`. GGUF files are preferred, since they run in-process.
+        """
+        candidates = [
+            m for m in self.models()
+            if (name is None or name.lower() in m["name"].lower()) and (fmt is None or m["format"] == fmt)
+        ]
+        candidates.sort(key=lambda m: m["format"] != "gguf")
+        return candidates[0] if candidates else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "models": len(self._models or [])}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide registry for the configured search directories."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+    return _registry
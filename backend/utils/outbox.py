@@ -0,0 +1,265 @@
+"""
+Durable notification outbox (SQLite).
+
+Every webhook message is written here before delivery, with per-target state:
+pending -> inflight -> delivered, or back to pending with exponential backoff,
+or dead after max_attempts. Messages survive restarts and provider outages.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (state, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_delivered ON outbox (delivered_at);
+"""
+
+
+class Outbox:
+    """SQLite-backed outbox. All methods are thread-safe."""
+
+    def __init__(
+        self,
+        path: str = "data/outbox.db",
+        max_attempts: int = 8,
+        base_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        retention_seconds: float = 7 * 24 * 3600,
+    ):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max(1, max_attempts)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # Messages claimed by a worker that died mid-delivery go back to pending.
+        self._conn.execute("UPDATE outbox SET state = 'pending' WHERE state = 'inflight'")
+
+    def enqueue(self, target: str, url: str, payload: Dict[str, Any], delay: float = 0.0) -> int:
+        """Add a message; `delay` holds it back (e.g. a coalescing window)."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO outbox (target, url, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (target, url, json.dumps(payload), now + delay, now),
+            )
+            return cur.lastrowid
+
+    def pending_count(self, target: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE state = 'pending' AND target = ?", (target,)
+            ).fetchone()[0]
+
+    def expedite(self, target: str) -> int:
+        """Make a target's not-yet-attempted pending messages due now (size threshold reached)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET next_attempt_at = ? WHERE state = 'pending' AND target = ? AND attempts = 0",
+                (time.time(), target),
+            )
+            return cur.rowcount
+
+    def defer(self, ids: List[int], delay: float):
+        """Return claimed messages to pending without using up an attempt (rate limited)."""
+        due = time.time() + delay
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET state = 'pending', next_attempt_at = ? WHERE id = ?", [(due, i) for i in ids]
+            )
+
+    def claim_due(self, limit: int) -> List[Dict[str, Any]]:
+        """Atomically move up to `limit` due messages to inflight and return them."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, target, url, payload, attempts FROM outbox "
+                    "WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE outbox SET state = 'inflight' WHERE id = ?", [(r[0],) for r in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {"id": r[0], "target": r[1], "url": r[2], "payload": json.loads(r[3]), "attempts": r[4]}
+            for r in rows
+        ]
+
+    def claim_due_groups(self, max_groups: int, max_per_group: int, coalesce_targets=()) -> List[Dict[str, Any]]:
+        """
+        Claim due messages grouped for delivery. Messages for the same (target, url)
+        in `coalesce_targets` share a group of up to `max_per_group`; others are
+        one message per group. Returns [{"ids", "target", "url", "payloads"}], oldest first.
+        """
+        if max_groups <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, target, url, payload FROM outbox "
+                    "WHERE state = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                    (now, max_groups * max(1, max_per_group)),
+                ).fetchall()
+                groups: List[Dict[str, Any]] = []
+                open_groups: Dict[tuple, Dict[str, Any]] = {}
+                for message_id, target, url, payload in rows:
+                    key = (target, url)
+                    group = open_groups.get(key) if target in coalesce_targets else None
+                    if group is None or len(group["ids"]) >= max_per_group:
+                        if len(groups) >= max_groups:
+                            continue
+                        group = {"ids": [], "target": target, "url": url, "payloads": []}
+                        groups.append(group)
+                        if target in coalesce_targets:
+                            open_groups[key] = group
+                    group["ids"].append(message_id)
+                    group["payloads"].append(json.loads(payload))
+                # The window runs from the oldest event: once it is due, later
+                # events for the same channel ride along instead of waiting.
+                for (target, url), group in open_groups.items():
+                    room = max_per_group - len(group["ids"])
+                    if room <= 0:
+                        continue
+                    extra = self._conn.execute(
+                        "SELECT id, payload FROM outbox WHERE state = 'pending' AND attempts = 0 "
+                        "AND target = ? AND url = ? AND id > ? ORDER BY id LIMIT ?",
+                        (target, url, group["ids"][-1], room),
+                    ).fetchall()
+                    for message_id, payload in extra:
+                        group["ids"].append(message_id)
+                        group["payloads"].append(json.loads(payload))
+                claimed =[(i,) for g in groups for i in g["ids"]]
+                if claimed:
+                    self._conn.executemany("UPDATE outbox SET state = 'inflight' WHERE id = ?", claimed)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return groups
+
+    def mark_delivered(self, ids: List[int]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET state = 'delivered', attempts = attempts + 1, delivered_at = ?, last_error = NULL WHERE id = ?",
+                [(now, i) for i in ids],
+            )
+
+    def mark_failed(self, ids: List[int], error: str):
+        """Schedule a retry with exponential backoff, or dead-letter after max_attempts."""
+        now = time.time()
+        with self._lock:
+            for message_id in ids:
+                row = self._conn.execute("SELECT attempts FROM outbox WHERE id = ?", (message_id,)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                if attempts >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE outbox SET state = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                        (attempts, error, message_id),
+                    )
+                else:
+                    delay = min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1)))
+                    self._conn.execute(
+                        "UPDATE outbox SET state = 'pending', attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                        (attempts, error, now + delay, message_id),
+                    )
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next pending message is due (0 if one is due now, None if none pending)."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE state = 'pending'").fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def requeue_dead(self) -> int:
+        """Give dead-lettered messages a fresh set of attempts."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt_at = ? WHERE state = 'dead'",
+                (time.time(),),
+            )
+            return cur.rowcount
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, target, attempts, last_error, created_at FROM outbox WHERE state = 'dead' ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"id": r[0], "target": r[1], "attempts": r[2], "last_error": r[3], "created_at": r[4]}
+            for r in rows
+        ]
+
+    def prune(self) -> int:
+        """Delete delivered messages older than the retention window."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM outbox WHERE state = 'delivered' AND delivered_at < ?",
+                (time.time() - self.retention_seconds,),
+            )
+            return cur.rowcount
+
+    def stats(self, window_seconds: float = 60.0) -> Dict[str, Any]:
+        """Backlog and throughput figures for sizing the dispatcher."""
+        now = time.time()
+        with self._lock:
+            by_state = dict(self._conn.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+            by_target = {}
+            for target, state, count in self._conn.execute(
+                "SELECT target, state, COUNT(*) FROM outbox GROUP BY target, state"
+            ).fetchall():
+                by_target.setdefault(target, {})[state] = count
+            delivered_recent = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE state = 'delivered' AND delivered_at >= ?",
+                (now - window_seconds,),
+            ).fetchone()[0]
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM outbox WHERE state IN ('pending', 'inflight')"
+            ).fetchone()[0]
+        return {
+            "backlog": by_state.get("pending", 0) + by_state.get("inflight", 0),
+            "by_state": by_state,
+            "by_target": by_target,
+            "delivered_per_minute": round(delivered_recent * 60.0 / window_seconds, 2),
+            "oldest_pending_age_s": round(now - oldest, 2) if oldest else None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
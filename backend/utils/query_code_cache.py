@@ -0,0 +1,342 @@
+"""
+Cache of LLM-generated query code, keyed on the shape of the request.
+
+The code written by `generate_query_code` reads `tasks` at execution time, so
+it depends on the question, not on the data. Literals in the request (quoted
+text, dates, numbers, and known assignee / tag names after "assigned to" /
+"for" / "by", or as possessives) are replaced by placeholders to form the key,
+and string / number literals of the stored code that are exactly one of
+those values are replaced by markers. "workload summary for alice" therefore
+reuses the code generated for "workload summary for bob", with "bob"
+substituted. Values are filled in as Python literals (repr), never pasted
+into existing strings, and quoted request text may not contain quotes,
+backslashes or braces, so a request cannot inject code into a cached template.
+
+Markers remember how the code cased the value ("alice" from a request for
+"Alice" is refilled lower-cased), and the key records the request's casing so
+ambiguous cases are only shared between requests cased alike. Code in which a
+request literal does not appear as a marker is not stored.
+
+Only code that executed without error and found results is stored. Entries sit in a bounded LRU
+(memory, persisted to SQLite). Entries older than the TTL are not served
+directly, but are kept as a fallback for when regenerated code fails.
+"""
+import ast
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import threading
+import time
+import tokenize
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    QUERY_CODE_CACHE_ENABLED,
+    QUERY_CODE_CACHE_MAX_ENTRIES,
+    QUERY_CODE_CACHE_TTL,
+    QUERY_CODE_CACHE_DB_PATH,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_code_cache (
+    key TEXT PRIMARY KEY,
+    shape TEXT NOT NULL,
+    code TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_query_code_cache_last_used ON query_code_cache (last_used);
+"""
+
+# Words after "for" / "by" / "'s" that are not names
+_NOT_LITERALS = {
+    "me", "my", "the", "this", "next", "last", "today", "tomorrow", "yesterday", "each", "all",
+    "every", "a", "an", "week", "month", "year", "day", "priority", "status", "what", "that",
+    "it", "there", "who", "here", "team", "everyone", "now", "tasks", "task", "us", "them",
+}
+
+# (kind, pattern); group 1 is the literal value
+_LITERAL_PATTERNS = [
+    ("text", re.compile(r"(?<![\w])\"([^\"'\\{}\n]{1,80})\"(?![\w])")),
+    ("text", re.compile(r"(?<![\w])'([^\"'\\{}\n]{1,80})'(?![\w])")),
+    ("date", re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")),
+    ("number", re.compile(r"(?<![\w.-])(\d+)(?![\w.])")),
+    ("name", re.compile(
+        r"\b(?:assigned to|owned by|for|by|from|tagged(?: with| as)?|with tag|tag)\s+#?([A-Za-z][\w.@-]*)", re.IGNORECASE
+    )),
+    ("name", re.compile(r"\b([A-Za-z][\w.@-]*)'s\b")),
+]
+
+# Bumped when the template format changes, so older stored templates are never filled
+TEMPLATE_FORMAT = 2
+
+# __QP<index><case>__ stands for a whole literal. Case "n" is a number token (filled as digits);
+# the others are string tokens filled as repr(value): "" as typed, l / u / t lower / upper / title-cased
+_MARKER = "__QP{}{}__"
+_MARKER_RE = re.compile(r"__QP(\d+)([lutn]?)__")
+_CASES = {"": lambda v: v, "l": str.lower, "u": str.upper, "t": str.title}
+
+
+def _case_class(value: str) -> str:
+    if value.islower() or not any(c.isalpha() for c in value):
+        return ""
+    if value.isupper():
+        return ":upper"
+    if value.istitle():
+        return ":title"
+    return ":mixed"
+
+
+def parameterize(request: str, known_names: Optional[set] = None) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    (shape, params) for a request: the normalized text with each literal
+    replaced by <kind> (plus its casing, e.g. <name:title>), and the
+    [(kind, value)] list in order of appearance. Names are only parameters
+    when they are in `known_names` (lower-cased assignees / tags); any other
+    word after "for" / "by" ("sorted by deadline") stays part of the shape.
+    """
+    known_names = known_names or set()
+    text = re.sub(r"\s+", " ", request).strip().rstrip("?!. ")
+    spans = []
+    for kind, pattern in _LITERAL_PATTERNS:
+        for match in pattern.finditer(text):
+            value = match.group(1)
+            if kind == "name" and (value.lower() in _NOT_LITERALS or value.lower() not in known_names):
+                continue
+            start, end = match.span(1)
+            if kind == "text":
+                start, end = start - 1, end + 1  # the quotes belong to the literal
+            if any(start < e and s < end for s, e, _, _ in spans):
+                continue
+            spans.append((start, end, kind, value))
+    spans.sort()
+    shape, params, last = [], [], 0
+    for start, end, kind, value in spans:
+        shape.append(text[last:start].lower())
+        shape.append(f"<{kind}{_case_class(value)}>")
+        params.append((kind, value))
+        last = end
+    shape.append(text[last:].lower())
+    return "".join(shape), params
+
+
+def make_key(shape: str, model: str, prompt: str) -> str:
+    """Cache key: request shape + model + the prompt text (a prompt change invalidates old code)."""
+    raw = json.dumps([shape, model, hashlib.sha256(prompt.encode("utf-8")).hexdigest(), TEMPLATE_FORMAT])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _token_spans(code: str):
+    """(kind, start, end) absolute offsets of string and number tokens."""
+    offsets = [0]
+    for line in code.splitlines(keepends=True):
+        offsets.append(offsets[-1] + len(line))
+    for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+        if tok.type in (tokenize.STRING, tokenize.NUMBER):
+            start = offsets[tok.start[0] - 1] + tok.start[1]
+            end = offsets[tok.end[0] - 1] + tok.end[1]
+            yield ("number" if tok.type == tokenize.NUMBER else "string"), start, end
+
+
+def _string_value(token: str) -> Optional[str]:
+    """Value of a plain string literal token; None for f-strings, bytes and anything else."""
+    if token[:2].lower().lstrip("r").startswith(("f", "b")):
+        return None
+    try:
+        value = ast.literal_eval(token)
+    except (ValueError, SyntaxError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _token_marker(kind: str, token: str, params: List[Tuple[str, str]]) -> Optional[str]:
+    """Marker for a literal token that is exactly one of the request's values (any casing), else None."""
+    if kind == "number":
+        for i, (param_kind, value) in enumerate(params):
+            if param_kind == "number" and token == value:
+                return _MARKER.format(i, "n")
+        return None
+    found = _string_value(token)
+    if found is None:
+        return None
+    for i, (_, value) in enumerate(params):
+        for case, convert in _CASES.items():
+            if found == convert(value):
+                return _MARKER.format(i, case)
+    return None
+
+
+def templatize(code: str, params: List[Tuple[str, str]]) -> Optional[str]:
+    """
+    Replace string / number literals that are exactly one of the request's
+    values with markers (text inside longer strings and f-strings is left
+    alone). None if the code cannot be tokenized, or if some request value
+    has no marker (the code would not follow a new value).
+    """
+    if not params:
+        return code
+    try:
+        spans = list(_token_spans(code))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return None
+    out, last = [], 0
+    for kind, start, end in spans:
+        token = code[start:end]
+        out.append(code[last:start])
+        out.append(_token_marker(kind, token, params) or token)
+        last = end
+    out.append(code[last:])
+    template = "".join(out)
+    if {int(m.group(1)) for m in _MARKER_RE.finditer(template)} != set(range(len(params))):
+        return None
+    return template
+
+
+def fill(template: str, params: List[Tuple[str, str]]) -> Optional[str]:
+    """Substitute this request's values into a stored template as literals (None on mismatch)."""
+    def literal(match):
+        value = params[int(match.group(1))][1]
+        if match.group(2) == "n":
+            if not value.isdigit():
+                raise ValueError(value)
+            return value
+        return repr(_CASES[match.group(2)](value))
+
+    try:
+        return _MARKER_RE.sub(literal, template)
+    except (IndexError, ValueError):
+        return None
+
+
+class QueryCodeCache:
+    """LRU cache of validated query-code templates, optionally backed by SQLite. Thread-safe."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 7 * 24 * 3600.0, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, code)
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self.counters = {
+            "hits": 0, "stale": 0, "misses": 0, "stores": 0, "evictions": 0,
+            "invalidations": 0, "stale_fallbacks": 0,
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"code", "created_at", "fresh"} for a key, stale entries included; None if absent."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            elif self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created_at, code FROM query_code_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._put_memory(key, entry)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            if self._conn is not None:
+                self._conn.execute("UPDATE query_code_cache SET last_used = ? WHERE key = ?", (now, key))
+            fresh = now - entry[0] < self.ttl
+            self.counters["hits" if fresh else "stale"] += 1
+            return {"code": entry[1], "created_at": entry[0], "fresh": fresh}
+
+    def _put_memory(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            if self._conn is None:
+                self.counters["evictions"] += 1
+
+    def set(self, key: str, shape: str, code: str):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, (now, code))
+            self.counters["stores"] += 1
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_code_cache (key, shape, code, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, shape, code, now, now),
+            )
+            over = self._conn.execute("SELECT COUNT(*) FROM query_code_cache").fetchone()[0] - self.max_entries
+            if over > 0:
+                self._conn.execute(
+                    "DELETE FROM query_code_cache WHERE key IN "
+                    "(SELECT key FROM query_code_cache ORDER BY last_used ASC LIMIT ?)",
+                    (over,),
+                )
+                self.counters["evictions"] += over
+
+    def invalidate(self, key: str):
+        """Drop an entry whose code no longer executes (e.g. after a schema change)."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_code_cache WHERE key = ?", (key,))
+            self.counters["invalidations"] += 1
+
+    def record_stale_fallback(self):
+        with self._lock:
+            self.counters["stale_fallbacks"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_code_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._entries)
+            disk_size = (
+                self._conn.execute("SELECT COUNT(*) FROM query_code_cache").fetchone()[0]
+                if self._conn is not None else None
+            )
+        lookups = counters["hits"] + counters["stale"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+            "size": size,
+            "disk_size": disk_size,
+            "ttl": self.ttl,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[QueryCodeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_code_cache() -> Optional[QueryCodeCache]:
+    """Process-wide query-code cache (None when QUERY_CODE_CACHE_ENABLED is off)."""
+    global _cache
+    if not QUERY_CODE_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCodeCache(
+                QUERY_CODE_CACHE_MAX_ENTRIES, QUERY_CODE_CACHE_TTL, QUERY_CODE_CACHE_DB_PATH or None
+            )
+    return _cache
@@ -0,0 +1,37 @@
+"""Token-bucket rate limiter (thread-safe)."""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allows `rate` operations per second on average with bursts up to `capacity`.
+    try_acquire() never blocks; wait_time() says how long until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens or self.rate <= 0:
+                return 0.0
+            return (tokens - self._tokens) / self.rate
@@ -0,0 +1,375 @@
+"""
+Process pool for running LLM-generated query and chart code.
+
+With SANDBOX_MODE=process, SafeCodeExecutor and execute_chart_code hand code
+to pre-warmed worker processes instead of calling exec in the server:
+
+- each worker imports pandas / matplotlib (Agg) once at start-up and keeps a
+  read-only TaskSnapshot of the tasks, re-sent only when the store changes;
+- a run is limited by wall-clock time (SANDBOX_TIMEOUT, enforced by the
+  parent, which kills the worker), CPU time (SANDBOX_CPU_SECONDS, a profiling
+  timer inside the worker) and memory (SANDBOX_MEMORY_MB of extra address
+  space via RLIMIT_AS);
+- a worker that hit a limit or died is replaced in the background (spawn
+  failures are retried with backoff), so the next run gets a clean process
+  and the caller never waits for a respawn;
+- runs use separate processes, so several queries / charts proceed in
+  parallel on separate cores.
+
+Workers are started with forkserver (spawn where unavailable), never by
+forking the multi-threaded server.
+"""
+import io
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import SANDBOX_WORKERS, SANDBOX_TIMEOUT, SANDBOX_CPU_SECONDS, SANDBOX_MEMORY_MB
+
+DEFAULT_PRELOAD = ("pandas", "matplotlib.pyplot")
+START_TIMEOUT = 60.0  # seconds for a worker to import its preload modules
+RESPAWN_DELAY = 0.5  # first retry delay after a failed respawn; doubles up to RESPAWN_MAX_DELAY
+RESPAWN_MAX_DELAY = 30.0
+
+
+class CPUTimeExceeded(BaseException):
+    """Raised inside a worker when a run exhausts its CPU budget (not catchable by `except Exception`)."""
+
+
+# ---------------------------------------------------------------- worker side
+
+def _limit_memory(extra_mb: int):
+    """Cap the address space at the current size plus `extra_mb` (Linux/Unix only)."""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (ImportError, OSError, ValueError):
+        return
+    limit = current + extra_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _on_cpu_limit(signum, frame):
+    raise CPUTimeExceeded()
+
+
+def _portable(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Make sure the result can travel back to the parent (pickled and unpickled)."""
+    try:
+        pickle.loads(pickle.dumps(result))
+    except Exception:
+        result["answer"] = repr(result.get("answer"))
+    return result
+
+
+def _run_query(code: str, user_request: Optional[str], snapshot) -> Dict[str, Any]:
+    from utils.code_executor import compile_block, capturing_print, snapshot_namespace, BASE_GLOBALS
+    source, compiled = compile_block(code)
+    out = io.StringIO()
+    safe_globals = dict(BASE_GLOBALS)
+    safe_globals["user_request"] = user_request or ""
+    safe_globals["print"] = capturing_print(out)
+    safe_locals = snapshot_namespace(snapshot)
+    try:
+        exec(compiled, safe_globals, safe_locals)
+        error = None
+    except MemoryError:
+        raise
+    except Exception:
+        error = traceback.format_exc()
+    answer = (
+        safe_locals.get("answer_text") or safe_locals.get("answer_rows")
+        or safe_locals.get("answer_json") or safe_locals.get("result")
+    )
+    return {
+        "code": source,
+        "stdout": out.getvalue().strip(),
+        "error": error,
+        "answer": answer,
+        "status": safe_locals.get("STATUS", "unknown"),
+    }
+
+
+def _run_chart(code: str, tasks: tuple) -> Dict[str, Any]:
+    from datetime import datetime, timedelta
+    from utils.code_executor import compile_block
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    _, compiled = compile_block(code)
+    all_tasks = list(tasks)
+    try:
+        exec(compiled, {"plt": plt, "pd": pd, "datetime": datetime, "timedelta": timedelta,
+                        "tasks": all_tasks, "all_tasks": all_tasks}, {})
+        return {"status": "success", "message": "Chart generated successfully", "error": None}
+    except MemoryError:
+        raise
+    except Exception as e:
+        return {"status": "error", "message": f"Chart generation failed: {e}", "error": str(e)}
+    finally:
+        plt.close("all")
+
+
+def _worker_main(conn, preload: Tuple[str, ...], memory_mb: int, cpu_seconds: float):
+    """Worker loop: preload, apply limits, then answer ("snapshot" | "run") messages."""
+    import importlib
+    import signal
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    from models.task import Task, TaskSnapshot
+    if memory_mb > 0:
+        _limit_memory(memory_mb)
+    if cpu_seconds > 0 and hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, _on_cpu_limit)
+    tasks: tuple = ()
+    snapshot = TaskSnapshot(tasks)
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message[0] == "snapshot":
+            tasks = tuple(Task.from_dict(d) for d in message[1])
+            snapshot = TaskSnapshot(tasks)
+            continue
+        _, kind, code, user_request = message
+        fatal = None
+        try:
+            if cpu_seconds > 0 and hasattr(signal, "setitimer"):
+                signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+            try:
+                if kind == "chart":
+                    result = _run_chart(code, tasks)
+                else:
+                    result = _run_query(code, user_request, snapshot)
+            finally:
+                if cpu_seconds > 0 and hasattr(signal, "setitimer"):
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+        except CPUTimeExceeded:
+            fatal = "cpu"
+            result = {"status": "error", "error": f"CPU time limit exceeded ({cpu_seconds:g}s)"}
+        except MemoryError:
+            fatal = "memory"
+            result = {"status": "error", "error": f"Memory limit exceeded ({memory_mb} MB)"}
+        except (SyntaxError, ValueError):
+            result = {"status": "unknown" if kind == "query" else "error", "error": traceback.format_exc()}
+        conn.send((_portable(result), fatal))
+        if fatal:
+            return  # the parent replaces this worker
+
+
+# ---------------------------------------------------------------- parent side
+
+class _Worker:
+    def __init__(self, ctx, preload, memory_mb, cpu_seconds):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, tuple(preload), memory_mb, cpu_seconds), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.snapshot_key: Any = None
+        try:
+            if not self.conn.poll(START_TIMEOUT):
+                raise EOFError
+            self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError("sandbox worker did not start")
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(5)
+        finally:
+            self.conn.close()
+
+
+class SandboxPool:
+    """Pool of limited worker processes for generated code. Thread-safe."""
+
+    def __init__(
+        self,
+        workers: int = SANDBOX_WORKERS,
+        timeout: float = SANDBOX_TIMEOUT,
+        cpu_seconds: float = SANDBOX_CPU_SECONDS,
+        memory_mb: int = SANDBOX_MEMORY_MB,
+        preload: Tuple[str, ...] = DEFAULT_PRELOAD,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.preload = preload
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self.counters = {
+            "runs": 0, "timeouts": 0, "cpu_limits": 0, "memory_limits": 0, "crashes": 0,
+            "respawns": 0, "spawn_failures": 0, "snapshots_sent": 0,
+        }
+
+    def start(self):
+        """
+        Spawn and warm up all workers (idempotent). The pool only counts as
+        started once every worker is queued; on failure the workers spawned so
+        far are stopped, RuntimeError is raised and the next call tries again.
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            spawned = []
+            try:
+                for _ in range(self.workers):
+                    spawned.append(self._spawn())
+            except Exception:
+                self._count("spawn_failures")
+                for worker in spawned:
+                    worker.kill()
+                raise
+            for worker in spawned:
+                self._idle.put(worker)
+            self._started = True
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.preload, self.memory_mb, self.cpu_seconds)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _replace(self, worker: _Worker):
+        """Kill `worker` and queue a fresh one, off the caller's thread."""
+        self._count("respawns")
+        threading.Thread(target=self._respawn, args=(worker,), name="sandbox-respawn", daemon=True).start()
+
+    def _respawn(self, worker: _Worker):
+        worker.kill()
+        delay = RESPAWN_DELAY
+        while not self._closed:
+            try:
+                fresh = self._spawn()
+            except Exception:
+                self._count("spawn_failures")
+                time.sleep(delay)
+                delay = min(delay * 2, RESPAWN_MAX_DELAY)
+                continue
+            if self._closed:
+                fresh.kill()
+            else:
+                self._idle.put(fresh)
+            return
+
+    def run(
+        self,
+        kind: str,
+        code: str,
+        snapshot: Tuple[Any, Callable[[], List[Dict[str, Any]]]],
+        user_request: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run "query" or "chart" code in a worker. `snapshot` is (key, loader):
+        the loader (task dicts) is only called when the worker's snapshot has a
+        different key; a None key always reloads. Limit violations and crashes
+        come back as {"status": "error", "error": ...}.
+        """
+        try:
+            self.start()
+        except Exception as e:
+            return {"status": "error", "error": f"Sandbox unavailable: {e}"}
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            return {"status": "error", "error": "Sandbox busy: no worker became free in time"}
+        self._count("runs")
+        key, loader = snapshot
+        try:
+            if key is None or worker.snapshot_key != key:
+                worker.conn.send(("snapshot", loader()))
+                worker.snapshot_key = key
+                self._count("snapshots_sent")
+            worker.conn.send(("run", kind, code, user_request))
+            if not worker.conn.poll(timeout):
+                self._count("timeouts")
+                self._replace(worker)
+                return {"status": "error", "error": f"Timed out after {timeout:g}s"}
+            result, fatal = worker.conn.recv()
+        except (EOFError, OSError):
+            exit_code = worker.process.exitcode
+            self._count("crashes")
+            self._replace(worker)
+            return {"status": "error", "error": f"Sandbox worker exited unexpectedly (exit code {exit_code})"}
+        except Exception as e:
+            # e.g. a result that fails to unpickle: the pipe state is unknown, so never reuse the worker
+            self._count("crashes")
+            self._replace(worker)
+            return {"status": "error", "error": f"Sandbox communication failed: {type(e).__name__}: {e}"}
+        if fatal:
+            self._count("cpu_limits" if fatal == "cpu" else "memory_limits")
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "workers": self.workers,
+            "idle": self._idle.qsize(),
+            "started": self._started,
+            "timeout": self.timeout,
+            "cpu_seconds": self.cpu_seconds,
+            "memory_mb": self.memory_mb,
+        }
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Process-wide sandbox pool (workers are started on first use or by start())."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+    return _pool
+
+
+def sandbox_stats() -> Optional[Dict[str, Any]]:
+    """Pool counters, or None if the pool was never created."""
+    return _pool.stats() if _pool is not None else None
+
+
+def close_sandbox_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
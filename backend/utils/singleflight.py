@@ -0,0 +1,124 @@
+"""
+In-flight request coalescing ("singleflight").
+
+Concurrent calls with the same key share one execution: the first caller runs
+the function, later callers wait for it and receive the same result (or the
+same exception). Nothing is cached once the call finishes — this only removes
+duplicate work that overlaps in time, e.g. a room of clients loading the same
+report when a standup starts. Shared results must be treated as read-only.
+"""
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key. Thread-safe."""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "executions": 0, "deduplicated": 0}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            self.counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters["executions"] += 1
+            else:
+                call.waiters += 1
+                self.counters["deduplicated"] += 1
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        do() for coroutines on one event loop: the first caller starts fn(),
+        later callers await the same task without blocking a thread. The task
+        keeps running for the others if the caller that started it goes away.
+        """
+        with self._lock:
+            self.counters["calls"] += 1
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                self.counters["executions"] += 1
+                task.add_done_callback(lambda _: self._forget(key, task))
+            else:
+                self.counters["deduplicated"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so a failure nobody awaited is not logged as unhandled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            counters["in_flight"] = len(self._calls) + len(self._tasks)
+        counters["dedup_rate"] = round(counters["deduplicated"] / counters["calls"], 3) if counters["calls"] else 0.0
+        return counters
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(name: str) -> SingleFlight:
+    """Named process-wide group (one per kind of work, reported in /api/metrics)."""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in groups.items()}
+
+
+def singleflight(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """Decorator: coalesce concurrent calls with equal arguments (or equal `key(*args, **kwargs)`)."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(call_key)
+            except TypeError:
+                call_key = repr(call_key)
+            return get_singleflight(name).do(call_key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
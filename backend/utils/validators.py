@@ -35,12 +35,13 @@ def validate_config() -> Dict[str, bool]:
     try:
         from config import LLM_PROVIDER, LLAMA_MODEL_PATH, OPENAI_API_KEY
         if LLM_PROVIDER == "llama":
-            # For Llama, check if model path exists or can be auto-detected
-            from utils.llama_adapter import LlamaClient
+            # For Llama, check the configured path or the cached model registry (no filesystem walk)
+            from utils.model_registry import get_model_registry
             try:
-                client = LlamaClient(model_path=LLAMA_MODEL_PATH)
-                results["llm_configured"] = client.model_path is not None or True  # Auto-detect enabled
-            except:
+                results["llm_configured"] = bool(
+                    (LLAMA_MODEL_PATH and Path(LLAMA_MODEL_PATH).exists()) or get_model_registry().find()
+                )
+            except Exception:
                 results["llm_configured"] = False
         else:
             # For OpenAI, check API key
@@ -1,6 +1,10 @@
-"""Optional webhooks: task assignments → #samayak-project-tasks; agent breakdowns → #samyak."""
-import json
-from typing import Optional, Dict, Any
+"""Optional webhooks: task assignments → #samayak-project-tasks; agent breakdowns → #samyak.
+
+notify_* functions only write to the durable outbox (utils/outbox.py); delivery,
+retries and dead-lettering happen on the background dispatcher
+(utils/dispatcher.py), so callers never wait on webhook latency.
+"""
+from typing import Optional, Dict, Any, List
 from config import (
     WEBHOOK_URL_SLACK_TASKS,
     WEBHOOK_URL_SLACK_AGENT,
@@ -10,34 +14,64 @@ from config import (
 )
 
 
-def _post(url: str, payload: Dict[str, Any]) -> bool:
-    try:
-        import urllib.request
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=5) as _:
-            return True
-    except Exception:
-        return False
+def _deliver(url: str, payload: Dict[str, Any]) -> bool:
+    """POST payload as JSON on a pooled keep-alive connection; raises on network/HTTP errors (used by the dispatcher)."""
+    from utils.http_pool import get_http_pool
+    get_http_pool().post_json(url, payload)
+    return True
+
+
+def _payload_text(payload: Dict[str, Any]) -> str:
+    return payload.get("text") or payload.get("content") or ""
+
+
+def build_digest(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge several same-target payloads into one digest message of the same shape."""
+    events = [_payload_text(p) for p in payloads]
+    text = f"{len(events)} task events:\n" + "\n".join(f"• {e}" for e in events)
+    digest = dict(payloads[0])
+    if "content" in digest:
+        digest["content"] = text[:2000]  # Discord message limit
+    else:
+        digest["text"] = text
+    return digest
+
+
+def _dispatch(target: str, url: str, payload: Dict[str, Any]) -> bool:
+    from utils.dispatcher import get_dispatcher
+    return get_dispatcher().submit(url, payload, target=target)
 
 
 def notify_task_event(event: str, task_id: str, title: str, assignee: str = "", extra: Optional[dict] = None):
     """Send task assignment/update to #samayak-project-tasks (or fallback Slack webhook)."""
     text = f"[{event}] Task {task_id}: {title}" + (f" (assignee: {assignee})" if assignee else "")
+    _send_to_task_channels(text)
+
+
+def _send_to_task_channels(text: str):
     payload_slack = {"text": text}
     payload_discord = {"content": text}
     payload_teams = {"@type": "MessageCard", "text": text}
     url_tasks = WEBHOOK_URL_SLACK_TASKS or WEBHOOK_URL_SLACK
     if url_tasks:
-        _post(url_tasks, payload_slack)
+        _dispatch("slack_tasks", url_tasks, payload_slack)
     if WEBHOOK_URL_DISCORD:
-        _post(WEBHOOK_URL_DISCORD, payload_discord)
+        _dispatch("discord", WEBHOOK_URL_DISCORD, payload_discord)
     if WEBHOOK_URL_TEAMS:
-        _post(WEBHOOK_URL_TEAMS, payload_teams)
+        _dispatch("teams", WEBHOOK_URL_TEAMS, payload_teams)
+
+
+def notify_task_batch(event: str, tasks: List[Dict[str, Any]], max_listed: int = 20):
+    """Send one aggregated message for a batch of task events (instead of one per task)."""
+    if not tasks:
+        return
+    lines = [f"[{event}] {len(tasks)} task(s)"]
+    for t in tasks[:max_listed]:
+        assignee = t.get("assignee")
+        lines.append(f"• {t.get('task_id')}: {t.get('title', '')}" + (f" (assignee: {assignee})" if assignee else ""))
+    if len(tasks) > max_listed:
+        lines.append(f"… and {len(tasks) - max_listed} more")
+    _send_to_task_channels("\n".join(lines))
 
 
 def notify_agent_breakdown(message: str, title: Optional[str] = None):
@@ -47,4 +81,4 @@ def notify_agent_breakdown(message: str, title: Optional[str] = None):
     header = title or "Agent breakdown"
     text = f"*{header}*\n\n{message}"
     payload = {"text": text}
-    _post(WEBHOOK_URL_SLACK_AGENT, payload)
+    _dispatch("slack_agent", WEBHOOK_URL_SLACK_AGENT, payload)
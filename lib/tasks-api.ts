@@ -197,6 +197,80 @@ export async function processAgentRequest(request: string): Promise<{
   return data
 }
 
+export type AgentStreamEvent =
+  | { event: "routing"; data: Record<string, unknown> }
+  | { event: "chunk"; data: { text: string } }
+  | { event: "done"; data: { response: string; model?: string; ttft_ms?: number; total_ms?: number } }
+  | { event: "error"; data: { message: string } }
+
+/** Stream the agent's answer (SSE from /api/agent/stream); resolves with the full text. */
+export async function streamAgentRequest(
+  request: string,
+  onEvent: (event: AgentStreamEvent) => void
+): Promise<string> {
+  const res = await fetch(`${API_BASE}/api/agent/stream`, {
+    method: "POST",
+    headers: authHeaders(),
+    body: JSON.stringify({ request }),
+  })
+  if (!res.ok || !res.body) throw new Error("Agent request failed")
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  let text = ""
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let split
+    while ((split = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, split)
+      buffer = buffer.slice(split + 2)
+      const event = block.match(/^event: (.*)$/m)?.[1]
+      const data = block.match(/^data: (.*)$/m)?.[1]
+      if (!event || !data) continue
+      const parsed = { event, data: JSON.parse(data) } as AgentStreamEvent
+      if (parsed.event === "chunk") text += parsed.data.text
+      if (parsed.event === "error") throw new Error(parsed.data.message)
+      onEvent(parsed)
+    }
+  }
+  return text
+}
+
+// --- Jobs (long-running agent / chart / report requests) ---
+export type JobKind = "agent" | "chart" | "report"
+
+export interface Job {
+  id: string
+  kind: JobKind
+  params: Record<string, unknown>
+  state: "queued" | "running" | "succeeded" | "failed"
+  result: unknown
+  error: string | null
+  created_at: number
+  started_at: number | null
+  finished_at: number | null
+}
+
+/** Queue a job; returns its id. Poll getJob() or follow /api/jobs/{id}/events (SSE). */
+export async function submitJob(kind: JobKind, params: Record<string, unknown> = {}): Promise<string> {
+  const res = await fetch(`${API_BASE}/api/jobs`, {
+    method: "POST",
+    headers: authHeaders(),
+    body: JSON.stringify({ kind, params }),
+  })
+  const data = await res.json().catch(() => ({}))
+  if (!res.ok) throw new Error(data.detail || "Failed to submit job")
+  return data.id
+}
+
+export async function getJob(jobId: string): Promise<Job> {
+  const res = await fetch(`${API_BASE}/api/jobs/${encodeURIComponent(jobId)}`, { headers: authHeaders() })
+  if (!res.ok) throw new Error("Job not found")
+  return res.json()
+}
+
 // --- Integrations (Slack, Gmail/Calendar) ---
 export interface IntegrationsStatus {
   slack_tasks: boolean